@@ -1,107 +1,256 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from interview_analyzer import InterviewAnalyzer
+from job_queue import JobEvents, JobQueue, JobWorkerPool
+from job_title_index import JobTitleIndex
+from model_registry import registry, warm_up_from_env
+from serving import on_worker_start
+from supabase_client import get_client
+from telemetry import configure_logging, instrument_app, metrics
+from summarization import DEFAULT_SUMMARY_TIER, SUMMARY_TIERS, TIER_MODELS
+from trait_scoring import DEFAULT_TRAIT_SCORER, TRAIT_SCORERS
+import json
+import logging
 import os
-import requests
+import time
+import uuid
+
+configure_logging()
+log = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app, resources={r"/analyze-interview": {"origins": "http://localhost:8080", "supports_credentials": True}}, methods=['POST'], allow_headers=['Content-Type'])
+CORS(app, resources={r"/analyze-interview.*": {"origins": "http://localhost:8080", "supports_credentials": True}}, methods=['GET', 'POST'], allow_headers=['Content-Type'])
+instrument_app(app)
+
+ANALYSIS_JOBS = metrics.counter("analysis_jobs_total", "Finished interview analysis jobs by status", ("status",))
+ANALYSIS_JOB_SECONDS = metrics.histogram("analysis_job_duration_seconds", "Wall time of interview analysis jobs")
 
 analyzer = InterviewAnalyzer()
+# Models behind the default settings; serve.py loads these in the master before forking
+SERVING_MODELS = [
+    TIER_MODELS[DEFAULT_SUMMARY_TIER][0],
+    "classifier" if DEFAULT_TRAIT_SCORER == 'mnli' else "sentence_encoder"
+]
+warm_up_from_env(SERVING_MODELS)
+
+# Interview analysis runs on background workers; requests only enqueue and poll
+# Job names are resolved against an in-memory title index, reloaded on a TTL
+job_titles = JobTitleIndex(lambda: get_client().select_all('jobs', columns='id,title'))
+
+# A running job whose worker has not renewed its lease for this long is treated as abandoned
+# and re-queued, so a crashed process's jobs resume without touching jobs that are still running
+job_queue = JobQueue(os.getenv('JOB_QUEUE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analysis_jobs.sqlite3')),
+                     lease=int(os.getenv('JOB_LEASE_SECONDS', '120')))
+
+# Per-row results and progress for /analyze-interview/stream subscribers
+job_events = JobEvents(buffer=int(os.getenv('JOB_EVENTS_BUFFER', '1000')))
+
+def run_analysis_job(job, progress):
+    payload = job['payload']
+
+    def report_progress(rows_done, rows_total):
+        progress(rows_done, rows_total)
+        job_events.publish(job['id'], {'type': 'progress', 'rows_done': rows_done, 'rows_total': rows_total})
+
+    def report_result(result):
+        # Rows are only forwarded to live stream subscribers, never kept for the job's lifetime
+        if not job_events.has_subscribers(job['id']):
+            return
+        result = {key: value for key, value in result.items() if key != 'row_key'}
+        job_events.publish(job['id'], {'type': 'result', **result})
+
+    start = time.perf_counter()
+    status = 'failed'
+    try:
+        result = analyzer.analyze_interview_feedback(
+            payload['job_id'], action='download', file_details=payload['file_details'],
+            progress=report_progress, stream=os.getenv('INTERVIEW_STREAM_CSV', '1') == '1',
+            on_result=report_result, trait_scorer=payload.get('trait_scorer'),
+            summary_tier=payload.get('summary_tier')
+        )
+        if isinstance(result, dict) and result.get('status') == 'error':
+            job_events.publish(job['id'], {'type': 'error', 'message': result.get('message', 'Job failed')})
+        else:
+            status = 'done'
+            job_events.publish(job['id'], {'type': 'summary', 'result': result})
+    except Exception as e:
+        job_events.publish(job['id'], {'type': 'error', 'message': str(e)})
+        raise
+    finally:
+        job_events.close(job['id'])
+        ANALYSIS_JOBS.inc(status=status)
+        ANALYSIS_JOB_SECONDS.observe(time.perf_counter() - start)
+    return result
+
+metrics.callback("analysis_queue_depth", "Queued and running interview analysis jobs", job_queue.depth)
+metrics.callback("job_title_index_size", "Jobs in the in-memory title index", lambda: job_titles.stats()['jobs'])
+
+# Threads do not survive a fork, so under serve.py every worker process starts its own;
+# claims go through SQLite, so workers in different processes never run the same job.
+# Forward passes from concurrent jobs are merged by the inference scheduler, so a second
+# job thread feeds the same batches rather than competing for cores
+job_workers = JobWorkerPool(job_queue, run_analysis_job, workers=int(os.getenv('INTERVIEW_WORKERS', '2')))
+on_worker_start(job_workers.start)
+
+def job_status(job):
+    """Public view of a queued analysis job.
+
+    `rows_total` is null while the CSV is still being read, since rows are
+    counted as they stream in; it is set once the whole file has been read.
+    """
+    status = {
+        'analysis_id': job['id'],
+        'status': job['status'],
+        'job_id': job['payload']['job_id'],
+        'file_name': job['payload']['file_details'].get('file_name'),
+        'rows_done': job['rows_done'],
+        'rows_total': job['rows_total'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at']
+    }
+    if job['status'] == 'done':
+        status['result'] = job['result']
+    elif job['status'] == 'failed':
+        status['error'] = job['error']
+    return status
+
+def submit_analysis(data, analysis_id=None):
+    """Validate a request body and queue its analysis. Returns (job, None) or (None, error response)
+
+    A new analysis gets `analysis_id` as its id when one is given.
+    """
+    if not data:
+        return None, (jsonify({'status': 'error', 'message': 'No data received'}), 400)
+
+    job_name = data.get('job_name')
+    if not job_name and not data.get('job_id'):
+        return None, (jsonify({'status': 'error', 'message': 'Job name is required'}), 400)
+
+    trait_scorer = data.get('trait_scorer') or DEFAULT_TRAIT_SCORER
+    if trait_scorer not in TRAIT_SCORERS:
+        return None, (jsonify({
+            'status': 'error',
+            'message': f"trait_scorer must be one of: {', '.join(TRAIT_SCORERS)}"
+        }), 400)
+
+    summary_tier = data.get('summary_tier') or DEFAULT_SUMMARY_TIER
+    if summary_tier not in SUMMARY_TIERS:
+        return None, (jsonify({
+            'status': 'error',
+            'message': f"summary_tier must be one of: {', '.join(SUMMARY_TIERS)}"
+        }), 400)
+
+    if data.get('job_id'):
+        # Lets callers pick one of the candidates returned for an ambiguous name
+        job_id = data['job_id']
+    else:
+        match = resolve_job(job_name)
+        if not match:
+            return None, (jsonify({'status': 'error', 'message': f'No job found with name: {job_name}'}), 404)
+        if match['ambiguous']:
+            return None, (jsonify({
+                'status': 'error',
+                'message': f'Job name is ambiguous: {job_name}',
+                'candidates': match['candidates']
+            }), 409)
+        job_id = match['job_id']
+
+    file_details = analyzer.get_interview_feedback_file(job_id)
+    if not file_details:
+        return None, (jsonify({'status': 'error', 'message': 'Could not find interview feedback file'}), 404)
+
+    # Re-submitting the same job, file and model settings attaches to the analysis already in flight
+    job, created = job_queue.submit(
+        f"{job_id}:{file_details['file_url']}:{trait_scorer}:{summary_tier}",
+        {'job_id': job_id, 'file_details': file_details, 'trait_scorer': trait_scorer, 'summary_tier': summary_tier},
+        job_id=analysis_id
+    )
+    log.info(f"Found job ID: {job_id}, {'queued' if created else 'attached to'} analysis {job['id']}")
+    return job, None
 
 @app.route('/analyze-interview', methods=['POST'])
 def analyze_interview():
     try:
-        print("Received request")
         data = request.json
-        print(f"Request data: {data}")
-        
-        if not data:
-            return jsonify({'status': 'error', 'message': 'No data received'}), 400
-
-        job_name = data.get('job_name')
-        if not job_name:
-            return jsonify({'status': 'error', 'message': 'Job name is required'}), 400
-
-        print(f"Looking up job ID for job name: {job_name}")
-        job_id = get_job_id_from_name(job_name)
-        
-        if not job_id:
-            return jsonify({'status': 'error', 'message': f'No job found with name: {job_name}'}), 404
-
-        print(f"Found job ID: {job_id}, starting analysis...")
-        result = analyzer.analyze_interview_feedback(job_id, action='download')
-        print(f"Analysis completed. Result: {result}")
-        return jsonify(result)
-            
-        return jsonify(result), 200
-        
+        log.debug(f"Request data: {data}")
+
+        job, error = submit_analysis(data)
+        if error:
+            return error
+        return jsonify(job_status(job)), 202
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def get_job_id_from_name(job_name):
-    """Get job ID from job name using Supabase"""
-    print(f"\nLooking up job ID for job name: {job_name}")
-    
-    # Clean up the job name
-    search_terms = job_name.lower().split()
-    
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_KEY')
-    
-    if not supabase_url or not supabase_key:
-        raise ValueError("Supabase URL and key must be set in environment variables")
-    
-    headers = {
-        'apikey': supabase_key,
-        'Authorization': f'Bearer {supabase_key}'
-    }
-    
+@app.route('/analyze-interview/stream', methods=['POST'])
+def analyze_interview_stream():
+    """Queue an analysis and stream its progress and per-candidate results as NDJSON"""
+    # Subscribe before queueing, so result rows from a fast worker are not published to nobody
+    analysis_id = uuid.uuid4().hex
+    subscription = job_events.subscribe(analysis_id)
     try:
-        # Get all jobs
-        response = requests.get(
-            f"{supabase_url}/rest/v1/jobs",
-            headers=headers,
-            params={
-                'select': '*'  # Get all fields
-            }
-        )
-        
-        if response.status_code == 200:
-            jobs = response.json()
-            print(f"\nAvailable jobs in database:")
-            for job in jobs:
-                print(f"- {job.get('title', 'No title')} (ID: {job.get('id', 'No ID')})")
-            
-            # Try different matching strategies
-            for job in jobs:
-                title = job.get('title', '').lower()
-                
-                # Strategy 1: Direct match
-                if job_name.lower() == title:
-                    print(f"\nFound exact match: {job['title']}")
-                    return job['id']
-                
-                # Strategy 2: Partial word match
-                if any(term in title for term in search_terms):
-                    print(f"\nFound partial match: {job['title']}")
-                    return job['id']
-                
-                # Strategy 3: Handle common variations
-                if 'frontend' in title and 'developer' in title:
-                    print(f"\nFound frontend developer match: {job['title']}")
-                    return job['id']
-                
-            print(f"\nNo jobs found matching: {job_name}")
-            return None
-        else:
-            print(f"\nError querying jobs: {response.status_code}")
-            print(f"Response: {response.text}")
-            return None
-            
+        job, error = submit_analysis(request.json, analysis_id=analysis_id)
+        if error:
+            subscription.close()
+            return error
+    except Exception as e:
+        subscription.close()
+        return jsonify({'error': str(e)}), 500
+    if job['id'] != analysis_id:
+        # Attached to an analysis already in flight; its earlier rows were only sent to its first client
+        subscription.close()
+        subscription = job_events.subscribe(job['id'])
+
+    def generate():
+        yield json.dumps({'type': 'job', **job_status(job)}, default=str) + "\n"
+        for event in subscription:
+            if event is not None:
+                yield json.dumps(event, default=str) + "\n"
+                continue
+            # No events for a while: the job may be queued, or run by another process
+            current = job_queue.get(job['id'])
+            if current['status'] == 'done':
+                yield json.dumps({'type': 'summary', 'result': current['result']}, default=str) + "\n"
+                return
+            if current['status'] == 'failed':
+                yield json.dumps({'type': 'error', 'message': current['error']}) + "\n"
+                return
+            yield json.dumps({'type': 'progress', 'rows_done': current['rows_done'],
+                              'rows_total': current['rows_total']}) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(subscription.close)
+    return response
+
+@app.route('/analyze-interview/<analysis_id>', methods=['GET'])
+def analyze_interview_status(analysis_id):
+    job = job_queue.get(analysis_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f'No analysis with id: {analysis_id}'}), 404
+    return jsonify(job_status(job))
+
+@app.route('/job-index', methods=['GET'])
+def job_index_stats():
+    return jsonify(job_titles.stats())
+
+@app.route('/models', methods=['GET'])
+def model_stats():
+    return jsonify(registry.stats())
+
+def resolve_job(job_name):
+    """Best-matching job for a name, with its confidence and any near-tied candidates"""
+    log.debug(f"Looking up job ID for job name: {job_name}")
+    try:
+        match = job_titles.resolve(job_name)
     except Exception as e:
-        print(f"\nError in job lookup: {str(e)}")
+        log.error(f"Error in job lookup: {str(e)}")
         return None
+    if match:
+        log.info(f"Found match: {match['title']} (confidence {match['confidence']}"
+                 f"{', ambiguous' if match['ambiguous'] else ''})")
+    else:
+        log.info(f"No jobs found matching: {job_name}")
+    return match
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
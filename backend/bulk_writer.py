@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import requests
+
+from supabase_client import RETRY_STATUSES, SupabaseError
+from telemetry import metrics, span
+
+log = logging.getLogger(__name__)
+
+RECORDS_WRITTEN = metrics.counter(
+    "db_records_written_total", "Records upserted to Supabase by outcome", ("table", "outcome")
+)
+
+
+def chunk_records(records, max_rows, max_bytes):
+    """Split records into chunks of at most `max_rows` rows and about `max_bytes` of JSON"""
+    chunk, size = [], 2
+    for record in records:
+        record_size = len(json.dumps(record, default=str)) + 1
+        if chunk and (len(chunk) >= max_rows or size + record_size > max_bytes):
+            yield chunk
+            chunk, size = [], 2
+        chunk.append(record)
+        size += record_size
+    if chunk:
+        yield chunk
+
+
+class BulkUpsertWriter:
+    """Background writer that upserts records to one Supabase table in bounded chunks.
+
+    `submit()` hands records to a writer thread and returns at once, so callers
+    can keep computing while earlier results are written. Each chunk is an
+    idempotent merge-duplicates upsert, so a failed chunk is retried on its own
+    with exponential backoff; `on_saved(chunk)` runs for every chunk that lands.
+    The queue is bounded, so a slow database applies backpressure to producers.
+    """
+
+    def __init__(self, client, table, on_conflict, chunk_rows=None, chunk_bytes=None, retries=None,
+                 backoff=None, max_pending=None):
+        self.client = client
+        self.table = table
+        self.on_conflict = on_conflict
+        self.chunk_rows = chunk_rows or int(os.getenv('SUPABASE_UPSERT_ROWS', '500'))
+        self.chunk_bytes = chunk_bytes or int(os.getenv('SUPABASE_UPSERT_BYTES', str(1024 * 1024)))
+        self.retries = int(os.getenv('SUPABASE_UPSERT_RETRIES', '3')) if retries is None else retries
+        self.backoff = float(os.getenv('SUPABASE_BACKOFF', '0.5')) if backoff is None else backoff
+        self._queue = queue.Queue(maxsize=max_pending or int(os.getenv('SUPABASE_UPSERT_PENDING', '4')))
+        self.saved = 0
+        self.failed = []  # (chunk, error) for chunks that exhausted their retries
+        self._thread = threading.Thread(target=self._run, name=f"bulk-writer-{table}", daemon=True)
+        self._thread.start()
+
+    def submit(self, records, on_saved=None):
+        """Queue records for upsert; blocks only while `max_pending` batches are waiting"""
+        if records:
+            self._queue.put((records, on_saved))
+
+    def close(self):
+        """Wait for every queued chunk and return {'saved', 'failed_chunks', 'failed_records', 'errors'}"""
+        self._queue.put(None)
+        self._thread.join()
+        return {
+            'saved': self.saved,
+            'failed_chunks': len(self.failed),
+            'failed_records': sum(len(chunk) for chunk, _ in self.failed),
+            'errors': [error for _, error in self.failed][:5]
+        }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            records, on_saved = item
+            for chunk in chunk_records(records, self.chunk_rows, self.chunk_bytes):
+                with span("db_save"):
+                    error = self._upsert(chunk)
+                if error:
+                    self.failed.append((chunk, error))
+                    RECORDS_WRITTEN.inc(len(chunk), table=self.table, outcome="failed")
+                    continue
+                self.saved += len(chunk)
+                RECORDS_WRITTEN.inc(len(chunk), table=self.table, outcome="saved")
+                if on_saved:
+                    try:
+                        on_saved(chunk)
+                    except Exception as e:
+                        log.error(f"on_saved callback failed: {str(e)}")
+
+    def _upsert(self, chunk):
+        """Upsert one chunk, retrying transient failures; returns an error message or None"""
+        for attempt in range(self.retries + 1):
+            try:
+                self.client.upsert(self.table, chunk, on_conflict=self.on_conflict, returning="minimal")
+                return None
+            except SupabaseError as e:
+                error = str(e)
+                if e.status_code not in RETRY_STATUSES:
+                    break
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except Exception as e:
+                # Anything else (e.g. a record that cannot be serialized) fails the same way every time
+                error = str(e)
+                break
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        log.error(f"Upsert of {len(chunk)} records to {self.table} failed: {error}")
+        return error
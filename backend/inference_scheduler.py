@@ -0,0 +1,147 @@
+import collections
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from telemetry import metrics
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+BATCH_SIZE = metrics.histogram(
+    "inference_batch_size", "Inputs per scheduled forward pass", ("model",), buckets=BATCH_SIZE_BUCKETS
+)
+CALLS_PER_BATCH = metrics.histogram(
+    "inference_calls_per_batch", "Caller requests merged into one forward pass", ("model",),
+    buckets=BATCH_SIZE_BUCKETS
+)
+QUEUE_SECONDS = metrics.histogram(
+    "inference_queue_seconds", "Time a call waited for its forward pass to start", ("model",)
+)
+
+# Batchers whose dispatcher threads run in this process
+_batchers = set()
+
+metrics.callback(
+    "inference_queue_depth", "Calls waiting for a forward pass",
+    lambda: {batcher.name: len(batcher._pending) for batcher in list(_batchers) if batcher._pid == os.getpid()},
+    labelname="model"
+)
+
+
+class _Call:
+    __slots__ = ("items", "options", "key", "future", "queued_at")
+
+    def __init__(self, items, options):
+        self.items = items
+        self.options = options
+        self.key = json.dumps(options, sort_keys=True, default=str)
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Merges concurrent calls to a batched model function into shared forward passes.
+
+    `submit(items, **options)` queues a call and blocks until its outputs are
+    ready. A dispatcher thread takes the oldest queued call and adds queued
+    calls with the same options, up to `max_batch` inputs. If the call arrived
+    at an idle model it first waits up to `max_wait_ms` for others to join.
+    It then runs `fn(inputs, **options)` once and hands every caller its own
+    slice. A call larger than `max_batch` runs on its own.
+
+    `workers` dispatcher threads also bound how many forward passes this
+    process runs at once. The threads start on first use in each process, so
+    a batcher created before a pre-forking server forks works in every worker.
+    """
+
+    def __init__(self, name, fn, max_batch=None, max_wait_ms=None, workers=None):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max_batch or int(os.getenv('INFERENCE_MAX_BATCH', '32'))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None
+                         else float(os.getenv('INFERENCE_BATCH_WAIT_MS', '5'))) / 1000
+        self.workers = workers or int(os.getenv('INFERENCE_CONCURRENCY', '1'))
+        self._start_lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pending = collections.deque()
+            self._available = threading.Condition()
+            for i in range(max(1, self.workers)):
+                threading.Thread(target=self._run, name=f"{self.name}-batcher-{i}", daemon=True).start()
+            self._pid = os.getpid()
+            _batchers.add(self)
+
+    def submit(self, items, **options):
+        """Outputs of `fn` for `items`, computed in a forward pass shared with other callers"""
+        if len(items) == 0:
+            return []
+        self._ensure_started()
+        call = _Call(items, options)
+        with self._available:
+            self._pending.append(call)
+            self._available.notify()
+        return call.future.result()
+
+    def _take_batch(self):
+        with self._available:
+            while not self._pending:
+                self._available.wait()
+            first = self._pending.popleft()
+            batch, size = [first], len(first.items)
+            # Calls that queued up while the model was busy go out at once; only a call
+            # arriving at an idle model waits for company
+            deadline = time.monotonic() + (self.max_wait if not self._pending else 0.0)
+            while size < self.max_batch:
+                for call in list(self._pending):
+                    if call.key == first.key and size + len(call.items) <= self.max_batch:
+                        self._pending.remove(call)
+                        batch.append(call)
+                        size += len(call.items)
+                remaining = deadline - time.monotonic()
+                if size >= self.max_batch or remaining <= 0:
+                    break
+                self._available.wait(remaining)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            started = time.perf_counter()
+            for call in batch:
+                QUEUE_SECONDS.observe(started - call.queued_at, model=self.name)
+            BATCH_SIZE.observe(sum(len(call.items) for call in batch), model=self.name)
+            CALLS_PER_BATCH.observe(len(batch), model=self.name)
+            if len(batch) == 1:
+                self._run_alone(batch[0])
+                continue
+
+            items = [item for call in batch for item in call.items]
+            try:
+                outputs = self.fn(items, **batch[0].options)
+            except Exception as e:
+                # One caller's bad input must not fail the others: rerun each call on its own
+                log.warning(f"{self.name}: merged batch of {len(batch)} calls failed ({str(e)}), running them separately")
+                for call in batch:
+                    self._run_alone(call)
+                continue
+            offset = 0
+            for call in batch:
+                call.future.set_result(outputs[offset:offset + len(call.items)])
+                offset += len(call.items)
+
+    def _run_alone(self, call):
+        try:
+            call.future.set_result(self.fn(call.items, **call.options))
+        except Exception as e:
+            call.future.set_exception(e)
@@ -1,23 +1,45 @@
 import pandas as pd
-from transformers import pipeline
-import torch
-import requests
-from io import StringIO
 import os
 from dotenv import load_dotenv
+import itertools
 import json
-import sys
+import logging
+from collections import Counter
+from datetime import datetime
+
+from model_registry import CLASSIFIER_MODEL, INFERENCE_BACKEND, registry
+from result_memo import ResultMemo, row_key
+from bulk_writer import BulkUpsertWriter
+from inference_scheduler import MicroBatcher
+from supabase_client import eq, get_client
+from summarization import DEFAULT_SUMMARY_TIER, check_tier, summarize, summary_signature
+from telemetry import metrics, span
+from trait_scoring import DEFAULT_TRAIT_SCORER, TRAIT_SCORERS, embedding_signature, prototype_scorer
+
+log = logging.getLogger(__name__)
+
+FEEDBACK_ROWS = metrics.counter(
+    "interview_rows_total", "Feedback rows by outcome (analyzed, memo_hit, failed, empty)", ("outcome",)
+)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize transformers pipelines
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn", device=0 if torch.cuda.is_available() else -1)
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli", device=0 if torch.cuda.is_available() else -1)
-
 # Trait labels to classify
 traits = ["Confidence", "Communication", "Technical Ability"]
 
+# Batches from concurrently running analysis jobs share classifier forward passes
+classifier_batches = MicroBatcher(
+    "classifier", lambda texts, **kwargs: registry.get("classifier")(texts, batch_size=len(texts), **kwargs)
+)
+trait_embedding_batches = MicroBatcher("trait_embedding", prototype_scorer)
+
+def trait_batches(trait_scorer):
+    """Scheduler for the given trait scorer ('mnli' or 'embedding')"""
+    if trait_scorer not in TRAIT_SCORERS:
+        raise ValueError(f"Unknown trait scorer: {trait_scorer} (expected one of {', '.join(TRAIT_SCORERS)})")
+    return classifier_batches if trait_scorer == 'mnli' else trait_embedding_batches
+
 # Recommendation logic
 def get_recommendation(avg_score):
     if avg_score >= 0.85:
@@ -28,20 +50,14 @@ def get_recommendation(avg_score):
         return "Reject"
 
 # Process a single feedback entry
-def process_feedback(feedback_text):
-    # 1. Summarization
-    summary_output = summarizer(
-        feedback_text,
-        max_length=80,
-        min_length=25,
-        do_sample=False,
-        no_repeat_ngram_size=3,
-        early_stopping=True
-    )
-    summary = summary_output[0]['summary_text']
-
-    # 2. Trait scoring using zero-shot classification
-    score_output = classifier(feedback_text, candidate_labels=traits)
+def process_feedback(feedback_text, trait_scorer=None, summary_tier=None):
+    # 1. Summarization, with the same length-adaptive settings as the CSV pipeline
+    summary = summarize([feedback_text], summary_tier)[0]['summary_text']
+
+    # 2. Trait scoring, by zero-shot classification or against trait prototype embeddings
+    score_output = trait_batches(trait_scorer or DEFAULT_TRAIT_SCORER).submit(
+        [feedback_text], candidate_labels=traits
+    )[0]
     scores_dict = dict(zip(score_output["labels"], score_output["scores"]))
 
     # 3. Average score and recommendation
@@ -51,336 +67,425 @@ def process_feedback(feedback_text):
     return summary, scores_dict, avg_score, recommendation
 
 class InterviewAnalyzer:
-    def __init__(self):
+    def __init__(self, batch_size=None):
         """Initialize the interview analyzer with Supabase credentials and transformers models"""
-        print("\nInitializing Interview Analyzer...")
-        
-        # Get environment variables
-        self.supabase_url = os.getenv('SUPABASE_URL')
-        self.supabase_key = os.getenv('SUPABASE_KEY')
+        log.info("Initializing Interview Analyzer...")
+
+        # Feedback rows per summarization/classification forward pass
+        self.batch_size = batch_size or int(os.getenv('INTERVIEW_BATCH_SIZE', '8'))
+
+        # Rows read from the CSV download at a time; bounds memory for large exports
+        self.csv_chunk_rows = int(os.getenv('CSV_CHUNK_ROWS', '64'))
+
+        # Per-row model outputs, so re-analysis only runs rows whose text or models changed
+        self.memo = ResultMemo(os.getenv(
+            'ANALYSIS_MEMO_PATH',
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analysis_memo.sqlite3')
+        ))
         
-        if not self.supabase_url or not self.supabase_key:
-            raise ValueError("Supabase URL and key must be set in environment variables")
+        # Pooled, retrying REST client shared with the Flask app
+        self.supabase = get_client()
+        self.supabase_url = self.supabase.url
             
-        print(f"Supabase URL: {self.supabase_url}")
-        print("Testing Supabase connection...")
+        log.info(f"Supabase URL: {self.supabase_url}")
+        log.debug("Testing Supabase connection...")
         
-        # Test the connection using a valid endpoint
-        test_url = f"{self.supabase_url}/rest/v1/interview_feedback_files"
+        # Test the connection with a one-row, one-column query
         try:
-            # Test with a simple query
-            response = requests.get(
-                test_url,
-                headers={
-                    'apikey': self.supabase_key,
-                    'Authorization': f'Bearer {self.supabase_key}'
-                },
-                params={
-                    'select': '*',
-                    'limit': 1
-                }
-            )
-            
-            if response.status_code == 200:
-                print("Supabase connection successful!")
-                print(f"Test response: {response.json()}")
-            else:
-                print(f"Warning: Supabase connection test failed with status {response.status_code}")
-                print(f"Response: {response.text}")
-                
+            test_rows = self.supabase.select('interview_feedback_files', columns='job_id', limit=1)
+            log.info("Supabase connection successful!")
+            log.debug(f"Test response: {test_rows}")
         except Exception as e:
-            print(f"Warning: Could not connect to Supabase: {str(e)}")
-            print("Continuing with transformers initialization...")
-        
-        self.headers = {
-            'apikey': self.supabase_key,
-            'Authorization': f'Bearer {self.supabase_key}'
-        }
-        
-        # Initialize transformers models
-        print("\nInitializing transformers models...")
+            log.warning(f"Could not connect to Supabase: {str(e)}")
         
-        # For summarization
-        self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-        
-        # For classification
-        self.classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-        
-        print("Models initialized successfully!")
-        print("Interview Analyzer initialized!")
+        # Transformers models are shared through the registry and loaded on first use
+        log.info("Interview Analyzer initialized!")
+
+    @property
+    def summarizer(self):
+        return registry.get("summarizer")
+
+    @property
+    def classifier(self):
+        return registry.get("classifier")
 
     def get_interview_feedback_file(self, job_id):
         """Fetch the interview feedback file URL for a specific job"""
         try:
-            # Query Supabase for the file URL
-            response = requests.get(
-                f"{self.supabase_url}/rest/v1/interview_feedback_files",
-                headers=self.headers,
-                params={
-                    'select': '*'
-                }
+            # Filter on job_id server-side and fetch only the columns we return
+            file_details = self.supabase.select_one(
+                'interview_feedback_files',
+                columns='file_url,file_name,uploaded_by',
+                filters={'job_id': eq(job_id)}
             )
-            
-            if response.status_code == 200:
-                files = response.json()
-                if files:
-                    # Find the file for the given job_id
-                    file_details = next((f for f in files if f['job_id'] == job_id), None)
-                    if file_details:
-                        print(f"\nFound file details: {file_details}")
-                        return {
-                            'file_url': file_details['file_url'],
-                            'file_name': file_details['file_name'],
-                            'uploaded_by': file_details['uploaded_by']
-                        }
-            else:
-                print(f"Error querying Supabase: {response.status_code}")
-                print(f"Response: {response.text}")
-            
-            return None
+            if file_details:
+                log.debug(f"Found file details: {file_details}")
+            return file_details
             
         except Exception as e:
-            print(f"\nError accessing file: {str(e)}")
+            log.error(f"Error accessing file: {str(e)}")
             return None
 
-    def process_feedback_from_url(self, file_details):
-        """Process feedback from a CSV file URL using transformers models"""
+    def process_feedback_from_url(self, file_details, batch_size=None, progress=None, on_result=None,
+                                  trait_scorer=None, summary_tier=None):
+        """Process feedback from a CSV file URL using transformers models.
+
+        `progress(rows_done, rows_total)` is called after each batch, with
+        `rows_total` None until the whole CSV has been read, and
+        `on_result(result)` for each analyzed row, when given. `trait_scorer`
+        picks 'mnli' or 'embedding' trait scoring (TRAIT_SCORER by default) and
+        `summary_tier` 'quality' or 'fast' summarization (SUMMARY_TIER by default).
+        """
         if not isinstance(file_details, dict):
-            print("Error: File details must be a dictionary")
+            log.error("File details must be a dictionary")
             return None
-            
-        print(f"\nProcessing file from URL: {file_details['file_url']}")
-        
-        # Download the CSV content
+
         try:
-            response = requests.get(file_details['file_url'])
-            if response.status_code != 200:
-                print(f"Error downloading file: {response.status_code}")
-                print(f"Response: {response.text}")
-                return None
-            
-            # Read CSV content
-            try:
-                df = pd.read_csv(StringIO(response.text))
-                print("\nCSV Content:")
-                print("-" * 80)
-                print(f"CSV Columns: {df.columns.tolist()}")
-                print("-" * 80)
-                print(df.to_string())
-                print("-" * 80)
-            except Exception as e:
-                print(f"Error reading CSV: {str(e)}")
-                print(f"Response text: {response.text[:500]}...")
-                return None
-            
-            # Process each feedback
             results = []
-            for idx, row in df.iterrows():
-                try:
-                    # Convert row to dictionary
-                    row_dict = dict(row)
-                    
-                    # Get feedback and candidate name
-                    feedback = str(row_dict.get('interview_feedback', '')).strip()
-                    if not feedback:
-                        print(f"Skipping row {idx}: No feedback text found")
-                        continue
-
-                    candidate_name = str(row_dict.get('candidate_name', 'Unknown')).strip()
-                    print(f"\nProcessing row {idx} for {candidate_name}")
-                    print(f"Feedback text: {feedback[:100]}...")
-                    
-                    # Use transformers for summarization
-                    summary = self.summarizer(feedback, max_length=100, min_length=30, do_sample=False)[0]['summary_text']
-                    print(f"Summary: {summary}")
-                    
-                    # Use transformers for classification
-                    traits = ["Confidence", "Communication", "Technical Ability"]
-                    classification = self.classifier(feedback, candidate_labels=traits)
-                    
-                    result = {
-                        'candidate_name': candidate_name,
-                        'original_feedback': feedback,
-                        'summary': summary,
-                        'sentiment': classification['labels'][0],
-                        'confidence': classification['scores'][0],
-                        'traits': {
-                            trait: score
-                            for trait, score in zip(classification['labels'], classification['scores'])
-                        }
-                    }
-                    results.append(result)
-                    
-                except Exception as e:
-                    print(f"Error processing row {idx}: {str(e)}")
-                    print(f"Row data: {dict(row)}")
-                    continue
-            
+            for chunk_results in self.iter_processed_chunks(file_details, batch_size, progress, on_result,
+                                                            trait_scorer, summary_tier):
+                results.extend(chunk_results)
+
             if not results:
-                print("No valid feedback rows found in the CSV")
+                log.warning("No valid feedback rows found in the CSV")
                 return None
-            
-            # Convert results to DataFrame
+
             result_df = pd.DataFrame(results)
-            print("\nProcessed Results:")
-            print("-" * 80)
-            print(result_df.to_string())
-            print("-" * 80)
-            
+            log.info(f"Processed {len(result_df)} feedback rows")
             return result_df
-            
+
         except Exception as e:
-            print(f"Error processing CSV: {str(e)}")
+            log.error(f"Error processing CSV: {str(e)}")
             return None
-        
-        # Read CSV directly
+
+    def iter_feedback_chunks(self, file_url):
+        """Stream the CSV download and yield it as DataFrames of at most `csv_chunk_rows` rows"""
+        log.info(f"Processing file from URL: {file_url}")
+        with span("http_fetch"):
+            response = self.supabase.download(file_url)
         try:
-            df = pd.read_csv(StringIO(response.text))
-            print("\nCSV Content:")
-            print("-" * 80)
-            print(f"CSV Columns: {df.columns.tolist()}")
-            print("-" * 80)
-            print(df.to_string())
-            print("-" * 80)
-        except Exception as e:
-            print(f"Error reading CSV: {str(e)}")
-            print(f"Response text: {response.text[:500]}...")
-            return None
-        
-        # Process each feedback
-        results = []
-        for idx, row in df.iterrows():
-            try:
+            response.raw.decode_content = True  # undo gzip/deflate transfer encoding
+            # Parse time includes reading the body, which streams in as chunks are parsed
+            with span("csv_parse"):
+                reader = pd.read_csv(response.raw, chunksize=self.csv_chunk_rows)
+            for i in itertools.count():
+                with span("csv_parse"):
+                    chunk = next(reader, None)
+                if chunk is None:
+                    return
+                if i == 0:
+                    log.debug(f"CSV Columns: {chunk.columns.tolist()}")
+                yield chunk
+        finally:
+            response.close()
+
+    def iter_processed_chunks(self, file_details, batch_size=None, progress=None, on_result=None,
+                              trait_scorer=None, summary_tier=None):
+        """Analyze a feedback CSV chunk by chunk, yielding each chunk's result rows as it finishes.
+
+        Only one CSV chunk and its results are held at a time, so memory is bounded
+        by the chunk size rather than the file size. The number of rows is not
+        known until the whole CSV has been read, so `progress(rows_done, None)` is
+        reported while chunks are being analyzed and `progress(rows_done, rows_total)`
+        once, after the last chunk.
+        """
+        batch_size = batch_size or self.batch_size
+        rows_done = 0
+        for chunk in self.iter_feedback_chunks(file_details['file_url']):
+            candidates = []
+            feedbacks = []
+            interviewers = []
+            for idx, row in chunk.iterrows():
                 feedback = str(row.get('interview_feedback', '')).strip()
                 if not feedback:
-                    print(f"Skipping row {idx}: No feedback text found")
+                    log.debug(f"Skipping row {idx}: No feedback text found")
+                    FEEDBACK_ROWS.inc(outcome="empty")
                     continue
+                candidates.append(str(row.get('candidate_name', 'Unknown')).strip())
+                feedbacks.append(feedback)
+                interviewer = row.get('interviewer')
+                interviewers.append(None if pd.isna(interviewer) else str(interviewer).strip())
 
-                candidate_name = str(row.get('candidate_name', 'Unknown')).strip()
-                print(f"\nProcessing row {idx} for {candidate_name}")
-                print(f"Feedback text: {feedback[:100]}...")
-                
-                # Use transformers for summarization
-                summary = self.summarizer(feedback, max_length=100, min_length=30, do_sample=False)[0]['summary_text']
-                print(f"Summary: {summary}")
-                
-                # Use transformers for classification
-                traits = ["Confidence", "Communication", "Technical Ability"]
-                classification = self.classifier(feedback, candidate_labels=traits)
-                
-                result = {
-                    'candidate_name': candidate_name,
-                    'original_feedback': feedback,
-                    'summary': summary,
-                    'sentiment': classification['labels'][0],
-                    'confidence': classification['scores'][0],
-                    'traits': {
-                        trait: score
-                        for trait, score in zip(classification['labels'], classification['scores'])
-                    }
-                }
-                results.append(result)
-                
-            except Exception as e:
-                print(f"Error processing row {idx}: {str(e)}")
-                print(f"Row data: {row}")
-                continue
-        
-        if not results:
-            print("No valid feedback rows found in the CSV")
+            def chunk_progress(done, total, offset=rows_done):
+                if progress:
+                    progress(offset + done, None)
+
+            yield self._analyze_rows(candidates, feedbacks, batch_size, chunk_progress, on_result, interviewers,
+                                     trait_scorer, summary_tier)
+            rows_done += len(feedbacks)
+        if progress:
+            progress(rows_done, rows_done)
+
+    def _analyze_rows(self, candidates, feedbacks, batch_size, progress=None, on_result=None, interviewers=None,
+                      trait_scorer=None, summary_tier=None):
+        """Summarize and classify feedback rows, reusing memoized outputs for unchanged text.
+
+        `on_result(result)` is called for each row as soon as its outputs are known.
+        """
+        interviewers = interviewers or [None] * len(feedbacks)
+        trait_scorer = trait_scorer or DEFAULT_TRAIT_SCORER
+        scorer = trait_batches(trait_scorer)
+        summary_tier = check_tier(summary_tier or DEFAULT_SUMMARY_TIER)
+        signature_fields = {
+            'summarizer': summary_signature(summary_tier),
+            'classifier': CLASSIFIER_MODEL,
+            'backend': INFERENCE_BACKEND,
+            'traits': traits
+        }
+        if trait_scorer == 'embedding':
+            signature_fields['trait_scorer'] = embedding_signature()
+        signature = json.dumps(signature_fields, sort_keys=True)
+        keys = [row_key(feedback, signature) for feedback in feedbacks]
+        outputs = self.memo.get_many(keys)
+
+        # Only rows never analyzed with these models go through inference, once per distinct text
+        pending = {}
+        for key, feedback in zip(keys, feedbacks):
+            if key not in outputs:
+                pending.setdefault(key, feedback)
+        pending_keys = list(pending)
+        log.info(f"Analyzing {len(pending_keys)} new feedback rows in batches of {batch_size} "
+                 f"({len(feedbacks) - len(pending_keys)} reused)")
+
+        # Length-sorted batches keep padding low; both models run per batch so progress moves steadily
+        pending_keys.sort(key=lambda key: len(pending[key]))
+        rows_per_key = Counter(keys)
+        rows_by_key = {}
+        for i, key in enumerate(keys):
+            rows_by_key.setdefault(key, []).append(i)
+
+        def emit(batch_keys):
+            if on_result:
+                for key in batch_keys:
+                    for i in rows_by_key[key]:
+                        result = self._build_result(candidates[i], feedbacks[i], key, outputs, interviewers[i])
+                        if result is not None:
+                            on_result(result)
+
+        emit([key for key in rows_by_key if key in outputs])
+        done = len(feedbacks) - sum(rows_per_key[key] for key in pending_keys)
+        FEEDBACK_ROWS.inc(done, outcome="memo_hit")
+        if progress:
+            progress(done, len(feedbacks))
+        for start in range(0, len(pending_keys), batch_size):
+            batch = pending_keys[start:start + batch_size]
+            texts = [pending[key] for key in batch]
+            batch_summaries = self._run_batch(summarize, texts, stage="summarize", tier=summary_tier)
+            batch_classifications = self._run_batch(scorer.submit, texts, stage="classify",
+                                                    candidate_labels=traits)
+            fresh = {
+                key: {'summary': summary, 'classification': classification}
+                for key, summary, classification in zip(batch, batch_summaries, batch_classifications)
+                if summary is not None and classification is not None
+            }
+            self.memo.put_many(fresh)
+            outputs.update(fresh)
+            FEEDBACK_ROWS.inc(sum(rows_per_key[key] for key in fresh), outcome="analyzed")
+            FEEDBACK_ROWS.inc(sum(rows_per_key[key] for key in batch if key not in fresh), outcome="failed")
+            emit(batch)
+            done += sum(rows_per_key[key] for key in batch)
+            if progress:
+                progress(done, len(feedbacks))
+
+        results = [self._build_result(candidate_name, feedback, key, outputs, interviewer)
+                   for candidate_name, feedback, key, interviewer in zip(candidates, feedbacks, keys, interviewers)]
+        return [result for result in results if result is not None]
+
+    def _build_result(self, candidate_name, feedback, key, outputs, interviewer=None):
+        if key not in outputs:
+            log.warning(f"Skipping {candidate_name}: analysis failed")
             return None
-        
-        # Convert results to DataFrame
-        result_df = pd.DataFrame(results)
-        print("\nProcessed Results:")
-        print("-" * 80)
-        print(result_df.to_string())
-        print("-" * 80)
-        
-        return result_df
-                
+        summary = outputs[key]['summary']
+        classification = outputs[key]['classification']
+        return {
+            'candidate_name': candidate_name,
+            'interviewer': interviewer,
+            'original_feedback': feedback,
+            'summary': summary['summary_text'],
+            'sentiment': classification['labels'][0],
+            'confidence': classification['scores'][0],
+            'traits': {
+                trait: score
+                for trait, score in zip(classification['labels'], classification['scores'])
+            },
+            'row_key': key
+        }
+
+    def _run_batch(self, pipe, texts, stage="model_forward", **kwargs):
+        """Run a pipeline over one batch of texts, returning outputs in input order.
+
+        If the batch fails, its rows are retried one by one and rows that still
+        fail come back as None. The time is recorded under the `stage` span.
+        """
+        with span(stage):
+            return self._run_pipe(pipe, texts, **kwargs)
+
+    def _run_pipe(self, pipe, texts, **kwargs):
+        try:
+            return pipe(texts, **kwargs)
+        except Exception as e:
+            log.warning(f"Batch failed ({str(e)}), retrying {len(texts)} rows individually")
+        outputs = []
+        for text in texts:
+            try:
+                outputs.append(pipe([text], **kwargs)[0])
+            except Exception as e:
+                log.error(f"Error processing feedback: {str(e)}")
+                outputs.append(None)
+        return outputs
+
+    def feedback_writer(self):
+        """Background bulk upserter for processed_interview_feedback rows"""
+        return BulkUpsertWriter(self.supabase, 'processed_interview_feedback', on_conflict='job_id,candidate_name')
 
+    def to_record(self, result, job_id, file_details, now):
+        """processed_interview_feedback row for one analyzed feedback result"""
+        scores = {trait: result['traits'].get(trait, 0.0) for trait in traits}
+        average_score = sum(scores.values()) / len(traits)
+        # A DataFrame round trip turns a blank interviewer into NaN, which is not valid JSON
+        interviewer = result.get('interviewer')
+        return {
+            'job_id': job_id,
+            'candidate_name': result['candidate_name'],
+            'interviewer': None if pd.isna(interviewer) else interviewer,
+            'summary': result['summary'],
+            'confidence_score': scores['Confidence'],
+            'communication_score': scores['Communication'],
+            'technical_ability_score': scores['Technical Ability'],
+            'average_score': average_score,
+            'recommendation': get_recommendation(average_score),
+            'file_url': file_details['file_url'],
+            'created_at': now,
+            'updated_at': now
+        }
+
+    def save_processed_results(self, result_df, job_id, file_details, writer=None):
+        """Upsert processed results to Supabase, sending only rows that changed since the last save.
 
-    def save_processed_results(self, result_df, job_id, file_details):
-        """Save processed results to Supabase with proper table structure"""
+        With a `writer` the records are queued on it and this returns at once;
+        otherwise they are written here and the saved records are returned, or
+        None if any chunk failed (chunks that did land are not re-sent next time).
+        """
         try:
             # Convert DataFrame to list of dictionaries
-            records = result_df.to_dict('records')
-            
-            # Add job_id and file metadata to each record
-            for record in records:
-                record['job_id'] = job_id
-                record['file_url'] = file_details['file_url']
-                record['created_at'] = datetime.now().isoformat()
-                record['updated_at'] = datetime.now().isoformat()
-                
-            # Save to Supabase
-            url = f"{self.supabase_url}/rest/v1/processed_interview_feedback"
-            headers = self.headers.copy()
-            headers['Content-Type'] = 'application/json'
-            
-            # Display analysis results before saving
-            print("\nAnalysis Results:")
-            print("-" * 80)
-            for record in records:
-                print(f"\nCandidate: {record['candidate_name']}")
-                print(f"Interviewer: {record['interviewer']}")
-                print(f"Summary: {record['summary']}")
-                print(f"Confidence Score: {record['confidence_score']}")
-                print(f"Communication Score: {record['communication_score']}")
-                print(f"Technical Ability Score: {record['technical_ability_score']}")
-                print(f"Average Score: {record['average_score']}")
-                print(f"Recommendation: {record['recommendation']}")
-            print("-" * 80)
-            
+            results = result_df.to_dict('records')
+
+            # Rows whose text and models match what was last saved for this candidate are skipped.
+            # One record per candidate, since an upsert chunk cannot touch the same row twice.
+            saved_keys = self.memo.saved_keys(job_id)
+            changed = {
+                result['candidate_name']: result
+                for result in results if saved_keys.get(result['candidate_name']) != result['row_key']
+            }
+            log.info(f"{len(changed)} changed records to save ({len(results) - len(changed)} unchanged)")
+            if not changed:
+                return []
+
+            now = datetime.now().isoformat()
+            records = [self.to_record(result, job_id, file_details, now) for result in changed.values()]
+
+            # Per-record detail is only formatted when DEBUG logging is on
+            if log.isEnabledFor(logging.DEBUG):
+                for record in records:
+                    log.debug(
+                        f"Candidate: {record['candidate_name']} | Interviewer: {record['interviewer']} | "
+                        f"Summary: {record['summary']} | Confidence: {record['confidence_score']:.3f} | "
+                        f"Communication: {record['communication_score']:.3f} | "
+                        f"Technical Ability: {record['technical_ability_score']:.3f} | "
+                        f"Average: {record['average_score']:.3f} | Recommendation: {record['recommendation']}"
+                    )
+
+            def mark_saved(chunk):
+                self.memo.mark_saved(job_id, {
+                    record['candidate_name']: changed[record['candidate_name']]['row_key'] for record in chunk
+                })
+
             # Save to database
-            print(f"Saving {len(records)} records to processed_interview_feedback table...")
-            response = requests.post(
-                url,
-                headers=headers,
-                json=records
-            )
-            
-            if response.status_code == 201:
-                print("Records saved successfully!")
-                return response.json()
-            else:
-                print(f"Error saving records: {response.text}")
+            log.info(f"Saving {len(records)} records to processed_interview_feedback table...")
+            if writer is not None:
+                writer.submit(records, on_saved=mark_saved)
+                return records
+
+            writer = self.feedback_writer()
+            writer.submit(records, on_saved=mark_saved)
+            outcome = writer.close()
+            if outcome['failed_records']:
+                log.error(f"Error saving records: {outcome['failed_records']} failed ({outcome['errors']})")
                 return None
+            log.info("Records saved successfully!")
+            return records
             
         except Exception as e:
-            print(f"Error saving processed results: {str(e)}")
+            log.error(f"Error saving processed results: {str(e)}")
             return None
 
-    def analyze_interview_feedback(self, job_id, action='view'):
-        """Main function to analyze or view interview feedback for a specific job"""
-        print(f"\nAnalyzing interview feedback for job_id: {job_id}")
+    def analyze_interview_feedback(self, job_id, action='view', file_details=None, progress=None, stream=False,
+                                   on_result=None, trait_scorer=None, summary_tier=None):
+        """Main function to analyze or view interview feedback for a specific job.
+
+        With `stream=True` the CSV is analyzed and saved chunk by chunk, and the
+        result reports counts instead of echoing every processed record.
+        """
+        log.info(f"Analyzing interview feedback for job_id: {job_id}")
         
         try:
             # Get file URL and metadata
-            file_details = self.get_interview_feedback_file(job_id)
+            file_details = file_details or self.get_interview_feedback_file(job_id)
             if not file_details:
                 return {'status': 'error', 'message': 'Could not find interview feedback file'}
             
-            print(f"Found file details: {file_details}")
-            print(f"Action: {action} - {'Processing file' if action == 'download' else 'Viewing file'}")
+            log.debug(f"Found file details: {file_details}")
+            log.info(f"Action: {action} - {'Processing file' if action == 'download' else 'Viewing file'}")
             
             if action == 'view':
                 return {'status': 'success', 'file_details': file_details}
+            elif action == 'download' and stream:
+                # Chunks are upserted by a background writer while the next ones are analyzed
+                writer = self.feedback_writer()
+                rows_processed = 0
+                try:
+                    for chunk_results in self.iter_processed_chunks(file_details, progress=progress, on_result=on_result,
+                                                                    trait_scorer=trait_scorer, summary_tier=summary_tier):
+                        if not chunk_results:
+                            continue
+                        self.save_processed_results(pd.DataFrame(chunk_results), job_id, file_details, writer=writer)
+                        rows_processed += len(chunk_results)
+                finally:
+                    outcome = writer.close()
+
+                if not rows_processed:
+                    return {'status': 'error', 'message': 'Failed to process feedback file'}
+                if outcome['failed_records']:
+                    log.error("Failed to save processed results")
+                    return {
+                        'status': 'error',
+                        'message': f"Failed to save {outcome['failed_records']} records "
+                                   f"({outcome['saved']} saved): {outcome['errors']}"
+                    }
+
+                log.info(f"Processing completed successfully! {rows_processed} rows, {outcome['saved']} records saved")
+                return {
+                    'status': 'success',
+                    'message': 'File processed and saved successfully',
+                    'file_details': file_details,
+                    'rows_processed': rows_processed,
+                    'records_saved': outcome['saved']
+                }
             elif action == 'download':
-                result_df = self.process_feedback_from_url(file_details)
+                result_df = self.process_feedback_from_url(file_details, progress=progress, on_result=on_result,
+                                                           trait_scorer=trait_scorer, summary_tier=summary_tier)
                 if result_df is None:
                     return {'status': 'error', 'message': 'Failed to process feedback file'}
                 
                 processed_records = self.save_processed_results(result_df, job_id, file_details)
                 if processed_records is None:
-                    print("Error: Failed to save processed results")
+                    log.error("Failed to save processed results")
                     return {
                         'status': 'error',
                         'message': 'Failed to save processed results'
                     }
                 
-                print("Processing completed successfully!")
+                log.info("Processing completed successfully!")
                 return {
                     'status': 'success',
                     'message': 'File processed and saved successfully',
@@ -389,14 +494,14 @@ class InterviewAnalyzer:
                 }
             
             else:
-                print(f"Error: Invalid action: {action}")
+                log.error(f"Invalid action: {action}")
                 return {
                     'status': 'error',
                     'message': f'Invalid action: {action}'
                 }
             
         except Exception as e:
-            print(f"Error in analyze_interview_feedback: {str(e)}")
+            log.error(f"Error in analyze_interview_feedback: {str(e)}")
             return {
                 'status': 'error',
                 'message': f'Error processing interview feedback: {str(e)}'
@@ -0,0 +1,330 @@
+import collections
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from local_db import LocalDB
+from serving import after_fork
+
+ACTIVE_STATUSES = ("queued", "running")
+
+log = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """SQLite-backed job queue shared by the Flask handlers and the worker threads.
+
+    Jobs carry a `dedup_key`; submitting a key that already has a queued or
+    running job returns that job instead of creating a new one. A running job
+    is leased: its worker refreshes `updated_at` at least every `lease` seconds
+    (see JobWorkerPool), and a job whose lease has run out was left behind by
+    a crashed process, so it is re-queued. Jobs still being run by another live
+    process are never touched. Forked server workers reconnect, so they share
+    the queue safely.
+    """
+
+    def __init__(self, path, lease=120):
+        self.path = path
+        self.lease = lease
+        self._db = LocalDB(path, row_factory=sqlite3.Row)
+        self._reset_condition()
+        after_fork(self, "_reset_condition")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                dedup_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                rows_done INTEGER NOT NULL DEFAULT 0,
+                rows_total INTEGER,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self.requeue_stale()
+
+    def _reset_condition(self):
+        # Waiting workers are woken through the database's lock, which a forked child gets afresh
+        self._available = threading.Condition(self._db.lock)
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, dedup_key, payload, job_id=None):
+        """Queue a job, or attach to the in-flight one with the same key. Returns (job, created)
+
+        `job_id` lets a caller subscribe to the new job's events before it is queued.
+        """
+        with self._db.lock:
+            # The transaction's write lock keeps other processes from racing the check
+            with self._db.transaction():
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE dedup_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (dedup_key, *ACTIVE_STATUSES)
+                ).fetchone()
+                if row is None:
+                    now = datetime.now().isoformat()
+                    job_id = job_id or uuid.uuid4().hex
+                    self._db.execute(
+                        "INSERT INTO jobs (id, dedup_key, status, payload, created_at, updated_at) "
+                        "VALUES (?, ?, 'queued', ?, ?, ?)",
+                        (job_id, dedup_key, json.dumps(payload), now, now)
+                    )
+            if row is not None:
+                return self._row_to_job(row), False
+            self._available.notify()
+            return self.get(job_id), True
+
+    def requeue_stale(self):
+        """Re-queue running jobs whose lease has expired; returns how many"""
+        now = datetime.now()
+        expired = (now - timedelta(seconds=self.lease)).isoformat()
+        with self._db.lock:
+            count = self._db.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? WHERE status = 'running' AND updated_at < ?",
+                (now.isoformat(), expired)
+            ).rowcount
+        if count:
+            log.warning(f"Re-queued {count} jobs whose worker stopped renewing their lease")
+        return count
+
+    def heartbeat(self, job_ids):
+        """Renew the lease on running jobs"""
+        self._db.execute_in(
+            "UPDATE jobs SET updated_at = ? WHERE status = 'running' AND id IN ({})",
+            job_ids, (datetime.now().isoformat(),)
+        )
+
+    def claim(self, timeout=None, poll_interval=1.0):
+        """Mark the oldest queued job as running and return it, waiting up to `timeout` seconds.
+
+        Local submits wake waiting workers immediately; jobs queued by another
+        process, or whose lease has expired, are picked up on the next poll.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._db.lock:
+            while True:
+                self.requeue_stale()
+                # A single UPDATE is atomic, so two processes can never claim the same job
+                row = self._db.execute(
+                    "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ("
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                    ") AND status = 'queued' RETURNING id",
+                    (datetime.now().isoformat(),)
+                ).fetchone()
+                if row is not None:
+                    return self.get(row["id"])
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._available.wait(poll_interval if remaining is None else min(remaining, poll_interval))
+
+    def get(self, job_id):
+        with self._db.lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def update_progress(self, job_id, rows_done, rows_total):
+        self._update(job_id, rows_done=rows_done, rows_total=rows_total)
+
+    def complete(self, job_id, result):
+        self._update(job_id, status="done", result=json.dumps(result, default=str))
+
+    def fail(self, job_id, error):
+        self._update(job_id, status="failed", error=error)
+
+    def depth(self):
+        """Number of queued and running jobs"""
+        with self._db.lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", ACTIVE_STATUSES
+            ).fetchone()[0]
+
+
+class JobWorkerPool:
+    """Daemon threads that claim jobs from a JobQueue and run `handler(job, progress)`.
+
+    `progress(rows_done, rows_total)` records progress on the job; the handler's
+    return value is stored as the job result, and an exception marks it failed.
+    A heartbeat thread renews the lease on the jobs being run every third of
+    the queue's lease, however long a handler goes without reporting progress.
+    """
+
+    def __init__(self, queue, handler, workers=1):
+        self.queue = queue
+        self.handler = handler
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        self._threads.append(threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True))
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.queue.lease / 3)
+            with self._running_lock:
+                running = list(self._running)
+            try:
+                self.queue.heartbeat(running)
+            except sqlite3.Error as e:
+                log.warning(f"Could not renew job leases: {str(e)}")
+
+    def _run(self):
+        while True:
+            job = self.queue.claim()
+            log.info(f"Worker picked up job {job['id']}")
+            with self._running_lock:
+                self._running.add(job["id"])
+            try:
+                self._execute(job)
+            finally:
+                with self._running_lock:
+                    self._running.discard(job["id"])
+
+    def _execute(self, job):
+
+        def progress(rows_done, rows_total, job_id=job["id"]):
+            self.queue.update_progress(job_id, rows_done, rows_total)
+
+        try:
+            result = self.handler(job, progress)
+            if isinstance(result, dict) and result.get("status") == "error":
+                self.queue.fail(job["id"], result.get("message", "Job failed"))
+            else:
+                self.queue.complete(job["id"], result)
+        except Exception as e:
+            log.error(f"Job {job['id']} failed: {str(e)}")
+            self.queue.fail(job["id"], str(e))
+
+
+class JobEvents:
+    """In-process fan-out of job events, for streaming progress to HTTP clients.
+
+    Each subscriber gets its own buffer of events published while it is
+    subscribed, capped at `buffer` events; a subscriber that falls further
+    behind loses the oldest ones and is told how many with a "lagged" event.
+    For replay only the latest progress and the final summary/error are kept,
+    so per-row "result" events are never held for a job nobody is watching.
+    A job's replay state is dropped `retention` seconds after it is closed;
+    late subscribers get nothing and should fall back to the job's stored status.
+    """
+
+    def __init__(self, retention=60, buffer=1000):
+        self.retention = retention
+        self.buffer = buffer
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._logs = {}  # job_id -> {"latest": {type: event}, "subscribers": {id: state}, "closed_at": float or None}
+
+    def _entry(self, job_id):
+        return self._logs.setdefault(job_id, {"latest": {}, "subscribers": {}, "closed_at": None})
+
+    def has_subscribers(self, job_id):
+        with self._lock:
+            return bool(self._logs.get(job_id, {}).get("subscribers"))
+
+    def publish(self, job_id, event):
+        with self._lock:
+            entry = self._entry(job_id)
+            if event.get("type") != "result":
+                entry["latest"][event.get("type")] = event
+            for state in entry["subscribers"].values():
+                if len(state["events"]) >= self.buffer:
+                    state["events"].popleft()
+                    state["dropped"] += 1
+                state["events"].append(event)
+            self._changed.notify_all()
+
+    def close(self, job_id):
+        """Mark a job finished and drop closed jobs whose retention has passed"""
+        now = time.monotonic()
+        with self._lock:
+            self._entry(job_id)["closed_at"] = now
+            for key in [key for key, entry in self._logs.items()
+                        if entry["closed_at"] is not None and now - entry["closed_at"] > self.retention
+                        and not entry["subscribers"]]:
+                del self._logs[key]
+            self._changed.notify_all()
+
+    def subscribe(self, job_id, poll_interval=5.0):
+        """Start buffering the job's events now; iterate the returned subscription to read them.
+
+        Subscribing before the job is submitted means none of its result rows are missed.
+        """
+        return Subscription(self, job_id, poll_interval)
+
+
+class Subscription:
+    """One subscriber's view of a job's events, registered from construction until close()"""
+
+    def __init__(self, events, job_id, poll_interval):
+        self.events = events
+        self.job_id = job_id
+        self.poll_interval = poll_interval
+        self._token = object()
+        with events._lock:
+            self._job = events._entry(job_id)
+            replay = [self._job["latest"][kind] for kind in ("progress", "summary", "error")
+                      if kind in self._job["latest"]]
+            self._state = {"events": collections.deque(replay), "dropped": 0}
+            self._job["subscribers"][self._token] = self._state
+
+    def __iter__(self):
+        """Yield the job's events until it is closed; yields None after each idle `poll_interval`.
+
+        Starts with the latest progress and, for a finished job, its final event.
+        """
+        lock, state, job = self.events._lock, self._state, self._job
+        try:
+            while True:
+                with lock:
+                    if not state["events"] and job["closed_at"] is None:
+                        self.events._changed.wait(self.poll_interval)
+                    events = list(state["events"])
+                    state["events"].clear()
+                    dropped, state["dropped"] = state["dropped"], 0
+                    closed = job["closed_at"] is not None
+                if dropped:
+                    yield {"type": "lagged", "dropped": dropped}
+                for event in events:
+                    yield event
+                if closed and not events:
+                    return
+                if not events:
+                    yield None
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop buffering events; safe to call more than once"""
+        events, job = self.events, self._job
+        with events._lock:
+            if job["subscribers"].pop(self._token, None) is None:
+                return
+            if not job["subscribers"] and not job["latest"] and job["closed_at"] is None \
+                    and events._logs.get(self.job_id) is job:
+                del events._logs[self.job_id]
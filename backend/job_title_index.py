@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+log = logging.getLogger(__name__)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+class _Snapshot:
+    """Immutable index over one load of the jobs table.
+
+    `postings` maps each title token to the jobs containing it, and
+    `token_trigrams` maps character trigrams to vocabulary tokens so that
+    misspelled query tokens can still reach their postings.
+    """
+
+    def __init__(self, jobs):
+        self.titles = {}
+        self.tokens = {}
+        self.postings = defaultdict(set)
+        self.token_trigrams = defaultdict(set)
+        self.vocabulary = {}
+        for job in jobs:
+            job_id, title = job["id"], job.get("title") or ""
+            tokens = set(tokenize(title))
+            self.titles[job_id] = title
+            self.tokens[job_id] = tokens
+            for token in tokens:
+                self.postings[token].add(job_id)
+                if token not in self.vocabulary:
+                    self.vocabulary[token] = trigrams(token)
+                    for gram in self.vocabulary[token]:
+                        self.token_trigrams[gram].add(token)
+
+    def expand(self, token, min_similarity):
+        """{vocabulary token: similarity} for the query token and its close spellings"""
+        if token in self.vocabulary:
+            return {token: 1.0}
+        grams = trigrams(token)
+        nearby = set()
+        for gram in grams:
+            nearby |= self.token_trigrams.get(gram, set())
+        matches = {}
+        for other in nearby:
+            similarity = dice(grams, self.vocabulary[other])
+            if similarity >= min_similarity:
+                matches[other] = similarity
+        return matches
+
+    def score(self, query_tokens, min_similarity):
+        """{job_id: token-set F1} for jobs sharing at least one (fuzzy) token with the query"""
+        best = defaultdict(dict)  # job_id -> query token -> best similarity
+        for token in query_tokens:
+            for other, similarity in self.expand(token, min_similarity).items():
+                for job_id in self.postings[other]:
+                    if similarity > best[job_id].get(token, 0.0):
+                        best[job_id][token] = similarity
+        return {
+            job_id: 2 * sum(matched.values()) / (len(query_tokens) + len(self.tokens[job_id]))
+            for job_id, matched in best.items()
+        }
+
+
+class JobTitleIndex:
+    """In-memory, periodically refreshed index for resolving a job name to a job id.
+
+    `loader()` returns [{'id', 'title'}, ...]. The index is built on first use
+    and rebuilt in the background once it is older than `ttl` seconds; a lookup
+    that finds nothing also triggers a synchronous rebuild (at most once per
+    `miss_refresh_interval`) so jobs created since the last load are found.
+    """
+
+    def __init__(self, loader, ttl=None, miss_refresh_interval=None, min_score=None, ambiguity_margin=None,
+                 fuzzy_similarity=0.5):
+        self.loader = loader
+        self.ttl = ttl if ttl is not None else float(os.getenv('JOB_INDEX_TTL', '300'))
+        self.miss_refresh_interval = miss_refresh_interval if miss_refresh_interval is not None \
+            else float(os.getenv('JOB_INDEX_MISS_REFRESH', '30'))
+        self.min_score = min_score if min_score is not None else float(os.getenv('JOB_MATCH_MIN_SCORE', '0.3'))
+        self.ambiguity_margin = ambiguity_margin if ambiguity_margin is not None \
+            else float(os.getenv('JOB_MATCH_MARGIN', '0.05'))
+        self.fuzzy_similarity = fuzzy_similarity
+        self._snapshot = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def refresh(self):
+        """Reload the jobs table and swap in a new index"""
+        jobs = self.loader()
+        snapshot = _Snapshot(jobs)
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+            self._refreshing = False
+        log.info(f"Job title index built: {len(snapshot.titles)} jobs, {len(snapshot.postings)} tokens")
+        return snapshot
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            log.error(f"Job title index refresh failed: {str(e)}")
+            with self._lock:
+                self._refreshing = False
+
+    def _current(self):
+        with self._lock:
+            snapshot = self._snapshot
+            stale = snapshot is not None and time.monotonic() - self._loaded_at > self.ttl
+            if stale and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return snapshot or self.refresh()
+
+    def resolve(self, job_name, limit=5):
+        """Best match for `job_name`, or None.
+
+        Returns {'job_id', 'title', 'confidence', 'ambiguous', 'candidates'}, where
+        `candidates` lists every match within `ambiguity_margin` of the best one.
+        """
+        query_tokens = set(tokenize(job_name))
+        if not query_tokens:
+            return None
+        snapshot = self._current()
+        scores = snapshot.score(query_tokens, self.fuzzy_similarity)
+        if not scores and time.monotonic() - self._loaded_at > self.miss_refresh_interval:
+            snapshot = self.refresh()
+            scores = snapshot.score(query_tokens, self.fuzzy_similarity)
+
+        ranked = sorted(
+            ((score, job_id) for job_id, score in scores.items() if score >= self.min_score),
+            key=lambda item: -item[0]
+        )[:limit]
+        if not ranked:
+            return None
+        best_score, best_id = ranked[0]
+        candidates = [
+            {'job_id': job_id, 'title': snapshot.titles[job_id], 'confidence': round(score, 3)}
+            for score, job_id in ranked if best_score - score <= self.ambiguity_margin
+        ]
+        return {
+            'job_id': best_id,
+            'title': snapshot.titles[best_id],
+            'confidence': round(best_score, 3),
+            'ambiguous': len(candidates) > 1,
+            'candidates': candidates
+        }
+
+    def stats(self):
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                'jobs': 0 if snapshot is None else len(snapshot.titles),
+                'tokens': 0 if snapshot is None else len(snapshot.postings),
+                'age_seconds': None if snapshot is None else round(time.monotonic() - self._loaded_at, 1),
+                'ttl': self.ttl
+            }
@@ -0,0 +1,78 @@
+import contextlib
+import sqlite3
+import threading
+
+from serving import after_fork
+
+
+class LocalDB:
+    """SQLite database file shared by the server processes on one host.
+
+    The connection is opened lazily, and again in every forked child, since a
+    SQLite connection must never be used on both sides of a fork. `lock`
+    serializes the connection between threads; every method takes it, and
+    callers hold it themselves around a sequence of statements that must not
+    interleave with another thread's.
+    """
+
+    def __init__(self, path, row_factory=None):
+        self.path = path
+        self.row_factory = row_factory
+        self._conn = None
+        # Inherited connections stay referenced: finalizing one in a child could
+        # checkpoint or remove the parent's WAL
+        self._inherited = []
+        self._reset()
+        after_fork(self, "_reset")
+
+    def _reset(self):
+        if self._conn is not None:
+            self._inherited.append(self._conn)
+        self._conn = None
+        self.lock = threading.RLock()
+
+    @property
+    def conn(self):
+        with self.lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                conn.row_factory = self.row_factory
+                conn.execute("PRAGMA journal_mode=WAL")
+                # WAL with synchronous=NORMAL keeps a commit to an append, without an fsync
+                conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn = conn
+            return self._conn
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params)
+
+    def executemany(self, sql, rows):
+        with self.lock:
+            return self.conn.executemany(sql, rows)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back if the block raises; holds `lock` throughout"""
+        with self.lock:
+            # IMMEDIATE takes the write lock up front, so other processes cannot interleave
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def execute_in(self, sql, values, params=(), batch=500):
+        """Run `sql`, whose `{}` is an IN list, over `values` in batches under SQLite's parameter limit.
+
+        `params` fill the placeholders before the list. Returns the rows of every batch.
+        """
+        values = list(values)
+        rows = []
+        with self.lock:
+            for start in range(0, len(values), batch):
+                chunk = values[start:start + batch]
+                rows.extend(self.conn.execute(sql.format(", ".join("?" * len(chunk))), (*params, *chunk)))
+        return rows
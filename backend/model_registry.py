@@ -0,0 +1,166 @@
+import logging
+import os
+import resource
+import threading
+import time
+from functools import partial
+
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+# Distilled checkpoint for the fast summarization tier
+FAST_SUMMARIZER_MODEL = os.getenv("FAST_SUMMARIZER_MODEL", "sshleifer/distilbart-cnn-12-6")
+CLASSIFIER_MODEL = "facebook/bart-large-mnli"
+SENTENCE_ENCODER_MODEL = "all-MiniLM-L6-v2"
+
+log = logging.getLogger(__name__)
+
+
+def current_rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# fp32 PyTorch ("torch"), dynamically quantized int8 Linear layers ("int8") or ONNX Runtime ("onnx")
+INFERENCE_BACKENDS = ("torch", "int8", "onnx")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+if INFERENCE_BACKEND not in INFERENCE_BACKENDS:
+    raise ValueError(f"INFERENCE_BACKEND must be one of {INFERENCE_BACKENDS}, got '{INFERENCE_BACKEND}'")
+
+
+def _device():
+    import torch
+    return 0 if torch.cuda.is_available() else -1
+
+
+def _quantize(module):
+    """Swap Linear layers for int8 dynamically quantized ones (CPU only), in place"""
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _onnxruntime():
+    try:
+        from optimum import onnxruntime
+    except ImportError:
+        raise ImportError("INFERENCE_BACKEND=onnx requires optimum[onnxruntime] to be installed")
+    return onnxruntime
+
+
+def load_pipeline(task, model_id, backend="torch"):
+    """Build a transformers pipeline for `task` on the requested inference backend"""
+    from transformers import AutoTokenizer, pipeline
+    if backend == "onnx":
+        ort = _onnxruntime()
+        model_class = ort.ORTModelForSeq2SeqLM if task == "summarization" else ort.ORTModelForSequenceClassification
+        return pipeline(
+            task,
+            model=model_class.from_pretrained(model_id, export=True),
+            tokenizer=AutoTokenizer.from_pretrained(model_id)
+        )
+    if backend == "int8":
+        pipe = pipeline(task, model=model_id, device=-1)
+        pipe.model = _quantize(pipe.model)
+        return pipe
+    return pipeline(task, model=model_id, device=_device())
+
+
+def load_sentence_encoder(model_id, backend="torch"):
+    """Build a SentenceTransformer on the requested inference backend"""
+    from sentence_transformers import SentenceTransformer
+    if backend == "onnx":
+        _onnxruntime()
+        return SentenceTransformer(model_id, backend="onnx")
+    if backend == "int8":
+        return _quantize(SentenceTransformer(model_id, device="cpu"))
+    return SentenceTransformer(model_id)
+
+
+class ModelRegistry:
+    """Process-wide registry that loads each model once, on first use.
+
+    Every service in the process gets the same instance from `get()`, and
+    `stats()` reports how long each load took and how much RSS it added.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, model_id=None, backend=None):
+        """Register a zero-argument loader; nothing is loaded until `get(name)`"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._stats[name] = {"model_id": model_id or name, "backend": backend, "loaded": False}
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        if name not in self._loaders:
+            raise KeyError(f"No model registered under '{name}'")
+
+        with self._locks[name]:
+            if name not in self._models:
+                log.info(f"Loading model '{name}' ({self._stats[name]['model_id']}, {self._stats[name]['backend']})...")
+                rss_before = current_rss_bytes()
+                start = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                load_seconds = time.perf_counter() - start
+                rss_added = current_rss_bytes() - rss_before
+                self._stats[name].update({
+                    "loaded": True,
+                    "load_seconds": round(load_seconds, 2),
+                    "rss_added_mb": round(rss_added / 2 ** 20, 1),
+                })
+                log.info(f"Loaded '{name}' in {load_seconds:.1f}s (+{rss_added / 2 ** 20:.0f} MB RSS)")
+        return self._models[name]
+
+    def warm_up(self, names=None):
+        """Load the given models (all registered ones by default) ahead of the first request"""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rss_mb": round(current_rss_bytes() / 2 ** 20, 1),
+                "models": {name: dict(stats) for name, stats in self._stats.items()},
+            }
+
+
+registry = ModelRegistry()
+registry.register(
+    "summarizer", partial(load_pipeline, "summarization", SUMMARIZER_MODEL, INFERENCE_BACKEND),
+    SUMMARIZER_MODEL, INFERENCE_BACKEND
+)
+registry.register(
+    "summarizer_fast", partial(load_pipeline, "summarization", FAST_SUMMARIZER_MODEL, INFERENCE_BACKEND),
+    FAST_SUMMARIZER_MODEL, INFERENCE_BACKEND
+)
+registry.register(
+    "classifier", partial(load_pipeline, "zero-shot-classification", CLASSIFIER_MODEL, INFERENCE_BACKEND),
+    CLASSIFIER_MODEL, INFERENCE_BACKEND
+)
+registry.register(
+    "sentence_encoder", partial(load_sentence_encoder, SENTENCE_ENCODER_MODEL, INFERENCE_BACKEND),
+    SENTENCE_ENCODER_MODEL, INFERENCE_BACKEND
+)
+
+
+def warm_up_from_env(default_names):
+    """Warm up models at startup when MODEL_WARMUP is set ("1" for the service defaults, or a comma list)"""
+    setting = os.getenv("MODEL_WARMUP", "0").strip()
+    if setting in ("", "0", "false"):
+        return
+    names = default_names if setting in ("1", "true") else [name.strip() for name in setting.split(",")]
+    registry.warm_up(names)
@@ -0,0 +1,57 @@
+import hashlib
+import json
+from datetime import datetime
+
+from local_db import LocalDB
+
+
+def row_key(feedback, signature):
+    """Memo key for one feedback row: its text plus the models and settings that analyze it"""
+    return hashlib.sha256(f"{signature}\0{feedback}".encode("utf-8")).hexdigest()
+
+
+class ResultMemo:
+    """SQLite store of per-row model outputs and of what has been saved to Supabase.
+
+    `rows` maps a row key to the summarizer/classifier output for that text, so
+    unchanged feedback is never re-run. `saved` remembers which row key was last
+    written for each (job_id, candidate_name), so saves only send rows that changed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = LocalDB(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, output TEXT NOT NULL, created_at TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS saved (job_id TEXT NOT NULL, candidate_name TEXT NOT NULL, "
+            "row_key TEXT NOT NULL, saved_at TEXT NOT NULL, PRIMARY KEY (job_id, candidate_name))"
+        )
+
+    def get_many(self, keys):
+        """Return {key: output} for the keys that have been analyzed before"""
+        rows = self._db.execute_in("SELECT key, output FROM rows WHERE key IN ({})", dict.fromkeys(keys))
+        return {key: json.loads(output) for key, output in rows}
+
+    def put_many(self, outputs):
+        """Store {key: output} for freshly analyzed rows"""
+        now = datetime.now().isoformat()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO rows (key, output, created_at) VALUES (?, ?, ?)",
+            [(key, json.dumps(output), now) for key, output in outputs.items()]
+        )
+
+    def saved_keys(self, job_id):
+        """{candidate_name: row_key} as last saved for a job"""
+        with self._db.lock:
+            return dict(self._db.execute(
+                "SELECT candidate_name, row_key FROM saved WHERE job_id = ?", (str(job_id),)
+            ))
+
+    def mark_saved(self, job_id, keys_by_candidate):
+        now = datetime.now().isoformat()
+        self._db.executemany(
+            "INSERT OR REPLACE INTO saved (job_id, candidate_name, row_key, saved_at) VALUES (?, ?, ?, ?)",
+            [(str(job_id), candidate, key, now) for candidate, key in keys_by_candidate.items()]
+        )
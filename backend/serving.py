@@ -0,0 +1,64 @@
+"""Process model for running the services under a pre-forking server.
+
+The master process imports the Flask app, which loads model weights once;
+workers are forked from it and share those pages copy-on-write. Anything that
+must not cross a fork (SQLite connections, pooled sockets, threads) is either
+reopened in the child through `after_fork()` or started per worker through
+`on_worker_start()`.
+"""
+import logging
+import os
+import weakref
+
+log = logging.getLogger(__name__)
+
+_worker_start_hooks = []
+
+
+def after_fork(obj, method_name):
+    """Call `obj.<method_name>()` in every forked child while `obj` is alive"""
+    ref = weakref.ref(obj)
+
+    def reset():
+        target = ref()
+        if target is not None:
+            getattr(target, method_name)()
+
+    os.register_at_fork(after_in_child=reset)
+
+
+def on_worker_start(fn):
+    """Run `fn()` once in each serving process: in every forked worker, or at startup without one"""
+    _worker_start_hooks.append(fn)
+    if os.getenv("PRELOAD_MASTER") != "1":
+        fn()
+    return fn
+
+
+def start_worker():
+    """Called by the server in each worker right after it is forked"""
+    threads = configure_torch_threads()
+    log.info(f"Worker {os.getpid()} started ({threads} torch threads)")
+    for fn in _worker_start_hooks:
+        fn()
+
+
+def torch_threads():
+    """Intra-op threads per worker: TORCH_THREADS, or the cores split evenly across WEB_WORKERS"""
+    setting = os.getenv("TORCH_THREADS")
+    if setting:
+        return max(1, int(setting))
+    workers = max(1, int(os.getenv("WEB_WORKERS", "1")))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def configure_torch_threads(threads=None):
+    """Cap torch's intra-op pool so the workers on a host do not oversubscribe its cores"""
+    threads = threads or torch_threads()
+    try:
+        import torch
+    except ImportError:
+        return threads
+    torch.set_num_threads(threads)
+    return threads
+
@@ -0,0 +1,108 @@
+"""Length-adaptive feedback summarization.
+
+Feedback no longer than SUMMARY_PASSTHROUGH_TOKENS is its own summary and
+never reaches the model. Longer feedback is summarized with a length budget
+proportional to its token count, so a three-sentence note is not decoded to
+the same 100 tokens as a page of comments. Two tiers are available:
+
+- `quality`: bart-large-cnn with beam search, more beams for longer inputs
+- `fast`: a distilled BART checkpoint (FAST_SUMMARIZER_MODEL) with greedy decoding
+"""
+import math
+import os
+
+from inference_scheduler import MicroBatcher
+from model_registry import FAST_SUMMARIZER_MODEL, SUMMARIZER_MODEL, registry
+from telemetry import metrics
+
+SUMMARY_TIERS = ("quality", "fast")
+DEFAULT_SUMMARY_TIER = os.getenv('SUMMARY_TIER', 'quality')
+
+SUMMARY_PASSTHROUGH_TOKENS = int(os.getenv('SUMMARY_PASSTHROUGH_TOKENS', '40'))
+MAX_SUMMARY_TOKENS = 100
+MIN_SUMMARY_TOKENS = 20
+SUMMARY_RATIO = 0.5
+
+TIER_MODELS = {'quality': ('summarizer', SUMMARIZER_MODEL), 'fast': ('summarizer_fast', FAST_SUMMARIZER_MODEL)}
+
+SUMMARY_ROWS = metrics.counter(
+    "summary_rows_total", "Summarized feedback rows by tier and mode (generated, passthrough)", ("tier", "mode")
+)
+SUMMARY_TOKENS = metrics.counter(
+    "summary_tokens_generated_total", "Summary tokens produced by generation", ("tier",)
+)
+
+
+def _generate(model_name):
+    return lambda texts, **kwargs: registry.get(model_name)(texts, batch_size=len(texts), **kwargs)
+
+
+# Rows with the same generation settings share forward passes across concurrent jobs
+summary_batches = {
+    tier: MicroBatcher(model_name, _generate(model_name)) for tier, (model_name, _) in TIER_MODELS.items()
+}
+
+
+def check_tier(tier):
+    if tier not in SUMMARY_TIERS:
+        raise ValueError(f"Unknown summary tier: {tier} (expected one of {', '.join(SUMMARY_TIERS)})")
+    return tier
+
+
+def token_counts(tier, texts):
+    """Input length of each text in the tier's tokenizer (whitespace words if it has none)"""
+    tokenizer = getattr(registry.get(TIER_MODELS[tier][0]), "tokenizer", None)
+    if tokenizer is None:
+        return [len(text.split()) for text in texts]
+    return [len(ids) for ids in tokenizer(list(texts), truncation=True)["input_ids"]]
+
+
+def generation_params(tokens, tier):
+    """Generation settings for an input of `tokens` tokens.
+
+    The length budget is about half the input, rounded up to a multiple of
+    10 so rows of similar length share settings (and batches), and capped at
+    MAX_SUMMARY_TOKENS. The quality tier uses 2 beams for short inputs and 4
+    for long ones; the fast tier decodes greedily.
+    """
+    max_length = min(MAX_SUMMARY_TOKENS, max(MIN_SUMMARY_TOKENS, math.ceil(tokens * SUMMARY_RATIO / 10) * 10))
+    return {
+        'max_length': max_length,
+        'min_length': max(10, max_length * 3 // 10),
+        'num_beams': 1 if tier == 'fast' else (2 if tokens < 128 else 4),
+        'do_sample': False,
+    }
+
+
+def summary_signature(tier):
+    """What a summary depends on besides the text, for result memo keys"""
+    return {
+        'tier': tier,
+        'model': TIER_MODELS[tier][1],
+        'passthrough_tokens': SUMMARY_PASSTHROUGH_TOKENS,
+        'max_tokens': MAX_SUMMARY_TOKENS,
+        'min_tokens': MIN_SUMMARY_TOKENS,
+        'ratio': SUMMARY_RATIO,
+    }
+
+
+def summarize(texts, tier=None):
+    """[{'summary_text': ...}] for each text, in order, generated only where the text is long enough"""
+    tier = check_tier(tier or DEFAULT_SUMMARY_TIER)
+    outputs = [None] * len(texts)
+    groups = {}  # generation settings -> row indexes
+    for i, (text, tokens) in enumerate(zip(texts, token_counts(tier, texts))):
+        if tokens <= SUMMARY_PASSTHROUGH_TOKENS:
+            outputs[i] = {'summary_text': text}
+        else:
+            params = generation_params(tokens, tier)
+            groups.setdefault(tuple(sorted(params.items())), []).append(i)
+
+    SUMMARY_ROWS.inc(len(texts) - sum(len(rows) for rows in groups.values()), tier=tier, mode="passthrough")
+    for params, rows in groups.items():
+        generated = summary_batches[tier].submit([texts[i] for i in rows], **dict(params))
+        for i, output in zip(rows, generated):
+            outputs[i] = output
+        SUMMARY_ROWS.inc(len(rows), tier=tier, mode="generated")
+        SUMMARY_TOKENS.inc(sum(token_counts(tier, [output['summary_text'] for output in generated])), tier=tier)
+    return outputs
@@ -0,0 +1,167 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from serving import after_fork
+from telemetry import span
+
+# Transient statuses worth retrying; PostgREST returns 503 while the pool is saturated
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class SupabaseError(Exception):
+    """A Supabase REST call that returned a non-2xx status"""
+
+    def __init__(self, method, url, status_code, text):
+        super().__init__(f"{method} {url} failed with {status_code}: {text[:500]}")
+        self.status_code = status_code
+        self.text = text
+
+
+def eq(value):
+    return f"eq.{value}"
+
+
+def in_(values):
+    """PostgREST membership filter; values are quoted so commas and parentheses survive"""
+    quoted = ('"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values)
+    return f"in.({','.join(quoted)})"
+
+
+def ilike(pattern):
+    """PostgREST case-insensitive LIKE; `*` is the wildcard"""
+    return f"ilike.{pattern}"
+
+
+def contains_word(value):
+    """ilike pattern matching `value` anywhere, with PostgREST's reserved characters removed"""
+    cleaned = "".join(ch for ch in value if ch not in "*,.()\"\\")
+    return f"*{cleaned}*"
+
+
+class SupabaseClient:
+    """Thin PostgREST client over one pooled `requests.Session`.
+
+    Connections are kept alive and reused across calls, idempotent requests are
+    retried with exponential backoff on connection errors and 429/5xx, and every
+    request has a (connect, read) timeout. Filters, column lists and limits are
+    passed through as PostgREST query parameters so the database does the work.
+    """
+
+    def __init__(self, url=None, key=None, timeout=None, retries=None, backoff=None, pool_size=None):
+        self.url = (url or os.getenv('SUPABASE_URL') or '').rstrip('/')
+        self.key = key or os.getenv('SUPABASE_KEY')
+        if not self.url or not self.key:
+            raise ValueError("Supabase URL and key must be set in environment variables")
+
+        read_timeout = timeout or float(os.getenv('SUPABASE_TIMEOUT', '30'))
+        self.timeout = (min(read_timeout, 5.0), read_timeout)
+        retries = int(os.getenv('SUPABASE_RETRIES', '3')) if retries is None else retries
+        backoff = float(os.getenv('SUPABASE_BACKOFF', '0.5')) if backoff is None else backoff
+        pool_size = pool_size or int(os.getenv('SUPABASE_POOL_SIZE', '10'))
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False
+        )
+        self._retry = retry
+        self._pool_size = pool_size
+        self._open_session()
+        # Pooled sockets inherited over a fork would interleave two processes' requests
+        after_fork(self, "_open_session")
+
+    def _open_session(self):
+        self.session = self._pooled_session()
+        self.session.headers.update({
+            'apikey': self.key,
+            'Authorization': f'Bearer {self.key}'
+        })
+        # File URLs on other hosts (e.g. signed S3 URLs) must never see the service key
+        self.external_session = self._pooled_session()
+
+    def _pooled_session(self):
+        adapter = HTTPAdapter(pool_connections=self._pool_size, pool_maxsize=self._pool_size, max_retries=self._retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _check(self, response):
+        if not 200 <= response.status_code < 300:
+            raise SupabaseError(response.request.method, response.url, response.status_code, response.text)
+        return response
+
+    def select(self, table, columns="*", filters=None, limit=None, order=None, offset=None):
+        """GET /rest/v1/<table> with PostgREST filters, e.g. filters={'job_id': eq(job_id)}"""
+        params = {'select': columns}
+        params.update(filters or {})
+        if limit is not None:
+            params['limit'] = limit
+        if offset:
+            params['offset'] = offset
+        if order:
+            params['order'] = order
+        with span("supabase_query"):
+            response = self.session.get(f"{self.url}/rest/v1/{table}", params=params, timeout=self.timeout)
+            return self._check(response).json()
+
+    def select_one(self, table, columns="*", filters=None, order=None):
+        rows = self.select(table, columns, filters, limit=1, order=order)
+        return rows[0] if rows else None
+
+    def select_all(self, table, columns="*", filters=None, order="id", page_size=1000):
+        """Every matching row, fetched in pages so PostgREST's max-rows cap cannot truncate it"""
+        rows = []
+        while True:
+            page = self.select(table, columns, filters, limit=page_size, order=order, offset=len(rows))
+            rows.extend(page)
+            if len(page) < page_size:
+                return rows
+
+    def upsert(self, table, records, on_conflict, returning="representation"):
+        """POST rows, merging into existing ones that collide on `on_conflict`"""
+        response = self.session.post(
+            f"{self.url}/rest/v1/{table}",
+            params={'on_conflict': on_conflict},
+            headers={
+                'Content-Type': 'application/json',
+                'Prefer': f'resolution=merge-duplicates,return={returning}'
+            },
+            json=records,
+            timeout=self.timeout
+        )
+        self._check(response)
+        return response.json() if returning == "representation" else []
+
+    def download(self, url):
+        """Open a streamed GET for a file URL over a pooled session; caller closes it.
+
+        Credentials are only sent when the URL is on the Supabase project itself.
+        """
+        own = url == self.url or url.startswith(self.url + "/")
+        session = self.session if own else self.external_session
+        response = session.get(url, stream=True, timeout=self.timeout)
+        if response.status_code != 200:
+            response.close()
+            raise SupabaseError("GET", url, response.status_code, response.text)
+        return response
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, so every caller shares one connection pool"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = SupabaseClient()
+    return _shared
@@ -0,0 +1,108 @@
+"""Trait scoring for interview feedback.
+
+`mnli` asks the zero-shot classifier about every trait, which costs one
+bart-large-mnli pass per (row, trait) pair. `embedding` encodes each row once
+with the sentence encoder and compares it with precomputed prototype
+embeddings for every trait, so its cost does not grow with the trait count.
+Both return the zero-shot pipeline's output shape (labels sorted by score,
+scores summing to 1), so results and saved records look the same either way.
+"""
+import os
+import threading
+
+import numpy as np
+
+from model_registry import SENTENCE_ENCODER_MODEL, registry
+
+TRAIT_SCORERS = ("mnli", "embedding")
+DEFAULT_TRAIT_SCORER = os.getenv('TRAIT_SCORER', 'mnli')
+
+# Softmax temperature over cosine similarities; lower values give more decisive scores
+TRAIT_TEMPERATURE = float(os.getenv('TRAIT_TEMPERATURE', '0.05'))
+
+# Sentences an interviewer might write about a candidate strong in each trait.
+# Traits without an entry fall back to a sentence built from the label itself.
+TRAIT_PROTOTYPES = {
+    "Confidence": [
+        "The candidate was confident and self-assured throughout the interview.",
+        "They answered decisively and stood by their decisions under pressure.",
+        "The candidate stayed calm and composed when challenged.",
+    ],
+    "Communication": [
+        "The candidate communicated clearly and explained their ideas well.",
+        "They structured their answers and were easy to follow.",
+        "The candidate listened carefully and asked thoughtful questions.",
+    ],
+    "Technical Ability": [
+        "The candidate showed strong technical skills and solved the coding problem.",
+        "They had deep knowledge of system design, databases and algorithms.",
+        "The candidate wrote correct, efficient code and reasoned about trade-offs.",
+    ],
+}
+
+
+def prototype_sentences(label):
+    return TRAIT_PROTOTYPES.get(label) or [f"The candidate showed strong {label.lower()}."]
+
+
+class PrototypeScorer:
+    """Scores all traits from one sentence embedding per text.
+
+    Each trait is represented by the normalized mean of its prototype
+    embeddings, computed once per label set. A text's trait scores are a
+    softmax over its cosine similarity to those centroids.
+    """
+
+    def __init__(self, encoder_name="sentence_encoder", temperature=None):
+        self.encoder_name = encoder_name
+        self.temperature = temperature or TRAIT_TEMPERATURE
+        self._centroids = {}  # label tuple -> (n_labels x dim) matrix
+        self._lock = threading.Lock()
+
+    def _encode(self, texts):
+        embeddings = registry.get(self.encoder_name).encode(list(texts), convert_to_numpy=True)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def centroids(self, labels):
+        labels = tuple(labels)
+        with self._lock:
+            if labels not in self._centroids:
+                rows = []
+                for label in labels:
+                    centroid = self._encode(prototype_sentences(label)).mean(axis=0)
+                    rows.append(centroid / max(np.linalg.norm(centroid), 1e-12))
+                self._centroids[labels] = np.stack(rows)
+            return self._centroids[labels]
+
+    def __call__(self, texts, candidate_labels):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        similarities = self._encode(texts) @ self.centroids(candidate_labels).T
+        logits = similarities / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        scores = np.exp(logits)
+        scores /= scores.sum(axis=1, keepdims=True)
+
+        outputs = []
+        for text, row in zip(texts, scores):
+            order = np.argsort(-row, kind="stable")
+            outputs.append({
+                "sequence": text,
+                "labels": [candidate_labels[i] for i in order],
+                "scores": [float(row[i]) for i in order],
+            })
+        return outputs[0] if single else outputs
+
+
+prototype_scorer = PrototypeScorer()
+
+
+def embedding_signature():
+    """What an embedding trait score depends on besides the text, for result memo keys"""
+    return {
+        'encoder': SENTENCE_ENCODER_MODEL,
+        'prototypes': {label: prototype_sentences(label) for label in TRAIT_PROTOTYPES},
+        'temperature': prototype_scorer.temperature
+    }
@@ -0,0 +1,149 @@
+"""Check that an inference backend stays within tolerance of fp32 PyTorch.
+
+Usage:
+    python benchmarks/backend_parity.py --backend int8 [--feedback-csv feedback.csv] [--models summarizer,classifier,sentence_encoder]
+
+Each model is loaded on the reference ("torch") and the candidate backend, run
+over the same inputs, and compared. The JSON report includes latency and the RSS
+each load added; the script exits non-zero if any model is outside tolerance.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+from model_registry import (  # noqa: E402
+    CLASSIFIER_MODEL, INFERENCE_BACKENDS, SENTENCE_ENCODER_MODEL, SUMMARIZER_MODEL,
+    current_rss_bytes, load_pipeline, load_sentence_encoder
+)
+
+TRAITS = ["Confidence", "Communication", "Technical Ability"]
+
+SAMPLE_FEEDBACK = [
+    "The candidate explained their past projects clearly and answered the system design "
+    "questions with confidence, though they hesitated on database indexing trade-offs.",
+    "Struggled with the coding exercise and needed several hints. Communication was polite "
+    "but answers were vague and lacked concrete examples from previous roles.",
+    "Strong technical depth in distributed systems, walked through a Kafka-based pipeline "
+    "they built end to end, and asked thoughtful questions about the team's on-call process.",
+]
+
+SAMPLE_JD = "Senior backend engineer with Python, Flask, PostgreSQL and distributed systems experience."
+
+
+def unigram_f1(a, b):
+    a_tokens, b_tokens = a.lower().split(), b.lower().split()
+    common = sum(min(a_tokens.count(t), b_tokens.count(t)) for t in set(a_tokens))
+    if not common:
+        return 0.0
+    precision, recall = common / len(b_tokens), common / len(a_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def timed_load(loader):
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    model = loader()
+    return model, time.perf_counter() - start, (current_rss_bytes() - rss_before) / 2 ** 20
+
+
+def timed_run(fn):
+    start = time.perf_counter()
+    output = fn()
+    return output, time.perf_counter() - start
+
+
+def compare_summarizer(backend, texts):
+    outputs = {}
+    report = {}
+    for name in ("torch", backend):
+        pipe, load_seconds, rss_mb = timed_load(lambda: load_pipeline("summarization", SUMMARIZER_MODEL, name))
+        summaries, seconds = timed_run(lambda: [
+            out["summary_text"] for out in pipe(texts, max_length=100, min_length=30, do_sample=False)
+        ])
+        outputs[name] = summaries
+        report[name] = {"load_seconds": round(load_seconds, 2), "rss_added_mb": round(rss_mb, 1),
+                        "seconds": round(seconds, 3)}
+        del pipe
+    scores = [unigram_f1(ref, cand) for ref, cand in zip(outputs["torch"], outputs[backend])]
+    report["min_unigram_f1"] = round(min(scores), 4)
+    report["exact_match_rate"] = round(np.mean([r == c for r, c in zip(outputs["torch"], outputs[backend])]), 4)
+    return report, report["min_unigram_f1"]
+
+
+def compare_classifier(backend, texts):
+    outputs = {}
+    report = {}
+    for name in ("torch", backend):
+        pipe, load_seconds, rss_mb = timed_load(lambda: load_pipeline("zero-shot-classification", CLASSIFIER_MODEL, name))
+        results, seconds = timed_run(lambda: pipe(texts, candidate_labels=TRAITS))
+        outputs[name] = [dict(zip(r["labels"], r["scores"])) for r in results]
+        report[name] = {"load_seconds": round(load_seconds, 2), "rss_added_mb": round(rss_mb, 1),
+                        "seconds": round(seconds, 3)}
+        del pipe
+    diffs = [abs(ref[t] - cand[t]) for ref, cand in zip(outputs["torch"], outputs[backend]) for t in TRAITS]
+    agree = [max(ref, key=ref.get) == max(cand, key=cand.get) for ref, cand in zip(outputs["torch"], outputs[backend])]
+    report["max_trait_score_diff"] = round(max(diffs), 4)
+    report["top_trait_agreement"] = round(float(np.mean(agree)), 4)
+    return report, report["max_trait_score_diff"]
+
+
+def compare_sentence_encoder(backend, texts):
+    outputs = {}
+    report = {}
+    for name in ("torch", backend):
+        model, load_seconds, rss_mb = timed_load(lambda: load_sentence_encoder(SENTENCE_ENCODER_MODEL, name))
+        embeddings, seconds = timed_run(lambda: model.encode([SAMPLE_JD] + texts, convert_to_numpy=True))
+        outputs[name] = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        report[name] = {"load_seconds": round(load_seconds, 2), "rss_added_mb": round(rss_mb, 1),
+                        "seconds": round(seconds, 3)}
+        del model
+    ref, cand = outputs["torch"], outputs[backend]
+    report["min_embedding_cosine"] = round(float(np.min(np.sum(ref * cand, axis=1))), 4)
+    match_diff = np.abs(ref[1:] @ ref[0] - cand[1:] @ cand[0]) * 100
+    report["max_match_percent_diff"] = round(float(np.max(match_diff)), 3)
+    return report, report["max_match_percent_diff"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", required=True, choices=[b for b in INFERENCE_BACKENDS if b != "torch"])
+    parser.add_argument("--feedback-csv", help="CSV with an interview_feedback column to use as inputs")
+    parser.add_argument("--models", default="summarizer,classifier,sentence_encoder")
+    parser.add_argument("--min-summary-f1", type=float, default=0.6)
+    parser.add_argument("--max-trait-diff", type=float, default=0.05)
+    parser.add_argument("--max-match-diff", type=float, default=2.0, help="In match_percent points")
+    args = parser.parse_args()
+
+    texts = SAMPLE_FEEDBACK
+    if args.feedback_csv:
+        with open(args.feedback_csv, newline="") as f:
+            texts = [row["interview_feedback"] for row in csv.DictReader(f) if row.get("interview_feedback", "").strip()]
+
+    checks = {
+        "summarizer": (compare_summarizer, lambda v: v >= args.min_summary_f1),
+        "classifier": (compare_classifier, lambda v: v <= args.max_trait_diff),
+        "sentence_encoder": (compare_sentence_encoder, lambda v: v <= args.max_match_diff),
+    }
+    report = {"backend": args.backend, "inputs": len(texts), "models": {}}
+    passed = True
+    for name in args.models.split(","):
+        compare, within_tolerance = checks[name.strip()]
+        model_report, value = compare(args.backend, texts)
+        model_report["passed"] = bool(within_tolerance(value))
+        passed = passed and model_report["passed"]
+        report["models"][name.strip()] = model_report
+
+    report["passed"] = passed
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
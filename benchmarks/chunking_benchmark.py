@@ -0,0 +1,106 @@
+"""Compare whole-text and chunked resume scoring for accuracy and throughput.
+
+Usage:
+    python benchmarks/chunking_benchmark.py --resumes DIR --jd jd.txt [--relevant relevant.txt] [--k 5]
+
+`relevant.txt` lists, one per line, the resume filenames that should rank at the
+top for the JD; with it the report includes recall@k and MRR for each mode.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunking import POOLING_METHODS, chunk_text, pool_scores  # noqa: E402
+from text_extraction import extract_text  # noqa: E402
+
+
+def normalize(vectors):
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def ranking_metrics(ranked, relevant, k):
+    if not relevant:
+        return {}
+    hits = [i for i, name in enumerate(ranked) if name in relevant]
+    return {
+        f"recall@{k}": round(len([i for i in hits if i < k]) / len(relevant), 4),
+        "mrr": round(1.0 / (hits[0] + 1), 4) if hits else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", required=True, help="Directory of .pdf/.docx/.txt resumes")
+    parser.add_argument("--jd", required=True, help="Text file with the job description")
+    parser.add_argument("--relevant", help="File listing the filenames expected to rank highest")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--overlap", type=int, default=32)
+    args = parser.parse_args()
+
+    model = SentenceTransformer(args.model)
+    with open(args.jd) as f:
+        jd_text = f.read()
+    relevant = set()
+    if args.relevant:
+        with open(args.relevant) as f:
+            relevant = {line.strip() for line in f if line.strip()}
+
+    names, texts = [], []
+    for name in sorted(os.listdir(args.resumes)):
+        with open(os.path.join(args.resumes, name), "rb") as f:
+            text = extract_text(name, f.read())
+        if text.strip():
+            names.append(name)
+            texts.append(text)
+
+    jd_embedding = normalize(model.encode([jd_text], convert_to_numpy=True))[0]
+    report = {"resumes": len(texts), "model": args.model}
+
+    # Whole-text path: one (truncated) sequence per resume
+    start = time.perf_counter()
+    embeddings = normalize(model.encode(texts, batch_size=args.batch_size, convert_to_numpy=True))
+    elapsed = time.perf_counter() - start
+    scores = embeddings @ jd_embedding
+    report["whole"] = {
+        "encode_seconds": round(elapsed, 3),
+        "resumes_per_second": round(len(texts) / elapsed, 2),
+        **ranking_metrics([names[i] for i in np.argsort(-scores)], relevant, args.k)
+    }
+
+    # Chunked path: every chunk of every resume in one batched encode, then pooled per resume
+    window = model.max_seq_length - 2
+    start = time.perf_counter()
+    spans, owners = [], []
+    for owner, text in enumerate(texts):
+        for span in chunk_text(text, model.tokenizer, window, args.overlap):
+            spans.append(span)
+            owners.append(owner)
+    chunks = [texts[owner][s:e] for owner, (s, e) in zip(owners, spans)]
+    chunk_embeddings = normalize(model.encode(chunks, batch_size=args.batch_size, convert_to_numpy=True))
+    elapsed = time.perf_counter() - start
+    chunk_scores = chunk_embeddings @ jd_embedding
+    owners = np.array(owners)
+
+    for pooling in POOLING_METHODS:
+        scores = np.array([pool_scores(chunk_scores[owners == i], pooling) for i in range(len(texts))])
+        report[f"chunked_{pooling}"] = {
+            "chunks": len(chunks),
+            "encode_seconds": round(elapsed, 3),
+            "resumes_per_second": round(len(texts) / elapsed, 2),
+            **ranking_metrics([names[i] for i in np.argsort(-scores)], relevant, args.k)
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Synthetic inputs, fixture models and a Supabase stub for offline benchmarks.
+
+Everything here is deterministic for a given seed, so reports from different
+commits are measured on identical inputs.
+"""
+import csv
+import hashlib
+import io
+import json
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+
+SKILLS = [
+    "python", "flask", "django", "postgresql", "redis", "kafka", "docker", "kubernetes", "aws", "gcp",
+    "react", "typescript", "graphql", "terraform", "spark", "airflow", "pandas", "pytorch", "linux", "grpc",
+]
+VERBS = ["built", "designed", "migrated", "scaled", "maintained", "led", "optimized", "automated", "shipped"]
+NOUNS = ["pipeline", "service", "dashboard", "platform", "api", "data warehouse", "ci system", "feature store"]
+FEEDBACK_PHRASES = [
+    "explained their past projects clearly", "hesitated on database indexing trade-offs",
+    "needed several hints on the coding exercise", "asked thoughtful questions about on-call",
+    "walked through a system design end to end", "answers were vague and lacked examples",
+    "showed strong ownership of production incidents", "communicated calmly under pressure",
+]
+
+SAMPLE_JD = (
+    "Senior backend engineer to build Python and Flask services on PostgreSQL and Kafka, "
+    "deploy with Docker and Kubernetes on AWS, and mentor a small team."
+)
+
+
+def resume_text(rng, words):
+    """Plain-text resume of roughly `words` words"""
+    lines = [f"Candidate {rng.randint(1000, 9999)}", "Experience"]
+    count = 2
+    while count < words:
+        skills = rng.sample(SKILLS, 3)
+        line = f"{rng.choice(VERBS).capitalize()} a {rng.choice(NOUNS)} using {', '.join(skills)} " \
+               f"serving {rng.randint(2, 900)} thousand requests per day."
+        lines.append(line)
+        count += len(line.split())
+    return "\n".join(lines)
+
+
+def pdf_bytes(text, lines_per_page=45):
+    """Minimal multi-page PDF (Helvetica text objects) that pdfplumber can read"""
+    def escape(line):
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for n, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * n, 5 + 2 * n
+        kids.append(f"{page_id} 0 R")
+        stream = "BT /F1 10 Tf 14 TL 50 780 Td " + " ".join(f"({escape(line)}) Tj T*" for line in page_lines) + " ET"
+        objects[content_id] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream".encode("latin-1", "replace")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>").encode()
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for obj_id in sorted(objects):
+        out.write(f"{offsets[obj_id]:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def docx_bytes(text):
+    from docx import Document
+    document = Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def synthetic_resumes(count, words=400, formats=("pdf", "docx", "txt"), seed=0):
+    """[(filename, bytes)] cycling through `formats`"""
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        text = resume_text(rng, words)
+        if fmt == "pdf":
+            data = pdf_bytes(text)
+        elif fmt == "docx":
+            data = docx_bytes(text)
+        else:
+            data = text.encode("utf-8")
+        resumes.append((f"resume_{i:05d}.{fmt}", data))
+    return resumes
+
+
+def synthetic_feedback_csv(rows, sentences=4, seed=0):
+    """Feedback CSV with candidate_name, interviewer and interview_feedback columns"""
+    rng = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["candidate_name", "interviewer", "interview_feedback"])
+    for i in range(rows):
+        feedback = ". ".join(
+            f"The candidate {rng.choice(FEEDBACK_PHRASES)}" for _ in range(rng.randint(1, sentences * 2))
+        ) + "."
+        writer.writerow([f"Candidate {i:05d}", f"Interviewer {rng.randint(1, 9)}", feedback])
+    return out.getvalue().encode("utf-8")
+
+
+class FixtureTokenizer:
+    """Whitespace tokenizer with the offset_mapping/input_ids interface the services use"""
+
+    def _encode(self, text, truncation=False, max_length=None, **kwargs):
+        offsets = [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]
+        if truncation and max_length:
+            offsets = offsets[:max_length]
+        return {"offset_mapping": offsets, "input_ids": list(range(len(offsets)))}
+
+    def __call__(self, text, **kwargs):
+        if isinstance(text, str):
+            return self._encode(text, **kwargs)
+        encoded = [self._encode(item, **kwargs) for item in text]
+        return {key: [item[key] for item in encoded] for key in ("offset_mapping", "input_ids")}
+
+
+class FixtureEncoder:
+    """Hashed bag-of-words stand-in for a SentenceTransformer (deterministic, no weights)"""
+
+    max_seq_length = 256
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self.tokenizer = FixtureTokenizer()
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split()[:self.max_seq_length]:
+                vectors[i, int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % self.dim] += 1.0
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+class FixtureSummarizer:
+    """Pipeline-shaped summarizer that returns the leading words of each text"""
+
+    def __init__(self):
+        self.tokenizer = FixtureTokenizer()
+
+    def __call__(self, texts, max_length=100, **kwargs):
+        texts = [texts] if isinstance(texts, str) else texts
+        return [{"summary_text": " ".join(text.split()[:max_length])} for text in texts]
+
+
+class FixtureClassifier:
+    """Pipeline-shaped zero-shot classifier with hash-derived, normalized label scores"""
+
+    def __call__(self, texts, candidate_labels, **kwargs):
+        single = isinstance(texts, str)
+        outputs = []
+        for text in [texts] if single else texts:
+            raw = [int(hashlib.md5(f"{label}\0{text}".encode()).hexdigest()[:6], 16) + 1 for label in candidate_labels]
+            scores = [value / sum(raw) for value in raw]
+            ranked = sorted(zip(candidate_labels, scores), key=lambda item: -item[1])
+            outputs.append({"sequence": text, "labels": [l for l, _ in ranked], "scores": [s for _, s in ranked]})
+        return outputs[0] if single else outputs
+
+
+def register_fixture_models(registry):
+    """Replace the registry's loaders with fixtures, before anything calls registry.get()"""
+    registry.register("sentence_encoder", FixtureEncoder, "fixture-encoder", "fixture")
+    registry.register("summarizer", FixtureSummarizer, "fixture-summarizer", "fixture")
+    registry.register("summarizer_fast", FixtureSummarizer, "fixture-summarizer-fast", "fixture")
+    registry.register("classifier", FixtureClassifier, "fixture-classifier", "fixture")
+
+
+class SupabaseStub:
+    """Local PostgREST/storage stand-in: serves files and tables from memory and records writes"""
+
+    def __init__(self, files=None, tables=None):
+        self.files = files or {}      # path -> bytes
+        self.tables = tables or {}    # table -> [row, ...]
+        self.writes = []              # (table, rows)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path in stub.files:
+                    return self._send(200, stub.files[path], "text/csv")
+                table = path.rsplit("/", 1)[-1]
+                self._send(200, json.dumps(stub.tables.get(table, [])).encode())
+
+            def do_POST(self):
+                rows = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.writes.append((urlparse(self.path).path.rsplit("/", 1)[-1], rows))
+                self._send(201, b"" if "return=minimal" in (self.headers.get("Prefer") or "") else json.dumps(rows).encode())
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
@@ -0,0 +1,120 @@
+"""Recall and latency of the BM25 prefilter in front of whole-resume embedding scoring.
+
+Usage:
+    python benchmarks/lexical_prefilter.py [--resumes 500] [--words 400] [--k 10]
+        [--prefilter 25,50,100,200] [--lexical-weight 0] [--skills python,kafka]
+        [--models fixture|real] [--output report.json]
+
+Every resume goes through /analyze with no prefilter first; its top-k is the
+reference. Each prefilter size M then runs against a fresh embedding cache,
+so the timing includes encoding, and the report gives recall@k (share of the
+reference top-k that the prefiltered ranking also returns), end-to-end
+seconds, per-stage milliseconds and how many resumes reached the encoder.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import SAMPLE_JD, register_fixture_models, synthetic_resumes  # noqa: E402
+from pipeline_benchmark import parse_server_timing  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=500)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--formats", default="txt", help="Comma-separated resume formats (pdf,docx,txt)")
+    parser.add_argument("--jd", help="Text file with the job description (default: the sample JD)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--prefilter", default="25,50,100,200", help="Comma-separated prefilter sizes M")
+    parser.add_argument("--lexical-weight", type=float, default=0.0)
+    parser.add_argument("--skills", default="", help="Comma-separated job skills to boost in the query")
+    parser.add_argument("--models", choices=("fixture", "real"), default="fixture")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="prefilter-bench-")
+    os.environ.update({
+        "EMBEDDING_CACHE_DIR": os.path.join(workdir, "embedding_cache"),
+        "CANDIDATE_INDEX_DIR": os.path.join(workdir, "candidate_index"),
+        "FINGERPRINT_DIR": os.path.join(workdir, "fingerprints"),
+    })
+    from model_registry import registry
+    if args.models == "fixture":
+        register_fixture_models(registry)
+
+    jd_text = SAMPLE_JD
+    if args.jd:
+        with open(args.jd) as f:
+            jd_text = f.read()
+    resumes = synthetic_resumes(args.resumes, args.words, tuple(args.formats.split(",")), seed=args.seed)
+
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        import resume_matcher_backend as matcher
+        from embedding_cache import EmbeddingCache
+
+        client = matcher.app.test_client()
+        matcher.encode_texts([jd_text])  # load the model outside the timed runs
+
+        def run(name, **fields):
+            matcher.embedding_cache = EmbeddingCache(
+                os.path.join(workdir, "caches", name), matcher.MODEL_NAME,
+                matcher.model.get_sentence_embedding_dimension()
+            )
+            data = {"jd": jd_text, "n": str(args.k), "skills": args.skills, **fields}
+            data["resumes"] = [(io.BytesIO(content), filename) for filename, content in resumes]
+            start = time.perf_counter()
+            response = client.post("/analyze", data=data, content_type="multipart/form-data")
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)[:300]}")
+            return {
+                "top": [item["filename"] for item in response.get_json()],
+                "seconds": round(elapsed, 3),
+                "stages_ms": parse_server_timing(response.headers.get("Server-Timing")),
+            }
+
+        reference = dict(run("reference"), embedded=len(resumes))
+        runs = []
+        for m in (int(value) for value in args.prefilter.split(",")):
+            result = run(f"prefilter-{m}", prefilter=str(m), lexical_weight=str(args.lexical_weight))
+            overlap = len(set(result.pop("top")) & set(reference["top"]))
+            runs.append({"prefilter": m, "embedded": min(m, len(resumes)),
+                         f"recall@{args.k}": round(overlap / len(reference["top"]), 4),
+                         "speedup": round(reference["seconds"] / result["seconds"], 2), **result})
+        reference.pop("top")
+    finally:
+        sys.stdout = real_stdout
+
+    report = {
+        "models": args.models,
+        "resumes": len(resumes),
+        "k": args.k,
+        "lexical_weight": args.lexical_weight,
+        "skills": [skill for skill in args.skills.split(",") if skill],
+        "embedding_only": reference,
+        "prefiltered": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Offline throughput/latency benchmark for the resume matcher and interview analyzer.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py [--resumes 120] [--words 400] [--feedback-rows 500]
+        [--clients 16] [--models fixture|real] [--output report.json] [--baseline old.json --tolerance 0.15]
+
+Synthetic PDF/DOCX/TXT resumes and a feedback CSV are generated from a fixed
+seed, Supabase is replaced by a local stub server, and caches/memos live in a
+temporary directory so every run starts cold. `--models fixture` swaps the
+transformer models for deterministic stand-ins (pipeline overhead only);
+`--models real` uses the configured models from the local weight cache.
+
+The JSON report has throughput, p50/p95 per-document latency, per-stage
+timings and peak RSS. With `--baseline`, metrics that regressed by more than
+`--tolerance` are listed and the script exits non-zero.
+"""
+import argparse
+import concurrent.futures
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import (  # noqa: E402
+    SAMPLE_JD, SupabaseStub, register_fixture_models, synthetic_feedback_csv, synthetic_resumes
+)
+
+# (report path, higher is better) pairs compared against a baseline report
+TRACKED_METRICS = [
+    ("resume_matcher.cold.docs_per_second", True),
+    ("resume_matcher.warm.docs_per_second", True),
+    ("resume_matcher.chunked.docs_per_second", True),
+    ("resume_matcher.per_document_ms.p50", False),
+    ("resume_matcher.per_document_ms.p95", False),
+    ("resume_matcher.stream.first_result_ms", False),
+    ("resume_matcher.concurrent.batched.texts_per_second", True),
+    ("interview_analyzer.cold.rows_per_second", True),
+    ("interview_analyzer.per_row_ms.p50", False),
+    ("interview_analyzer.per_row_ms.p95", False),
+    ("interview_analyzer.end_to_end.rows_per_second", True),
+    ("peak_rss_mb", False),
+]
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if platform.system() == "Darwin" else 1024
+    return round(resource.getrusage(who).ru_maxrss * scale / 2 ** 20, 1)
+
+
+def parse_server_timing(header):
+    stages = {}
+    for part in filter(None, (header or "").split(",")):
+        name, _, duration = part.strip().partition(";dur=")
+        stages[name] = float(duration)
+    return stages
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def post_resumes(client, resumes, **fields):
+    data = {"jd": SAMPLE_JD, "n": str(len(resumes)), **fields}
+    data["resumes"] = [(io.BytesIO(content), name) for name, content in resumes]
+    start = time.perf_counter()
+    response = client.post("/analyze", data=data, content_type="multipart/form-data")
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)[:300]}")
+    return elapsed, parse_server_timing(response.headers.get("Server-Timing"))
+
+
+def bench_concurrent_encoding(matcher, texts, clients):
+    """Encoder throughput with `clients` threads each embedding one text at a time, with and without
+    cross-request micro-batching"""
+    batcher = matcher.encoder_batches
+    settings = (batcher.max_batch, batcher.max_wait)
+    report = {"clients": clients, "texts": len(texts)}
+    try:
+        for label, max_batch, max_wait in (("unbatched", 1, 0.0), ("batched",) + settings):
+            batcher.max_batch, batcher.max_wait = max_batch, max_wait
+            latencies = []
+
+            def embed(text):
+                start = time.perf_counter()
+                matcher.encode_texts([text])
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor(clients) as pool:
+                list(pool.map(embed, texts))
+            elapsed = time.perf_counter() - start
+            report[label] = {"seconds": round(elapsed, 3), "texts_per_second": round(len(texts) / elapsed, 2),
+                             "latency_ms": percentiles(latencies)}
+    finally:
+        batcher.max_batch, batcher.max_wait = settings
+    return report
+
+
+def bench_resume_matcher(resumes, repeat, latency_samples, cache_root, clients):
+    import resume_matcher_backend as matcher
+    from embedding_cache import EmbeddingCache
+
+    def fresh_cache(name):
+        matcher.embedding_cache = EmbeddingCache(
+            os.path.join(cache_root, name), matcher.MODEL_NAME, matcher.model.get_sentence_embedding_dimension()
+        )
+
+    client = matcher.app.test_client()
+    report = {"documents": len(resumes), "bytes": sum(len(content) for _, content in resumes)}
+
+    cold_runs = []
+    for i in range(repeat):
+        fresh_cache(f"cold-{i}")
+        cold_runs.append(post_resumes(client, resumes))
+    warm = post_resumes(client, resumes)
+    fresh_cache("chunked")
+    chunked = post_resumes(client, resumes, mode="chunked")
+
+    # Median cold run by wall time, so one noisy run does not skew the report
+    elapsed, stages = sorted(cold_runs, key=lambda run: run[0])[len(cold_runs) // 2]
+    report["cold"] = {"seconds": round(elapsed, 3), "docs_per_second": round(len(resumes) / elapsed, 2),
+                      "stages_ms": stages}
+    report["warm"] = {"seconds": round(warm[0], 3), "docs_per_second": round(len(resumes) / warm[0], 2),
+                      "stages_ms": warm[1]}
+    report["chunked"] = {"seconds": round(chunked[0], 3), "docs_per_second": round(len(resumes) / chunked[0], 2),
+                         "stages_ms": chunked[1]}
+
+    # One document per request against an empty cache: what a single upload costs end to end
+    fresh_cache("latency")
+    latencies = [post_resumes(client, [resume])[0] * 1000 for resume in resumes[:latency_samples]]
+    report["per_document_ms"] = percentiles(latencies)
+
+    fresh_cache("stream")
+    data = {"jd": SAMPLE_JD, "n": str(len(resumes)),
+            "resumes": [(io.BytesIO(content), name) for name, content in resumes]}
+    start = time.perf_counter()
+    response = client.post("/analyze/stream", data=data, content_type="multipart/form-data", buffered=False)
+    first_result = None
+    for line in response.response:
+        if first_result is None and b'"result"' in line:
+            first_result = time.perf_counter() - start
+    total = time.perf_counter() - start
+    report["stream"] = {
+        "first_result_ms": None if first_result is None else round(first_result * 1000, 1),
+        "total_ms": round(total * 1000, 1)
+    }
+
+    # Short JD-sized texts, the calls that gain most from sharing a forward pass
+    texts = [" ".join(content.decode("latin-1").split()[:60]) + f" {i}"
+             for i, (name, content) in enumerate(resumes) if name.endswith(".txt")] or [SAMPLE_JD]
+    report["concurrent"] = bench_concurrent_encoding(matcher, (texts * (clients * 8))[:clients * 8], clients)
+    return report
+
+
+def bench_interview_analyzer(csv_bytes, rows, stub):
+    import interview_analyzer
+
+    analyzer = interview_analyzer.InterviewAnalyzer()
+    file_details = {"file_url": f"{stub.url}/storage/feedback.csv", "file_name": "feedback.csv"}
+
+    # Time each pipeline call so inference can be separated from download/parse/memo overhead
+    stage_seconds = {"summarize": 0.0, "classify": 0.0}
+    run_batch = analyzer._run_batch
+
+    def timed_run_batch(pipe, texts, **kwargs):
+        start = time.perf_counter()
+        try:
+            return run_batch(pipe, texts, **kwargs)
+        finally:
+            stage = "classify" if "candidate_labels" in kwargs else "summarize"
+            stage_seconds[stage] += time.perf_counter() - start
+
+    analyzer._run_batch = timed_run_batch
+
+    # Per-row latency: each progress callback closes a batch; its rows share the batch time
+    per_row_ms = []
+    marks = {"time": None, "done": 0}
+
+    def progress(rows_done, rows_seen):
+        now = time.perf_counter()
+        if marks["time"] is not None and rows_done > marks["done"]:
+            per_row = (now - marks["time"]) * 1000 / (rows_done - marks["done"])
+            per_row_ms.extend([per_row] * (rows_done - marks["done"]))
+        marks["time"], marks["done"] = now, rows_done
+
+    start = time.perf_counter()
+    marks["time"] = start
+    result_df = analyzer.process_feedback_from_url(file_details, progress=progress)
+    cold_seconds = time.perf_counter() - start
+    processed = 0 if result_df is None else len(result_df)
+    inference = sum(stage_seconds.values())
+
+    start = time.perf_counter()
+    analyzer.process_feedback_from_url(file_details)
+    warm_seconds = time.perf_counter() - start
+
+    analyzer.memo = interview_analyzer.ResultMemo(os.path.join(os.path.dirname(analyzer.memo.path), "e2e.sqlite3"))
+    writes_before = len(stub.writes)
+    start = time.perf_counter()
+    outcome = analyzer.analyze_interview_feedback("bench-job", action="download", file_details=file_details,
+                                                  stream=True)
+    e2e_seconds = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "cold": {
+            "seconds": round(cold_seconds, 3),
+            "rows_processed": processed,
+            "rows_per_second": round(processed / cold_seconds, 2) if cold_seconds else None,
+            "stages_ms": {
+                "summarize": round(stage_seconds["summarize"] * 1000, 1),
+                "classify": round(stage_seconds["classify"] * 1000, 1),
+                "download_parse_memo": round((cold_seconds - inference) * 1000, 1),
+            },
+        },
+        "per_row_ms": percentiles(per_row_ms),
+        "warm": {"seconds": round(warm_seconds, 3), "rows_per_second": round(rows / warm_seconds, 2)},
+        "end_to_end": {
+            "status": outcome.get("status"),
+            "seconds": round(e2e_seconds, 3),
+            "rows_per_second": round(outcome.get("rows_processed", 0) / e2e_seconds, 2),
+            "upsert_requests": len(stub.writes) - writes_before,
+            "records_saved": outcome.get("records_saved"),
+        },
+    }
+
+
+def lookup(report, path):
+    for key in path.split("."):
+        if not isinstance(report, dict) or key not in report:
+            return None
+        report = report[key]
+    return report
+
+
+def compare(report, baseline, tolerance):
+    """Tracked metrics that are worse than the baseline by more than `tolerance` (relative)"""
+    regressions = []
+    for path, higher_is_better in TRACKED_METRICS:
+        current, previous = lookup(report, path), lookup(baseline, path)
+        if not current or not previous:
+            continue
+        change = (current - previous) / previous
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append({"metric": path, "baseline": previous, "current": current,
+                                "change": round(change, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resumes", type=int, default=120, help="Number of synthetic resumes")
+    parser.add_argument("--words", type=int, default=400, help="Approximate words per resume")
+    parser.add_argument("--formats", default="pdf,docx,txt", help="Comma list of resume formats to cycle through")
+    parser.add_argument("--feedback-rows", type=int, default=500, help="Rows in the synthetic feedback CSV")
+    parser.add_argument("--repeat", type=int, default=3, help="Cold resume runs; the median is reported")
+    parser.add_argument("--latency-samples", type=int, default=30, help="Single-document requests for p50/p95")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent callers for the micro-batching run")
+    parser.add_argument("--models", choices=("fixture", "real"), default="fixture")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip", choices=("resume_matcher", "interview_analyzer"), action="append", default=[])
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    csv_bytes = synthetic_feedback_csv(args.feedback_rows, seed=args.seed)
+    stub = SupabaseStub(files={"/storage/feedback.csv": csv_bytes})
+
+    # Everything stateful points into the scratch directory or the stub before the services import
+    os.environ.update({
+        "SUPABASE_URL": stub.url,
+        "SUPABASE_KEY": "benchmark",
+        "EMBEDDING_CACHE_DIR": os.path.join(workdir, "embedding_cache"),
+        "CANDIDATE_INDEX_DIR": os.path.join(workdir, "candidate_index"),
+        "FINGERPRINT_DIR": os.path.join(workdir, "fingerprints"),
+        "ANALYSIS_MEMO_PATH": os.path.join(workdir, "analysis_memo.sqlite3"),
+    })
+
+    from model_registry import registry
+    if args.models == "fixture":
+        register_fixture_models(registry)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+    }
+
+    # Model output goes to stderr so stdout stays a clean JSON report
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        if "resume_matcher" not in args.skip:
+            resumes = synthetic_resumes(args.resumes, args.words, tuple(args.formats.split(",")), seed=args.seed)
+            report["resume_matcher"] = bench_resume_matcher(
+                resumes, args.repeat, args.latency_samples, os.path.join(workdir, "caches"), args.clients
+            )
+        if "interview_analyzer" not in args.skip:
+            report["interview_analyzer"] = bench_interview_analyzer(csv_bytes, args.feedback_rows, stub)
+    finally:
+        sys.stdout = real_stdout
+        stub.close()
+
+    report["models"] = registry.stats()["models"]
+    report["peak_rss_mb"] = peak_rss_mb()
+    # Largest extraction worker process, which is not included in the figure above
+    report["peak_worker_rss_mb"] = peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Summarization time and generation throughput per tier for one feedback CSV.
+
+Usage:
+    python benchmarks/summarization_tiers.py [--csv feedback.csv] [--rows 500]
+        [--models fixture|real] [--batch-size 8] [--output report.json]
+
+Every row is summarized in length-sorted batches, as the analyzer does, with:
+
+- `fixed`: the previous behaviour, bart-large-cnn with max_length=100 on every row
+- `quality` and `fast`: the length-adaptive tiers from backend/summarization.py
+
+For each one the report gives total summarization seconds for the CSV, rows
+generated vs passed through, summary tokens generated and tokens per second.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import register_fixture_models, synthetic_feedback_csv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="Feedback CSV with an interview_feedback column")
+    parser.add_argument("--rows", type=int, default=500, help="Rows to summarize (synthetic rows when no --csv)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--models", choices=("fixture", "real"), default="fixture")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from model_registry import registry
+    if args.models == "fixture":
+        register_fixture_models(registry)
+    import summarization
+
+    if args.csv:
+        frame = pd.read_csv(args.csv, nrows=args.rows)
+    else:
+        frame = pd.read_csv(io.BytesIO(synthetic_feedback_csv(args.rows, seed=args.seed)))
+    texts = sorted((text for text in frame["interview_feedback"].fillna("").astype(str).str.strip() if text), key=len)
+
+    def fixed(batch):
+        return registry.get("summarizer")(batch, max_length=100, min_length=30, do_sample=False,
+                                          batch_size=len(batch))
+
+    runs = {
+        "fixed": ("quality", fixed),
+        "quality": ("quality", lambda batch: summarization.summarize(batch, "quality")),
+        "fast": ("fast", lambda batch: summarization.summarize(batch, "fast")),
+    }
+
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+    report = {"models": args.models, "rows": len(texts), "batch_size": args.batch_size,
+              "passthrough_tokens": summarization.SUMMARY_PASSTHROUGH_TOKENS}
+    try:
+        for name, (tier, run) in runs.items():
+            run(texts[-1:])  # load the model outside the timed section
+            passthrough = sum(1 for count in summarization.token_counts(tier, texts)
+                              if count <= summarization.SUMMARY_PASSTHROUGH_TOKENS) if name != "fixed" else 0
+            summaries = []
+            start = time.perf_counter()
+            for i in range(0, len(texts), args.batch_size):
+                summaries.extend(output["summary_text"] for output in run(texts[i:i + args.batch_size]))
+            seconds = time.perf_counter() - start
+            generated = [summary for summary, text in zip(summaries, texts) if name == "fixed" or summary != text]
+            tokens = sum(summarization.token_counts(tier, generated)) if generated else 0
+            report[name] = {
+                "model": registry.stats()["models"][summarization.TIER_MODELS[tier][0]]["model_id"],
+                "seconds": round(seconds, 3),
+                "rows_per_second": round(len(texts) / seconds, 2) if seconds else None,
+                "rows_generated": len(texts) - passthrough,
+                "rows_passthrough": passthrough,
+                "tokens_generated": tokens,
+                "tokens_per_second": round(tokens / seconds, 1) if seconds else None,
+            }
+    finally:
+        sys.stdout = real_stdout
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
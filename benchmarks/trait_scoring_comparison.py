@@ -0,0 +1,150 @@
+"""Compare embedding-prototype trait scoring with zero-shot MNLI scoring.
+
+Usage:
+    python benchmarks/trait_scoring_comparison.py [--csv feedback.csv] [--rows 200]
+        [--models fixture|real] [--trait-counts 3,6,12] [--output report.json]
+
+MNLI scores are the reference. The report gives, for the `embedding` scorer,
+how often the top trait matches, per-trait Pearson correlation and mean
+absolute difference of the scores, per-row rank agreement, and the
+rows/second of both scorers. The scaling section times both scorers as the
+number of traits grows, using extra labels after the configured traits.
+Feedback comes from `--csv` (an export with an interview_feedback column) or
+from the synthetic generator used by pipeline_benchmark.py.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import register_fixture_models, synthetic_feedback_csv  # noqa: E402
+
+EXTRA_TRAITS = [
+    "Leadership", "Problem Solving", "Teamwork", "Adaptability", "Ownership", "Curiosity",
+    "Collaboration", "Attention to Detail", "Coachability",
+]
+
+
+def score_matrix(outputs, labels):
+    """(rows x labels) scores from zero-shot-shaped outputs, in `labels` order"""
+    return np.array([[dict(zip(out["labels"], out["scores"]))[label] for label in labels] for out in outputs])
+
+
+def rank_agreement(a, b):
+    """Mean per-row Spearman correlation between two score matrices"""
+    ranks_a = a.argsort(axis=1).argsort(axis=1).astype(np.float64)
+    ranks_b = b.argsort(axis=1).argsort(axis=1).astype(np.float64)
+    values = []
+    for x, y in zip(ranks_a, ranks_b):
+        if x.std() and y.std():
+            values.append(float(np.corrcoef(x, y)[0, 1]))
+    return round(float(np.mean(values)), 3) if values else None
+
+
+def timed(scorer, texts, labels, batch_size):
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        outputs.extend(scorer(texts[i:i + batch_size], labels))
+    return outputs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", help="Feedback CSV with an interview_feedback column")
+    parser.add_argument("--rows", type=int, default=200, help="Rows to score (synthetic rows when no --csv)")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--models", choices=("fixture", "real"), default="fixture")
+    parser.add_argument("--trait-counts", default="3,6,12", help="Trait counts for the scaling section")
+    parser.add_argument("--scaling-rows", type=int, default=32, help="Rows scored per trait count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    from model_registry import registry
+    if args.models == "fixture":
+        register_fixture_models(registry)
+    from interview_analyzer import traits
+    from trait_scoring import prototype_scorer
+
+    if args.csv:
+        frame = pd.read_csv(args.csv, nrows=args.rows)
+    else:
+        frame = pd.read_csv(io.BytesIO(synthetic_feedback_csv(args.rows, seed=args.seed)))
+    texts = [text for text in frame["interview_feedback"].fillna("").astype(str).str.strip() if text]
+
+    def mnli(batch, labels):
+        return registry.get("classifier")(batch, candidate_labels=labels, batch_size=len(batch))
+
+    def embedding(batch, labels):
+        return prototype_scorer(batch, candidate_labels=labels)
+
+    # Load both models before timing anything
+    mnli(texts[:1], traits)
+    embedding(texts[:1], traits)
+
+    real_stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        reference, mnli_seconds = timed(mnli, texts, traits, args.batch_size)
+        candidate, embedding_seconds = timed(embedding, texts, traits, args.batch_size)
+
+        scaling = []
+        sample = texts[:args.scaling_rows]
+        for count in (int(value) for value in args.trait_counts.split(",")):
+            labels = (traits + EXTRA_TRAITS)[:count]
+            _, mnli_time = timed(mnli, sample, labels, args.batch_size)
+            _, embedding_time = timed(embedding, sample, labels, args.batch_size)
+            scaling.append({
+                "traits": len(labels),
+                "mnli_ms_per_row": round(mnli_time * 1000 / len(sample), 2),
+                "embedding_ms_per_row": round(embedding_time * 1000 / len(sample), 2),
+            })
+    finally:
+        sys.stdout = real_stdout
+
+    a, b = score_matrix(reference, traits), score_matrix(candidate, traits)
+    per_trait = {}
+    for j, trait in enumerate(traits):
+        pearson = np.corrcoef(a[:, j], b[:, j])[0, 1] if a[:, j].std() and b[:, j].std() else float("nan")
+        per_trait[trait] = {
+            "pearson": None if np.isnan(pearson) else round(float(pearson), 3),
+            "mean_abs_diff": round(float(np.abs(a[:, j] - b[:, j]).mean()), 4),
+        }
+
+    report = {
+        "models": args.models,
+        "rows": len(texts),
+        "traits": traits,
+        "mnli": {"seconds": round(mnli_seconds, 3), "rows_per_second": round(len(texts) / mnli_seconds, 2)},
+        "embedding": {"seconds": round(embedding_seconds, 3),
+                      "rows_per_second": round(len(texts) / embedding_seconds, 2)},
+        "speedup": round(mnli_seconds / embedding_seconds, 2),
+        "agreement": {
+            "top_trait": round(float((a.argmax(axis=1) == b.argmax(axis=1)).mean()), 3),
+            "rank_spearman": rank_agreement(a, b),
+            "per_trait": per_trait,
+        },
+        "scaling": scaling,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
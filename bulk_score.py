@@ -0,0 +1,412 @@
+"""Offline bulk scoring for nightly re-ranking, without the Flask services.
+
+    python bulk_score.py resumes --resumes ./resumes --active-jobs --output out/
+    python bulk_score.py resumes --resumes ./resumes --jd backend.txt --jd data.txt --output out/
+    python bulk_score.py interviews --job-ids-file open_jobs.txt --save --output out/
+
+`resumes` scores every resume in a directory (recursively) against each job
+description: job_postings rows by id or every active posting, or local text
+files named by job id. `interviews` analyzes the interview feedback file of
+each listed job, and with `--save` also upserts the rows to Supabase.
+
+Work is split into shards (`--shard-size` resumes, or one job) and run in
+worker processes that each load one copy of the models. Workers default to
+one per core, capped by available memory / `--worker-memory`. Each finished
+shard is written to `<output>/parts/` as JSONL or Parquet and recorded in
+`<output>/checkpoint.json`, so re-running the same command after a crash
+skips completed shards. When all shards are done the parts are merged into
+`<output>/scores.<format>` (resumes, ranked per job) or
+`<output>/feedback.<format>` (interviews).
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(ROOT, 'backend')
+sys.path.insert(0, BACKEND)
+
+log = logging.getLogger("bulk_score")
+
+RESUME_SUFFIXES = ('.pdf', '.docx', '.doc', '.txt')
+
+# Resident memory of one worker with its models loaded, in MB, when --worker-memory is not given
+WORKER_MEMORY_MB = {'resumes': 1024, 'interviews': 4096}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    sub = parser.add_subparsers(dest='workload', required=True)
+
+    def common(command, jobs_required):
+        command.add_argument('--output', required=True, help="directory for parts, checkpoint and merged results")
+        command.add_argument('--format', choices=('jsonl', 'parquet'), default='jsonl')
+        command.add_argument('--workers', type=int, default=int(os.getenv('BULK_WORKERS', '0')),
+                             help="worker processes (BULK_WORKERS, default: one per core within --worker-memory)")
+        command.add_argument('--worker-memory', type=int, default=int(os.getenv('BULK_WORKER_MEMORY_MB', '0')),
+                             help="MB one worker needs with its models loaded (BULK_WORKER_MEMORY_MB)")
+        command.add_argument('--restart', action='store_true', help="discard an existing checkpoint and its parts")
+        command.add_argument('--no-merge', action='store_true', help="leave the results as per-shard parts")
+        job_ids = command.add_mutually_exclusive_group(required=jobs_required)
+        job_ids.add_argument('--job-ids', nargs='+', default=[], help="job_postings ids")
+        job_ids.add_argument('--job-ids-file', help="file with one job id per line")
+        return job_ids
+
+    resumes = sub.add_parser('resumes', help="rank a directory of resumes against job descriptions")
+    jobs = common(resumes, jobs_required=False)
+    jobs.add_argument('--active-jobs', action='store_true', help="every job_postings row with status 'active'")
+    jobs.add_argument('--jd', action='append', default=[], help="local job description file (job id = file name)")
+    resumes.add_argument('--resumes', required=True, help="directory of .pdf/.docx/.txt resumes")
+    resumes.add_argument('--shard-size', type=int, default=int(os.getenv('BULK_SHARD_SIZE', '256')),
+                         help="resumes per shard (BULK_SHARD_SIZE)")
+    resumes.add_argument('--batch-size', type=int, default=int(os.getenv('ENCODE_BATCH_SIZE', '32')))
+    resumes.add_argument('--top', type=int, help="keep only the best N resumes per job in the merged output")
+
+    interviews = sub.add_parser('interviews', help="analyze the interview feedback file of each job")
+    common(interviews, jobs_required=True)
+    interviews.add_argument('--trait-scorer', choices=('mnli', 'embedding'))
+    interviews.add_argument('--summary-tier', choices=('quality', 'fast'))
+    interviews.add_argument('--save', action='store_true', help="also upsert rows to processed_interview_feedback")
+
+    args = parser.parse_args()
+    if args.workload == 'resumes' and not (args.job_ids or args.job_ids_file or args.active_jobs or args.jd):
+        parser.error("resumes needs --job-ids, --job-ids-file, --active-jobs or --jd")
+    return args
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, or free physical pages where that is missing"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (ValueError, OSError):
+        return None
+
+
+def worker_count(requested, per_worker_mb, shards):
+    """Workers to start: requested or one per core, no more than memory allows or there are shards"""
+    cpus = os.cpu_count() or 1
+    workers = requested or cpus
+    memory = available_memory_mb()
+    if memory is not None:
+        workers = min(workers, max(1, memory // per_worker_mb))
+    return max(1, min(workers, shards))
+
+
+# ---- inputs ------------------------------------------------------------------------------
+
+def list_resumes(directory):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if name.lower().endswith(RESUME_SUFFIXES):
+                paths.append(os.path.relpath(os.path.join(root, name), directory))
+    return paths
+
+
+def load_jobs(args):
+    """{job_id: job description text} from local files or job_postings"""
+    jobs = {}
+    for path in args.jd:
+        with open(path) as f:
+            jobs[os.path.splitext(os.path.basename(path))[0]] = f.read()
+
+    job_ids = args.job_ids or (read_lines(args.job_ids_file) if args.job_ids_file else [])
+    if job_ids or args.active_jobs:
+        from supabase_client import eq, get_client, in_
+        client = get_client()
+        columns = 'id,title,description,requirements'
+        if args.active_jobs:
+            rows = client.select_all('job_postings', columns, {'status': eq('active')})
+        else:
+            rows = []
+            for start in range(0, len(job_ids), 100):
+                rows.extend(client.select_all('job_postings', columns, {'id': in_(job_ids[start:start + 100])}))
+            missing = set(job_ids) - {str(row['id']) for row in rows}
+            if missing:
+                log.warning(f"{len(missing)} job ids not found in job_postings: {sorted(missing)[:10]}")
+        for row in rows:
+            parts = [row.get('title'), row.get('description'), row.get('requirements')]
+            jobs[str(row['id'])] = "\n".join(part for part in parts if part)
+    return jobs
+
+
+def plan_shards(args):
+    """(shards, signature): {shard_id: task arguments} and what the checkpoint must match"""
+    if args.workload == 'resumes':
+        paths = list_resumes(args.resumes)
+        jobs = load_jobs(args)
+        if not paths or not jobs:
+            raise SystemExit(f"Nothing to score: {len(paths)} resumes, {len(jobs)} jobs")
+        files = []
+        for path in paths:
+            stat = os.stat(os.path.join(args.resumes, path))
+            files.append([path, stat.st_size, stat.st_mtime_ns])
+        shards = {
+            f"{i // args.shard_size:05d}": paths[i:i + args.shard_size]
+            for i in range(0, len(paths), args.shard_size)
+        }
+        signature = {
+            'files': files,
+            'jobs': {job_id: hashlib.sha256(text.encode('utf-8')).hexdigest() for job_id, text in jobs.items()},
+            'shard_size': args.shard_size,
+        }
+        tasks = {
+            shard_id: (shard_paths, os.path.abspath(args.resumes), jobs, args.batch_size)
+            for shard_id, shard_paths in shards.items()
+        }
+    else:
+        job_ids = list(dict.fromkeys(args.job_ids or read_lines(args.job_ids_file)))
+        signature = {'jobs': job_ids, 'trait_scorer': args.trait_scorer, 'summary_tier': args.summary_tier,
+                     'save': args.save}
+        tasks = {
+            f"job-{i:05d}": (job_id, args.trait_scorer, args.summary_tier, args.save)
+            for i, job_id in enumerate(job_ids)
+        }
+    signature.update({'workload': args.workload, 'format': args.format})
+    return tasks, hashlib.sha256(json.dumps(signature, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+# ---- output ------------------------------------------------------------------------------
+
+def _parquet():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError("--format parquet requires pyarrow to be installed")
+
+
+def write_rows(path, rows, fmt):
+    """Write a list of dicts or a DataFrame atomically, so a file on disk is always complete"""
+    import pandas as pd
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    tmp_path = path + ".tmp"
+    if fmt == 'parquet':
+        _parquet()
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        with open(tmp_path, 'w') as f:
+            for start in range(0, len(frame), 10000):
+                for record in frame.iloc[start:start + 10000].to_dict('records'):
+                    f.write(json.dumps(record, default=str) + "\n")
+    os.replace(tmp_path, path)
+
+
+def read_rows(path, fmt):
+    import pandas as pd
+    if fmt == 'parquet':
+        _parquet()
+        return pd.read_parquet(path)
+    return pd.read_json(path, lines=True, dtype=False)
+
+
+class Checkpoint:
+    """Completed shards of one run, saved after every shard so a restart can skip them"""
+
+    def __init__(self, directory, signature, restart=False):
+        self.path = os.path.join(directory, 'checkpoint.json')
+        self.parts = os.path.join(directory, 'parts')
+        self.signature = signature
+        self.shards = {}
+        if os.path.exists(self.path) and not restart:
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved.get('signature') != signature:
+                raise SystemExit(f"{self.path} is from a run with different inputs; "
+                                 f"use --restart or another --output")
+            self.shards = saved['shards']
+        elif restart:
+            shutil.rmtree(self.parts, ignore_errors=True)
+        os.makedirs(self.parts, exist_ok=True)
+
+    def done(self, shard_id):
+        entry = self.shards.get(shard_id)
+        return entry is not None and os.path.exists(os.path.join(self.parts, entry['part']))
+
+    def record(self, shard_id, entry):
+        self.shards[shard_id] = entry
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'signature': self.signature, 'shards': self.shards}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+# ---- workers -----------------------------------------------------------------------------
+
+def init_worker(torch_threads):
+    """Process start-up: thread caps before torch is imported, then logging"""
+    os.environ['TORCH_THREADS'] = str(torch_threads)
+    os.environ.setdefault('OMP_NUM_THREADS', str(torch_threads))
+    os.environ.setdefault('MKL_NUM_THREADS', str(torch_threads))
+    # Shards already run in parallel; one extraction process per worker is enough
+    os.environ.setdefault('EXTRACT_WORKERS', '1')
+    import serving
+    from telemetry import configure_logging
+    configure_logging()
+    serving.configure_torch_threads()
+
+
+def score_resume_shard(part_path, fmt, paths, directory, jobs, batch_size):
+    """Embed one shard of resumes and score it against every job; returns the checkpoint entry"""
+    import resume_matcher_backend as matcher
+    from sklearn.metrics.pairwise import cosine_similarity
+    from uploads import check_uploads
+
+    # Files are opened, not read: the matcher reads them back in bounded batches
+    with contextlib.ExitStack() as stack:
+        files = [(path, stack.enter_context(open(os.path.join(directory, path), 'rb'))) for path in paths]
+        uploads, rejected = check_uploads(files)
+        filenames, _, _, embeddings, skipped, _ = matcher.embed_resumes(uploads, batch_size, {})
+    skipped = rejected + skipped
+
+    rows = []
+    if filenames:
+        for job_id, jd_text in jobs.items():
+            similarities = cosine_similarity(matcher.embed_jd(jd_text), embeddings)[0]
+            rows.extend(
+                {'job_id': job_id, 'filename': filename, 'match_percent': round(float(score) * 100, 2)}
+                for filename, score in zip(filenames, similarities)
+            )
+    write_rows(part_path, rows, fmt)
+    return {'rows': len(rows), 'resumes': len(filenames), 'skipped': skipped}
+
+
+_analyzer = None
+
+
+def analyze_job_shard(part_path, fmt, job_id, trait_scorer, summary_tier, save):
+    """Analyze one job's feedback file; returns the checkpoint entry"""
+    global _analyzer
+    from datetime import datetime
+
+    import pandas as pd
+    from interview_analyzer import InterviewAnalyzer
+
+    if _analyzer is None:
+        _analyzer = InterviewAnalyzer()
+    file_details = _analyzer.get_interview_feedback_file(job_id)
+    if not file_details:
+        write_rows(part_path, [], fmt)
+        return {'rows': 0, 'error': 'Could not find interview feedback file'}
+
+    rows = []
+    writer = _analyzer.feedback_writer() if save else None
+    try:
+        now = datetime.now().isoformat()
+        for chunk_results in _analyzer.iter_processed_chunks(file_details, trait_scorer=trait_scorer,
+                                                             summary_tier=summary_tier):
+            rows.extend(_analyzer.to_record(result, job_id, file_details, now) for result in chunk_results)
+            if writer is not None and chunk_results:
+                _analyzer.save_processed_results(pd.DataFrame(chunk_results), job_id, file_details, writer=writer)
+    finally:
+        outcome = writer.close() if writer is not None else None
+    if outcome and outcome['failed_records']:
+        # Not recorded as done, so the next run retries the job
+        raise RuntimeError(f"Failed to save {outcome['failed_records']} records: {outcome['errors']}")
+    write_rows(part_path, rows, fmt)
+    return {'rows': len(rows), 'saved': outcome['saved'] if outcome else 0}
+
+
+def run_shard(workload, part_path, fmt, task):
+    start = time.perf_counter()
+    if workload == 'resumes':
+        entry = score_resume_shard(part_path, fmt, *task)
+    else:
+        entry = analyze_job_shard(part_path, fmt, *task)
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+# ---- merge -------------------------------------------------------------------------------
+
+def merge(args, checkpoint, shard_ids):
+    """Combine the parts into one file; resume scores are ranked within each job"""
+    import pandas as pd
+    frames = [
+        read_rows(os.path.join(checkpoint.parts, checkpoint.shards[shard_id]['part']), args.format)
+        for shard_id in shard_ids if checkpoint.shards[shard_id]['rows']
+    ]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if args.workload == 'resumes' and len(frame):
+        frame = frame.sort_values(['job_id', 'match_percent'], ascending=[True, False], kind='stable')
+        frame['rank'] = frame.groupby('job_id').cumcount() + 1
+        if args.top:
+            frame = frame[frame['rank'] <= args.top]
+    path = os.path.join(args.output, f"{'scores' if args.workload == 'resumes' else 'feedback'}.{args.format}")
+    write_rows(path, frame, args.format)
+    return path, len(frame)
+
+
+def main():
+    args = parse_args()
+    from telemetry import configure_logging
+    configure_logging()
+    if args.format == 'parquet':
+        _parquet()
+
+    tasks, signature = plan_shards(args)
+    os.makedirs(args.output, exist_ok=True)
+    checkpoint = Checkpoint(args.output, signature, restart=args.restart)
+    pending = [shard_id for shard_id in tasks if not checkpoint.done(shard_id)]
+    log.info(f"{len(tasks)} shards, {len(tasks) - len(pending)} already done")
+
+    failed = {}
+    if pending:
+        per_worker = args.worker_memory or WORKER_MEMORY_MB[args.workload]
+        workers = worker_count(args.workers, per_worker, len(pending))
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        log.info(f"Running {len(pending)} shards on {workers} workers ({torch_threads} torch threads each)")
+
+        # Spawned, not forked: each worker loads its own models and torch thread pools
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker, initargs=(torch_threads,)
+        ) as pool:
+            futures = {}
+            for shard_id in pending:
+                part = f"part-{shard_id}.{args.format}"
+                future = pool.submit(run_shard, args.workload, os.path.join(checkpoint.parts, part), args.format,
+                                     tasks[shard_id])
+                futures[future] = (shard_id, part)
+            for future in concurrent.futures.as_completed(futures):
+                shard_id, part = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    log.error(f"Shard {shard_id} failed: {str(e)}")
+                    failed[shard_id] = str(e)
+                    continue
+                checkpoint.record(shard_id, {'part': part, **entry})
+                log.info(f"Shard {shard_id} done: {entry['rows']} rows in {entry['seconds']}s "
+                         f"({len(checkpoint.shards)}/{len(tasks)})")
+
+    if failed:
+        log.error(f"{len(failed)} shards failed; re-run the same command to retry them")
+        sys.exit(1)
+    if not args.no_merge:
+        path, rows = merge(args, checkpoint, list(tasks))
+        log.info(f"Wrote {rows} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
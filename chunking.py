@@ -0,0 +1,41 @@
+import numpy as np
+
+POOLING_METHODS = ("max", "mean", "topk_mean")
+
+
+def chunk_text(text, tokenizer, window, overlap):
+    """Split text into overlapping windows of at most `window` word pieces.
+
+    Returns [(start_char, end_char), ...] spans into `text`. Spans come from the
+    tokenizer's offset mapping, so each chunk re-tokenizes to roughly `window` pieces.
+    """
+    offsets = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        verbose=False
+    )["offset_mapping"]
+    if not offsets:
+        return [(0, len(text))] if text.strip() else []
+
+    step = max(1, window - overlap)
+    spans = []
+    for start in range(0, len(offsets), step):
+        end = min(start + window, len(offsets))
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+        if end == len(offsets):
+            break
+    return spans
+
+
+def pool_scores(scores, method="max", k=3):
+    """Aggregate one resume's chunk similarities into a single score"""
+    if method == "max":
+        return float(np.max(scores))
+    if method == "mean":
+        return float(np.mean(scores))
+    if method == "topk_mean":
+        k = min(k, len(scores))
+        return float(np.mean(np.partition(scores, len(scores) - k)[-k:]))
+    raise ValueError(f"Unknown pooling method: {method}")
@@ -0,0 +1,178 @@
+"""Text fingerprints for spotting resumes that were uploaded more than once.
+
+Each document gets an exact digest of its whitespace- and case-normalized
+text and a 64-bit SimHash over word 3-shingles. Copies with small edits (a new
+phone number, a reordered line, a different export of the same file) land
+within a few bits of each other, so two documents count as near-duplicates
+when their SimHashes differ in at most `max_distance` bits.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+
+import numpy as np
+
+from file_lock import FileLock
+from lexical_index import tokenize
+from local_db import LocalDB
+
+log = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+
+_BITS = np.arange(64, dtype=np.uint64)
+_SHINGLE_MULTIPLIERS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9], dtype=np.uint64
+)[:SHINGLE_SIZE]
+
+
+def _mix(values):
+    """splitmix64 finalizer, so shingle hashes have independent-looking bits"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def simhash(text):
+    tokens = tokenize(text)
+    if not tokens:
+        return 0
+    # Hash each distinct token once; shingle hashes are then combined with array arithmetic
+    vocabulary = {
+        token: int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        for token in set(tokens)
+    }
+    ids = np.array([vocabulary[token] for token in tokens], dtype=np.uint64)
+    if len(ids) >= SHINGLE_SIZE:
+        hashes = np.zeros(len(ids) - SHINGLE_SIZE + 1, dtype=np.uint64)
+        for offset, multiplier in enumerate(_SHINGLE_MULTIPLIERS):
+            hashes ^= ids[offset:len(ids) - SHINGLE_SIZE + 1 + offset] * multiplier
+    else:
+        hashes = ids
+    # Each distinct shingle votes once, so boilerplate repeated on every line does not dominate
+    hashes = np.unique(_mix(hashes))
+    bits = (hashes[:, np.newaxis] >> _BITS) & np.uint64(1)
+    votes = 2 * bits.sum(axis=0, dtype=np.int64) - len(hashes)
+    return int(sum(1 << int(bit) for bit in np.flatnonzero(votes > 0)))
+
+
+def fingerprint(text):
+    """(digest, simhash) for a document's text"""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest(), simhash(text)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SimHashIndex:
+    """Finds stored fingerprints that match a query exactly or within `max_distance` bits.
+
+    The 64 bits are split into max_distance + 1 bands. Two hashes that differ
+    in at most max_distance bits agree on at least one whole band, so only
+    entries sharing a band with the query are compared.
+    """
+
+    def __init__(self, max_distance=6):
+        self.max_distance = max_distance
+        width = math.ceil(64 / (max_distance + 1))
+        self._bands = [(start, (1 << min(width, 64 - start)) - 1) for start in range(0, 64, width)]
+        self._tables = [{} for _ in self._bands]
+        self._digests = {}  # digest -> item
+        self._hashes = {}  # item -> simhash
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, item):
+        return item in self._hashes
+
+    def add(self, item, fingerprint):
+        digest, value = fingerprint
+        self._digests.setdefault(digest, item)
+        self._hashes[item] = value
+        for table, (start, mask) in zip(self._tables, self._bands):
+            table.setdefault((value >> start) & mask, []).append(item)
+
+    def match(self, fingerprint):
+        """(item, "exact" | "near") for the closest stored fingerprint, or None"""
+        digest, value = fingerprint
+        if digest in self._digests:
+            return self._digests[digest], "exact"
+        best = None
+        for table, (start, mask) in zip(self._tables, self._bands):
+            for item in table.get((value >> start) & mask, ()):
+                distance = hamming(value, self._hashes[item])
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, item)
+        return None if best is None else (best[1], "near")
+
+
+class FingerprintStore:
+    """Fingerprints of extracted uploads keyed by file hash.
+
+    Uploads served from the embedding cache skip text extraction, so their
+    fingerprints are kept here to still match them against other uploads.
+    Stored as an LRU-capped table in `fingerprints.sqlite3`, shared between
+    server processes with a flock like the embedding cache index.
+    """
+
+    def __init__(self, directory, capacity=50000):
+        self.capacity = capacity
+        os.makedirs(directory, exist_ok=True)
+        self._lock = FileLock(os.path.join(directory, "lock"))
+        self._db = LocalDB(os.path.join(directory, "fingerprints.sqlite3"))
+        with self._lock:
+            # SimHashes are unsigned 64-bit, wider than an SQLite integer, so they are kept as text
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints "
+                "(key TEXT PRIMARY KEY, digest TEXT NOT NULL, simhash TEXT NOT NULL, added INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS fingerprints_added ON fingerprints (added)")
+            self._import_legacy(os.path.join(directory, "fingerprints.json"))
+
+    def _import_legacy(self, path):
+        """Move entries from the `fingerprints.json` written by earlier versions into the table"""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"Discarding unreadable fingerprint store: {str(e)}")
+            entries = []
+        self._put({key: (digest, value) for key, digest, value in entries})
+        os.remove(path)
+
+    def get_many(self, keys):
+        """Return {key: (digest, simhash)} for the keys that have been fingerprinted"""
+        with self._lock:
+            rows = self._db.execute_in(
+                "SELECT key, digest, simhash FROM fingerprints WHERE key IN ({})", dict.fromkeys(keys)
+            )
+        return {key: (digest, int(value)) for key, digest, value in rows}
+
+    def put_many(self, fingerprints):
+        """Store {key: (digest, simhash)}, dropping the least recently added entries when full"""
+        with self._lock:
+            self._put(fingerprints)
+
+    def _put(self, fingerprints):
+        with self._db.transaction():
+            added = self._db.execute("SELECT COALESCE(MAX(added), 0) FROM fingerprints").fetchone()[0]
+            self._db.executemany(
+                "INSERT OR REPLACE INTO fingerprints (key, digest, simhash, added) VALUES (?, ?, ?, ?)",
+                [(key, digest, str(value), added + i)
+                 for i, (key, (digest, value)) in enumerate(fingerprints.items(), 1)],
+            )
+            excess = self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0] - self.capacity
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM fingerprints WHERE key IN (SELECT key FROM fingerprints ORDER BY added LIMIT ?)",
+                    (excess,),
+                )
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from file_lock import FileLock
+from local_db import LocalDB
+
+log = logging.getLogger(__name__)
+
+
+def file_key(file_bytes):
+    """Cache key for an uploaded document, derived from its raw bytes"""
+    return "file:" + hashlib.sha256(file_bytes).hexdigest()
+
+
+def text_key(text):
+    """Cache key for free text such as a job description, ignoring whitespace differences"""
+    normalized = " ".join(text.split())
+    return "text:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent LRU cache of float32 embeddings stored as a memory-mapped .npy matrix.
+
+    Each model gets its own directory holding `embeddings.npy` (capacity x dim)
+    and `index.sqlite3`, whose `slots` table maps cache keys to matrix rows with
+    a last-used counter for LRU eviction. Several server processes may share a
+    directory: each operation holds a flock and reads or updates only the rows
+    for the keys involved, so a write never rewrites or reloads the whole map.
+    """
+
+    def __init__(self, directory, model_name, dim, capacity=50000):
+        self.model_name = model_name
+        self.dim = dim
+        self.capacity = capacity
+        self.directory = os.path.join(directory, model_name.replace("/", "__"))
+        self.matrix_path = os.path.join(self.directory, "embeddings.npy")
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = FileLock(os.path.join(self.directory, "lock"))
+        self._db = LocalDB(os.path.join(self.directory, "index.sqlite3"))
+        self._matrix = None
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS slots (key TEXT PRIMARY KEY, slot INTEGER NOT NULL UNIQUE, used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS slots_used ON slots (used)")
+        settings = json.dumps({"model_name": self.model_name, "dim": self.dim, "capacity": self.capacity})
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'settings'").fetchone()
+        if row and row[0] == settings and os.path.exists(self.matrix_path):
+            self._matrix = np.load(self.matrix_path, mmap_mode="r+")
+            return
+        legacy_index = os.path.join(self.directory, "index.json")
+        if os.path.exists(legacy_index):
+            # The JSON slot map of earlier versions; its rows are simply recomputed
+            os.remove(legacy_index)
+        self._matrix = np.lib.format.open_memmap(
+            self.matrix_path, mode="w+", dtype=np.float32, shape=(self.capacity, self.dim)
+        )
+        with self._db.transaction():
+            self._db.execute("DELETE FROM slots")
+            self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('settings', ?)", (settings,))
+
+    def _clock(self):
+        return self._db.execute("SELECT COALESCE(MAX(used), 0) + 1 FROM slots").fetchone()[0]
+
+    def get_many(self, keys):
+        """Return {key: embedding} for the keys that are cached, marking them recently used"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            slots = dict(self._db.execute_in("SELECT key, slot FROM slots WHERE key IN ({})", keys))
+            for key, slot in slots.items():
+                found[key] = np.array(self._matrix[slot])
+            if slots:
+                with self._db.transaction():
+                    self._db.execute_in("UPDATE slots SET used = ? WHERE key IN ({})", list(slots), (self._clock(),))
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, keys, embeddings):
+        """Store embeddings under keys, evicting least recently used rows when full"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock, self._db.transaction():
+            clock = self._clock()
+            # Later keys of one call count as more recent, so a batch never evicts its own rows
+            for clock, (key, embedding) in enumerate(zip(keys, embeddings), clock):
+                row = self._db.execute("SELECT slot FROM slots WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    slot = row[0]
+                    self._db.execute("UPDATE slots SET used = ? WHERE key = ?", (clock, key))
+                else:
+                    # Occupied slots are always 0..n-1: a slot is only freed to be reused at once
+                    slot = self._db.execute("SELECT COALESCE(MAX(slot), -1) + 1 FROM slots").fetchone()[0]
+                    if slot >= self.capacity:
+                        evicted, slot = self._db.execute(
+                            "SELECT key, slot FROM slots ORDER BY used LIMIT 1"
+                        ).fetchone()
+                        self._db.execute("DELETE FROM slots WHERE key = ?", (evicted,))
+                        self.evictions += 1
+                    self._db.execute("INSERT INTO slots (key, slot, used) VALUES (?, ?, ?)", (key, slot, clock))
+                self._matrix[slot] = embedding
+            self._matrix.flush()
+
+    def stats(self):
+        """Hit/miss counters for this process and occupancy of the shared cache"""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "entries": entries,
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,35 @@
+import fcntl
+import os
+import threading
+
+
+class FileLock:
+    """Reentrant lock held across threads (by a mutex) and processes (by flock on `path`).
+
+    A forked child shares its parent's open file description, and with it the
+    flock, so the lock file is reopened the first time each process uses it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mutex = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+
+    def __enter__(self):
+        self._mutex.acquire()
+        if self._depth == 0:
+            if self._pid != os.getpid():
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                self._pid = os.getpid()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mutex.release()
+
@@ -0,0 +1,69 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Keeps skill spellings such as c++, c#, node.js and ci/cd in one token
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./][a-z0-9+#]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be been by for from has have in into is it its of on or our that the their this to
+was we were will with you your they them he she his her who which what when where while than then
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory BM25 (Okapi) index over a list of documents.
+
+    Built per request for the lexical prefilter: an inverted index from term
+    to (document, term frequency) postings, so scoring a query only touches
+    documents that contain one of its terms.
+    """
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        postings = defaultdict(lambda: ([], []))
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for doc_id, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            lengths[doc_id] = sum(counts.values())
+            for term, count in counts.items():
+                docs, tfs = postings[term]
+                docs.append(doc_id)
+                tfs.append(count)
+        self.postings = {
+            term: (np.array(docs, dtype=np.int64), np.array(tfs, dtype=np.float32))
+            for term, (docs, tfs) in postings.items()
+        }
+        average = float(lengths.mean()) if self.size and lengths.mean() > 0 else 1.0
+        self._norms = k1 * (1 - b + b * lengths / average)
+
+    def idf(self, term):
+        df = len(self.postings[term][0]) if term in self.postings else 0
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def scores(self, query_weights):
+        """BM25 score of every document for {term: weight}"""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term, weight in query_weights.items():
+            if term not in self.postings:
+                continue
+            docs, tfs = self.postings[term]
+            scores[docs] += weight * self.idf(term) * tfs * (self.k1 + 1) / (tfs + self._norms[docs])
+        return scores
+
+
+def query_weights(text, skills=(), skill_boost=2.0):
+    """{term: weight} for a job description, with skill terms weighted up by `skill_boost`"""
+    weights = {term: 1.0 for term in tokenize(text)}
+    for skill in skills:
+        for term in tokenize(skill):
+            weights[term] = max(weights.get(term, 0.0), skill_boost)
+    return weights
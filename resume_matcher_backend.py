@@ -1,32 +1,574 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from sentence_transformers import SentenceTransformer
+from werkzeug.exceptions import RequestEntityTooLarge
 from sklearn.metrics.pairwise import cosine_similarity
-import pdfplumber
-import docx
-import io
+import numpy as np
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from chunking import POOLING_METHODS, chunk_text, pool_scores
+from dedup import FingerprintStore, SimHashIndex, fingerprint
+from embedding_cache import EmbeddingCache, file_key, text_key
+from text_extraction import ExtractionPool
+from model_registry import INFERENCE_BACKEND, SENTENCE_ENCODER_MODEL, registry
+from inference_scheduler import MicroBatcher
+from lexical_index import BM25Index, query_weights
+from uploads import (UPLOAD_MAX_FILES, UPLOAD_MAX_REQUEST_BYTES, SpoolingRequest, check_uploads,
+                     detach_uploads, upload_batches)
+from vector_index import CandidateIndex, top_k
+from telemetry import configure_logging, instrument_app, metrics, observe_stages, span
+
+configure_logging()
 
 app = Flask(__name__)
-CORS(app)  # Allow CORS from all origins
+# Uploads are spooled to disk past a size threshold; oversized requests fail with 413 before parsing.
+# Each file may come with a form field (candidate_ids), hence two parts per file
+app.request_class = SpoolingRequest
+app.config["MAX_CONTENT_LENGTH"] = UPLOAD_MAX_REQUEST_BYTES
+app.config["MAX_FORM_PARTS"] = 2 * UPLOAD_MAX_FILES + 100
+CORS(app, expose_headers=["Server-Timing", "X-Skipped-Resumes", "X-Duplicate-Resumes"])  # Allow CORS from all origins
+instrument_app(app)
+
+RESUME_DOCUMENTS = metrics.counter(
+    "resume_documents_total", "Uploaded resumes by outcome (extracted, cache_hit, skipped, rejected)", ("outcome",)
+)
+ENCODED_TEXTS = metrics.counter("encoder_texts_total", "Texts (resumes, chunks, JDs) run through the encoder")
+ENCODED_TOKENS = metrics.counter("encoder_tokens_total", "Tokens run through the encoder, after truncation")
+# Counting tokens means tokenizing every text a second time, outside the encoder, so it is opt-in
+COUNT_ENCODER_TOKENS = os.getenv('COUNT_ENCODER_TOKENS', '0') == '1'
+
+# Load model; resolved at startup because the cache and index are sized from its embedding dimension
+# Quantized/ONNX embeddings drift slightly from fp32, so each backend keeps its own cache entries
+MODEL_NAME = SENTENCE_ENCODER_MODEL if INFERENCE_BACKEND == "torch" else f"{SENTENCE_ENCODER_MODEL}-{INFERENCE_BACKEND}"
+model = registry.get("sentence_encoder")
+
+# Number of resumes per forward pass; tune for the host's core count and memory
+ENCODE_BATCH_SIZE = int(os.getenv('ENCODE_BATCH_SIZE', '32'))
+
+# Chunked mode: word pieces per window (room left for [CLS]/[SEP]) and overlap between windows
+CHUNK_WINDOW = int(os.getenv('CHUNK_WINDOW', str(model.max_seq_length - 2)))
+CHUNK_OVERLAP = int(os.getenv('CHUNK_OVERLAP', '32'))
+
+# Lexical prefilter: only the top-M BM25 hits are embedded (0 scores every resume), and the
+# final score blends in this much of the normalized BM25 score (0 ranks by cosine only)
+LEXICAL_PREFILTER_TOP = int(os.getenv('LEXICAL_PREFILTER_TOP', '0'))
+LEXICAL_WEIGHT = float(os.getenv('LEXICAL_WEIGHT', '0'))
+
+# Embeddings keyed by file/JD content hash, so repeat screenings skip extraction and inference
+embedding_cache = EmbeddingCache(
+    os.getenv('EMBEDDING_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.embedding_cache')),
+    MODEL_NAME,
+    model.get_sentence_embedding_dimension(),
+    capacity=int(os.getenv('EMBEDDING_CACHE_SIZE', '50000'))
+)
+
+# Uploads whose text SimHashes differ in at most this many of 64 bits count as the same resume
+SIMHASH_DISTANCE = int(os.getenv('SIMHASH_DISTANCE', '6'))
+
+# Text fingerprints by file hash, for uploads whose embedding is cached and so are not re-extracted
+fingerprint_store = FingerprintStore(
+    os.getenv('FINGERPRINT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.fingerprints')),
+    capacity=int(os.getenv('EMBEDDING_CACHE_SIZE', '50000'))
+)
+
+# PDF/DOCX parsing fans out over worker processes with per-file timeouts and page caps
+extraction_pool = ExtractionPool()
+
+# Persistent pool of ingested candidates, searchable by JD without re-uploading resumes
+candidate_index = CandidateIndex(
+    os.getenv('CANDIDATE_INDEX_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.candidate_index')),
+    model.get_sentence_embedding_dimension(),
+    approximate=os.getenv('CANDIDATE_INDEX_MODE', 'flat') == 'ivf',
+    nprobe=int(os.getenv('CANDIDATE_INDEX_NPROBE', '8'))
+)
+
+metrics.callback("embedding_cache_hits_total", "Embedding cache hits", lambda: embedding_cache.stats()["hits"], "counter")
+metrics.callback("embedding_cache_misses_total", "Embedding cache misses", lambda: embedding_cache.stats()["misses"], "counter")
+metrics.callback("embedding_cache_evictions_total", "Embedding cache evictions",
+                 lambda: embedding_cache.stats()["evictions"], "counter")
+metrics.callback("embedding_cache_entries", "Embeddings held in the cache", lambda: embedding_cache.stats()["entries"])
+metrics.callback("candidate_index_size", "Candidates in the persistent index", lambda: len(candidate_index))
+
+def count_tokens(texts):
+    """Tokens the encoder will see for each text, capped at its max sequence length"""
+    with span("tokenize"):
+        encoded = model.tokenizer(texts, truncation=True, max_length=model.max_seq_length)
+    return sum(len(ids) for ids in encoded["input_ids"])
+
+def encode_batch(texts, batch_size=ENCODE_BATCH_SIZE):
+    """Embed texts in length-sorted batches so each batch pads to similar lengths"""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    sorted_embeddings = model.encode(
+        [texts[i] for i in order],
+        batch_size=batch_size,
+        convert_to_numpy=True
+    )
+    embeddings = np.empty_like(sorted_embeddings)
+    embeddings[order] = sorted_embeddings
+    return embeddings
+
+# Small encode calls from concurrent requests (JDs, searches, single uploads) share forward passes
+encoder_batches = MicroBatcher("sentence_encoder", encode_batch, max_batch=ENCODE_BATCH_SIZE)
+
+def encode_texts(texts, batch_size=ENCODE_BATCH_SIZE):
+    """Embed texts through the cross-request scheduler"""
+    ENCODED_TEXTS.inc(len(texts))
+    if COUNT_ENCODER_TOKENS:
+        ENCODED_TOKENS.inc(count_tokens(texts))
+    return encoder_batches.submit(texts, batch_size=batch_size)
+
+def embed_jd(jd_text):
+    """Embedding for a job description, served from the cache when the text was seen before"""
+    jd_key = text_key(jd_text)
+    cached = embedding_cache.get_many([jd_key])
+    if jd_key in cached:
+        return cached[jd_key][np.newaxis, :]
+    jd_embedding = encode_texts([jd_text])
+    embedding_cache.put_many([jd_key], jd_embedding)
+    return jd_embedding
+
+def read_uploads(resumes):
+    """Check uploaded files before any parsing; returns (uploads, rejected).
+
+    `uploads` are (filename, stream) pairs, read a batch at a time by the scoring
+    functions; `rejected` lists oversized and non-text files with the reason.
+    """
+    uploads, rejected = check_uploads([(resume.filename, resume.stream) for resume in resumes])
+    for item in rejected:
+        app.logger.warning(f"Rejected upload {item['filename']}: {item['reason']}")
+    RESUME_DOCUMENTS.inc(len(rejected), outcome="rejected")
+    return uploads, rejected
+
+def add_timings(timings, batch_timings):
+    """Accumulate one batch's stage durations into the request's"""
+    for stage, seconds in batch_timings.items():
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+def extract_resumes(resumes, timings, skip_cached=True):
+    """Extract text for (filename, bytes) uploads whose embedding is not cached.
+
+    Returns (filenames, keys, positions, texts, cached, skipped): `positions` are
+    the indices in `resumes` of the uploads that could be read, `texts` maps cache
+    key to extracted text, `cached` maps key to embedding for cache hits (empty
+    when `skip_cached` is False), and `skipped` lists unreadable files with the reason.
+    """
+    start = time.perf_counter()
+    filenames = [filename for filename, _ in resumes]
+    uploads = [file_bytes for _, file_bytes in resumes]
+    keys = [file_key(file_bytes) for file_bytes in uploads]
+
+    cached = embedding_cache.get_many(keys) if skip_cached else {}
+    to_extract = {}  # cache key -> (filename, bytes), one entry per distinct uncached file
+    for filename, key, file_bytes in zip(filenames, keys, uploads):
+        if key not in cached and key not in to_extract:
+            app.logger.debug(f"Processing resume: {filename.lower()}")
+            to_extract[key] = (filename, file_bytes)
+
+    texts = {}
+    failed = {}  # cache key -> reason the file could not be scored
+    extracted = extraction_pool.extract_many(list(to_extract.values()))
+    for (key, (filename, _)), (text, error) in zip(to_extract.items(), extracted):
+        if error is not None:
+            app.logger.error(f"TEXT EXTRACTION FAILED for {filename}: {error}")
+            failed[key] = f"Failed to extract text: {error}"
+        elif not text.strip():
+            failed[key] = "No text extracted"
+        else:
+            texts[key] = text
+    del uploads, to_extract
+
+    skipped = [
+        {"filename": filename, "reason": failed[key]}
+        for filename, key in zip(filenames, keys) if key in failed
+    ]
+    positions = [i for i, key in enumerate(keys) if key not in failed]
+    filenames = [filenames[i] for i in positions]
+    keys = [keys[i] for i in positions]
+    timings["extract"] = time.perf_counter() - start
+    RESUME_DOCUMENTS.inc(len(texts), outcome="extracted")
+    RESUME_DOCUMENTS.inc(sum(1 for key in keys if key in cached), outcome="cache_hit")
+    RESUME_DOCUMENTS.inc(len(skipped), outcome="skipped")
+
+    return filenames, keys, positions, texts, cached, skipped
+
+def find_duplicates(keys, texts, seen=None):
+    """Fingerprint uploads and match them against each other and the candidate index.
+
+    `texts` maps key to extracted text; keys without text (embedding cache hits)
+    use their stored fingerprint. Returns {key: {"key": earlier key, "match": ...}}
+    for uploads that repeat an earlier one in `keys`, and for the rest
+    {key: {"candidate_id": ..., "match": ...}} where the candidate index already
+    holds the same resume, with the indexed "vector" when the match is exact.
+    `match` is "exact" or "near". Passing
+    the same `seen` index for every batch of a request also matches uploads
+    against earlier batches.
+    """
+    unique_keys = list(dict.fromkeys(keys))
+    fingerprints = fingerprint_store.get_many([key for key in unique_keys if key not in texts])
+    extracted = {key: fingerprint(texts[key]) for key in unique_keys if key in texts}
+    if extracted:
+        fingerprint_store.put_many(extracted)
+    fingerprints.update(extracted)
+
+    duplicates = {}
+    distinct = []
+    seen = SimHashIndex(SIMHASH_DISTANCE) if seen is None else seen
+    for key in unique_keys:
+        if key not in fingerprints or key in seen:
+            continue
+        found = seen.match(fingerprints[key])
+        if found:
+            duplicates[key] = {"key": found[0], "match": found[1]}
+        else:
+            seen.add(key, fingerprints[key])
+            distinct.append(key)
+
+    matches = candidate_index.match_fingerprints([fingerprints[key] for key in distinct], SIMHASH_DISTANCE)
+    for key, found in zip(distinct, matches):
+        if found:
+            entry, vector, match = found
+            duplicates[key] = {"candidate_id": entry["candidate_id"], "match": match}
+            # A near match is a different text (e.g. an edited resume), so its vector is not reused
+            if match == "exact":
+                duplicates[key]["vector"] = vector
+    return duplicates
+
+def embed_extracted(keys, texts, cached, batch_size, duplicates, borrow_indexed=True):
+    """Fill `cached` with an embedding for every key; returns how many texts were encoded.
+
+    Uploads whose text exactly repeats an earlier upload take its embedding, and
+    with `borrow_indexed` those exactly matching an indexed resume take the
+    indexed vector. Near duplicates are encoded like any other resume. Only
+    embeddings encoded from a key's own text are written to the embedding
+    cache; borrowed ones are used for this request alone.
+    """
+    borrowed = {}
+    for key in keys:
+        found = duplicates.get(key, {})
+        if key not in cached and borrow_indexed and "vector" in found:
+            borrowed[key] = found["vector"]
+    missing = {
+        key: texts[key] for key in keys
+        if key not in cached and key not in borrowed
+        and not ("key" in duplicates.get(key, {}) and duplicates[key]["match"] == "exact")
+    }
+    if missing:
+        encoded = encode_texts(list(missing.values()), batch_size=batch_size)
+        embedding_cache.put_many(list(missing), encoded)
+        cached.update(zip(missing, encoded))
+    cached.update(borrowed)
+    for key in keys:
+        if key not in cached:
+            cached[key] = cached[duplicates[key]["key"]]
+    return len(missing)
+
+def collapse_duplicates(filenames, keys, duplicates):
+    """Positions of the first upload of each distinct resume, and its copies.
+
+    Returns (representatives, copies) where copies maps a representative's
+    position to [{"filename": ..., "match": ...}] for the uploads it stands for.
+    """
+    first = {}  # representative key -> position
+    representatives, copies = [], {}
+    for i, key in enumerate(keys):
+        original = duplicates.get(key, {}).get("key", key)
+        if original not in first:
+            first[original] = i
+            representatives.append(i)
+        else:
+            match = duplicates[key]["match"] if key in duplicates and "key" in duplicates[key] else "exact"
+            copies.setdefault(first[original], []).append({"filename": filenames[i], "match": match})
+    return representatives, copies
+
+def duplicate_report(filenames, copies):
+    """[{"filename", "duplicate_of", "match"}] for every upload collapsed into another"""
+    return [
+        {"filename": copy["filename"], "duplicate_of": filenames[i], "match": copy["match"]}
+        for i, group in copies.items() for copy in group
+    ]
+
+def ranked_item(item, position, keys, duplicates, copies):
+    """Add the uploads a ranked resume stands for, and its indexed candidate, to a result"""
+    if position in copies:
+        item["duplicates"] = copies[position]
+    if "candidate_id" in duplicates.get(keys[position], {}):
+        item["indexed_as"] = duplicates[keys[position]]["candidate_id"]
+    return item
+
+def embed_resumes(uploads, batch_size, timings, dedupe=True, borrow_indexed=True, seen=None):
+    """Extract and embed (filename, stream) uploads a batch at a time, reusing cached embeddings.
+
+    Each batch's file bytes and text are dropped once it is embedded, so only
+    embeddings accumulate across the request. Returns (filenames, keys,
+    positions, embeddings, skipped, duplicates) for the resumes that could be
+    read, with `positions` their indices in `uploads`; `skipped` lists the
+    others with the reason and `duplicates` is as from
+    find_duplicates (empty when `dedupe` is False). `borrow_indexed` is as for
+    embed_extracted, and `seen` as for find_duplicates, to match uploads
+    against those of earlier calls. Fills in extract/dedupe/encode timings.
+    """
+    filenames, keys, positions, skipped = [], [], [], []
+    cached, duplicates = {}, {}
+    seen = SimHashIndex(SIMHASH_DISTANCE) if seen is None else seen
+    encoded = 0
+    offset = 0
+    for batch in upload_batches(uploads):
+        batch_timings = {}
+        batch_filenames, batch_keys, batch_positions, texts, batch_cached, batch_skipped = extract_resumes(
+            batch, batch_timings
+        )
+        positions.extend(offset + i for i in batch_positions)
+        offset += len(batch)
+        del batch
+        cached.update(batch_cached)
+
+        if dedupe and batch_keys:
+            start = time.perf_counter()
+            duplicates.update(find_duplicates(batch_keys, texts, seen))
+            batch_timings["dedupe"] = time.perf_counter() - start
+
+        # One batched encode for the batch's uncached, distinct resumes
+        start = time.perf_counter()
+        encoded += embed_extracted(list(dict.fromkeys(batch_keys)), texts, cached, batch_size, duplicates,
+                                   borrow_indexed)
+        batch_timings["encode"] = time.perf_counter() - start
+        add_timings(timings, batch_timings)
+        filenames.extend(batch_filenames)
+        keys.extend(batch_keys)
+        skipped.extend(batch_skipped)
+
+    if keys:
+        embeddings = np.stack([cached[key] for key in keys])
+    else:
+        embeddings = np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    app.logger.info(f"Embedded {len(keys)} resumes ({encoded} encoded, {len(skipped)} skipped)")
+
+    return filenames, keys, positions, embeddings, skipped, duplicates
+
+def embed_chunks(texts, batch_size, timings):
+    """Split each text into overlapping token windows and embed every chunk in one pass.
+
+    Returns (spans, owners, embeddings): `spans[i]` is the (start, end) character
+    range of chunk i inside `texts[owners[i]]`. Chunk embeddings are cached by content.
+    """
+    start = time.perf_counter()
+    spans = []
+    owners = []
+    for owner, text in enumerate(texts):
+        for span in chunk_text(text, model.tokenizer, CHUNK_WINDOW, CHUNK_OVERLAP):
+            spans.append(span)
+            owners.append(owner)
+    chunk_texts = [texts[owner][s:e] for owner, (s, e) in zip(owners, spans)]
+    chunk_keys = [text_key(chunk) for chunk in chunk_texts]
+    timings["chunk"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = embedding_cache.get_many(chunk_keys)
+    missing = {key: chunk for key, chunk in zip(chunk_keys, chunk_texts) if key not in cached}
+    if missing:
+        new_embeddings = encode_texts(list(missing.values()), batch_size=batch_size)
+        embedding_cache.put_many(list(missing.keys()), new_embeddings)
+        cached.update(zip(missing.keys(), new_embeddings))
+    embeddings = np.stack([cached[key] for key in chunk_keys])
+    timings["encode"] = time.perf_counter() - start
+    app.logger.info(f"Embedded {len(chunk_keys)} chunks from {len(texts)} resumes ({len(missing)} encoded)")
+
+    return spans, np.array(owners), embeddings
+
+def server_timing(timings):
+    """Format stage durations (seconds) as a Server-Timing header value"""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+def score_chunked(uploads, jd_text, top_n, batch_size, pooling, timings):
+    """Rank resumes by pooled chunk similarity; returns (top_scores, skipped).
+
+    Uploads are extracted, chunked and scored a batch at a time; only each
+    resume's pooled score and best chunk outlive its batch. `top_scores` is
+    None when no resume could be read.
+    """
+    filenames, keys, skipped = [], [], []
+    pooled = {}  # key -> (pooled score, best chunk)
+    jd_embedding = None
+    for batch in upload_batches(uploads):
+        batch_timings = {}
+        batch_filenames, batch_keys, _, texts, _, batch_skipped = extract_resumes(
+            batch, batch_timings, skip_cached=False
+        )
+        del batch
+        new_keys = [key for key in dict.fromkeys(batch_keys) if key not in pooled]
+        if new_keys:
+            spans, owners, embeddings = embed_chunks([texts[key] for key in new_keys], batch_size, batch_timings)
+            if jd_embedding is None:
+                start = time.perf_counter()
+                jd_embedding = embed_jd(jd_text)
+                batch_timings["encode"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            similarities = cosine_similarity(jd_embedding, embeddings)[0]
+            for owner, key in enumerate(new_keys):
+                chunk_ids = np.flatnonzero(owners == owner)
+                best = chunk_ids[np.argmax(similarities[chunk_ids])]
+                span_start, span_end = spans[best]
+                pooled[key] = (pool_scores(similarities[chunk_ids], pooling), {
+                    "start": int(span_start),
+                    "end": int(span_end),
+                    "match_percent": round(float(similarities[best]) * 100, 2),
+                    "text": texts[key][span_start:span_end]
+                })
+            batch_timings["score"] = time.perf_counter() - start
+        add_timings(timings, batch_timings)
+        filenames.extend(batch_filenames)
+        keys.extend(batch_keys)
+        skipped.extend(batch_skipped)
+    if not keys:
+        return None, skipped
+
+    start = time.perf_counter()
+    scores = np.array([pooled[key][0] for key in keys])
+    top_scores = [
+        {
+            "filename": filenames[i],
+            "match_percent": round(float(scores[i]) * 100, 2),
+            "best_chunk": pooled[keys[i]][1]
+        }
+        for i in top_k(scores, top_n)
+    ]
+    timings["score"] += time.perf_counter() - start
+    return top_scores, skipped
 
-# Load model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+def lexical_prefilter(filenames, keys, texts, jd_text, prefilter_top, skills=(), candidate_skills=None):
+    """BM25 scores for every resume and the positions of the top `prefilter_top` hits.
 
-def extract_text_from_pdf(file_stream):
-    text = ""
-    with pdfplumber.open(file_stream) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-    return text
+    Job skills are weighted up in the query; a resume's candidate skills
+    (filename -> list) are indexed with its text.
+    """
+    candidate_skills = candidate_skills or {}
+    documents = [
+        " ".join([texts[key]] + list(candidate_skills.get(filename, ())))
+        for filename, key in zip(filenames, keys)
+    ]
+    lexical = BM25Index(documents).scores(query_weights(jd_text, skills))
+    return lexical, top_k(lexical, prefilter_top)
 
-def extract_text_from_docx(file_stream):
-    doc = docx.Document(file_stream)
-    return "\n".join([para.text for para in doc.paragraphs])
+def score_whole(uploads, jd_text, top_n, batch_size, dedupe, timings):
+    """Rank resumes by whole-text similarity; returns (top_scores, skipped, duplicates).
+
+    With `dedupe`, copies of a resume are ranked once, under its first upload,
+    and `duplicates` lists them. `top_scores` is None when no resume could be read.
+    """
+    filenames, keys, _, embeddings, skipped, duplicates = embed_resumes(uploads, batch_size, timings, dedupe)
+    if not keys:
+        return None, skipped, []
+
+    start = time.perf_counter()
+    jd_embedding = embed_jd(jd_text)
+    timings["encode"] += time.perf_counter() - start
+
+    # A single vectorized similarity against the JD, then top-n selection over distinct resumes
+    start = time.perf_counter()
+    similarities = cosine_similarity(jd_embedding, embeddings)[0]
+    if dedupe:
+        representatives, copies = collapse_duplicates(filenames, keys, duplicates)
+    else:
+        representatives, copies = list(range(len(keys))), {}
+    top_scores = []
+    for i in top_k(similarities[representatives], top_n):
+        position = representatives[i]
+        top_scores.append(ranked_item({
+            "filename": filenames[position],
+            "match_percent": round(float(similarities[position]) * 100, 2)
+        }, position, keys, duplicates, copies))
+    timings["score"] = time.perf_counter() - start
+    return top_scores, skipped, duplicate_report(filenames, copies)
+
+def score_prefiltered(uploads, jd_text, top_n, batch_size, prefilter_top, lexical_weight, skills,
+                      candidate_skills, dedupe, timings):
+    """Rank resumes by embedding only the top lexical hits; returns (top_scores, skipped, duplicates).
+
+    Every resume is extracted and scored with BM25, the best `prefilter_top`
+    distinct resumes go to the encoder, and the final score is `lexical_weight`
+    of the BM25 score (normalized by the best hit) plus the rest of the cosine
+    similarity. Uploads are extracted a batch at a time and only their text is
+    kept for the lexical index. `top_scores` is None when no resume could be read.
+    """
+    filenames, keys, skipped = [], [], []
+    texts, duplicates = {}, {}
+    seen = SimHashIndex(SIMHASH_DISTANCE)
+    for batch in upload_batches(uploads):
+        batch_timings = {}
+        batch_filenames, batch_keys, _, batch_texts, _, batch_skipped = extract_resumes(
+            batch, batch_timings, skip_cached=False
+        )
+        del batch
+        if dedupe and batch_keys:
+            start = time.perf_counter()
+            duplicates.update(find_duplicates(batch_keys, batch_texts, seen))
+            batch_timings["dedupe"] = time.perf_counter() - start
+        add_timings(timings, batch_timings)
+        texts.update(batch_texts)
+        filenames.extend(batch_filenames)
+        keys.extend(batch_keys)
+        skipped.extend(batch_skipped)
+    if not keys:
+        return None, skipped, []
+
+    representatives, copies = list(range(len(keys))), {}
+    if dedupe:
+        representatives, copies = collapse_duplicates(filenames, keys, duplicates)
+
+    start = time.perf_counter()
+    lexical, picks = lexical_prefilter(
+        [filenames[i] for i in representatives], [keys[i] for i in representatives], texts,
+        jd_text, prefilter_top, skills, candidate_skills
+    )
+    shortlist = [representatives[i] for i in picks]
+    timings["prefilter"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shortlist_keys = [keys[i] for i in shortlist]
+    cached = embedding_cache.get_many(shortlist_keys)
+    encoded = embed_extracted(list(dict.fromkeys(shortlist_keys)), texts, cached, batch_size, duplicates)
+    embeddings = np.stack([cached[key] for key in shortlist_keys])
+    jd_embedding = embed_jd(jd_text)
+    timings["encode"] = time.perf_counter() - start
+    app.logger.info(f"Prefiltered {len(representatives)} resumes to {len(shortlist)} ({encoded} encoded)")
+
+    start = time.perf_counter()
+    similarities = cosine_similarity(jd_embedding, embeddings)[0]
+    best = float(lexical.max())
+    normalized = lexical[picks] / best if best > 0 else np.zeros(len(picks), dtype=np.float32)
+    scores = (1 - lexical_weight) * similarities + lexical_weight * normalized
+    top_scores = [
+        ranked_item({
+            "filename": filenames[shortlist[i]],
+            "match_percent": round(float(scores[i]) * 100, 2),
+            "semantic_percent": round(float(similarities[i]) * 100, 2),
+            "lexical_percent": round(float(normalized[i]) * 100, 2)
+        }, shortlist[i], keys, duplicates, copies)
+        for i in top_k(scores, top_n)
+    ]
+    timings["score"] = time.perf_counter() - start
+    return top_scores, skipped, duplicate_report(filenames, copies)
+
+def form_skills(name):
+    """Skill names from a repeated or comma-separated form field"""
+    return [skill.strip() for value in request.form.getlist(name) for skill in value.split(",") if skill.strip()]
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({
+        "error": "Upload too large",
+        "details": f"Requests are limited to {UPLOAD_MAX_REQUEST_BYTES // (1024 * 1024)} MB and {UPLOAD_MAX_FILES} files"
+    }), 413
 
 @app.route('/analyze', methods=['POST'])
 def analyze_resumes():
     try:
-        print("[INFO] Request received")
+        app.logger.debug("Request received")
 
         jd_text = request.form.get("jd")
         n = request.form.get("n")
@@ -39,51 +581,327 @@ def analyze_resumes():
         if len(request.files.getlist('resumes')) == 0:
             return jsonify({"error": "No valid resumes uploaded"}), 400
 
-        print(f"[INFO] JD length: {len(jd_text)}")
-        jd_embedding = model.encode([jd_text])
+        n_batch = request.form.get("batch_size")
+        batch_size = int(n_batch) if n_batch else ENCODE_BATCH_SIZE
 
-        resumes = request.files.getlist("resumes")
+        app.logger.debug(f"JD length: {len(jd_text)}")
+
+        # "whole" embeds each resume as one (truncated) sequence; "chunked" scores overlapping windows
+        mode = request.form.get("mode", "whole")
+        pooling = request.form.get("pooling", "max")
+        if mode not in ("whole", "chunked"):
+            return jsonify({"error": f"Invalid mode: {mode}"}), 400
+        if pooling not in POOLING_METHODS:
+            return jsonify({"error": f"Invalid pooling: {pooling}"}), 400
+
+        # Optional lexical first stage (whole mode): prefilter=M keeps the top M BM25 hits,
+        # skills are the job's skills (job_skills), candidate_skills a JSON {filename: [skills]}
+        prefilter = request.form.get("prefilter")
+        try:
+            prefilter_top = int(prefilter) if prefilter else LEXICAL_PREFILTER_TOP
+        except ValueError:
+            prefilter_top = -1
+        if prefilter_top < 0:
+            return jsonify({"error": "prefilter must be a non-negative number of resumes"}), 400
+        lexical_weight = request.form.get("lexical_weight")
+        try:
+            lexical_weight = float(lexical_weight) if lexical_weight else LEXICAL_WEIGHT
+        except ValueError:
+            lexical_weight = -1.0
+        # NaN fails the range check as well
+        if not 0 <= lexical_weight <= 1:
+            return jsonify({"error": "lexical_weight must be a number between 0 and 1"}), 400
+        try:
+            candidate_skills = json.loads(request.form.get("candidate_skills") or "{}")
+        except ValueError:
+            candidate_skills = None
+        if not isinstance(candidate_skills, dict):
+            return jsonify({"error": "candidate_skills must be a JSON object mapping filenames to skill lists"}), 400
+
+        # Whole mode ranks each distinct resume once; dedupe=false returns every upload
+        dedupe = request.form.get("dedupe", "true").lower() != "false"
+
+        timings = {}
+        duplicates = []
+        uploads, rejected = read_uploads(request.files.getlist("resumes"))
+        if mode == "chunked":
+            top_scores, skipped = score_chunked(uploads, jd_text, top_n, batch_size, pooling, timings)
+        elif prefilter_top or lexical_weight:
+            top_scores, skipped, duplicates = score_prefiltered(
+                uploads, jd_text, top_n, batch_size, prefilter_top or len(uploads), lexical_weight,
+                form_skills("skills"), candidate_skills, dedupe, timings
+            )
+        else:
+            top_scores, skipped, duplicates = score_whole(uploads, jd_text, top_n, batch_size, dedupe, timings)
+        skipped = rejected + skipped
+        if top_scores is None:
+            return jsonify({"error": "No text could be extracted from the uploaded resumes", "skipped": skipped}), 400
+
+        app.logger.debug(f"Scores being returned: {top_scores}")
+        app.logger.info(f"Stage timings ({mode}): {timings}")
+        observe_stages(timings)
+
+        response = jsonify(top_scores)
+        response.headers["Server-Timing"] = server_timing(timings)
+        if skipped:
+            response.headers["X-Skipped-Resumes"] = json.dumps(skipped)
+        if duplicates:
+            response.headers["X-Duplicate-Resumes"] = json.dumps(duplicates)
+        return response
+
+    except RequestEntityTooLarge as e:
+        return upload_too_large(e)
+    except Exception as e:
+        app.logger.error(f"INTERNAL SERVER ERROR DETAILS: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_resumes_stream():
+    """NDJSON variant of /analyze: one line per resume as soon as it is scored, then a ranked summary.
+
+    Lines are {"type": "result", ...}, {"type": "skipped", ...}, and finally
+    {"type": "summary", "results": [...top n...], "skipped": [...], "duplicates": [...],
+    "timings": {...}}. In whole mode a copy of a resume streamed earlier in the request
+    is not scored again: it gets a {"type": "duplicate", "filename", "duplicate_of",
+    "match"} line instead, and is listed under its original in the summary.
+    """
+    jd_text = request.form.get("jd")
+    n = request.form.get("n") or request.form.get("top_n")
+    top_n = int(n) if n else 5
+    n_batch = request.form.get("batch_size")
+    batch_size = int(n_batch) if n_batch else ENCODE_BATCH_SIZE
+    mode = request.form.get("mode", "whole")
+    pooling = request.form.get("pooling", "max")
+    dedupe = request.form.get("dedupe", "true").lower() != "false"
+
+    if not jd_text:
+        return jsonify({"error": "Job description is required"}), 400
+    if not request.files.getlist("resumes"):
+        return jsonify({"error": "No resumes uploaded"}), 400
+    if mode not in ("whole", "chunked"):
+        return jsonify({"error": f"Invalid mode: {mode}"}), 400
+    if pooling not in POOLING_METHODS:
+        return jsonify({"error": f"Invalid pooling: {pooling}"}), 400
+
+    # Flask closes request files once the view returns, so the uploads are taken over here,
+    # read a batch at a time while streaming and closed when the generator finishes
+    files = detach_uploads(request.files.getlist("resumes"))
+    resumes, rejected = read_uploads(files)
+
+    def line(event):
+        return json.dumps(event) + "\n"
+
+    def generate():
+        timings = {}
         scores = []
+        skipped = list(rejected)
+        # Fingerprints of every resume streamed so far, and the result each distinct one was scored as
+        seen = SimHashIndex(SIMHASH_DISTANCE)
+        first = {}
+        copies = []
+        try:
+            for item in rejected:
+                yield line({"type": "skipped", **item})
+            jd_embedding = embed_jd(jd_text)
+            # Start with a single resume so the first result arrives after one document,
+            # then double the batch up to batch_size to get back to batched throughput
+            start, size = 0, 1
+            while start < len(resumes):
+                batch = resumes[start:start + size]
+                start += size
+                size = min(size * 2, batch_size)
 
-        for resume in resumes:
-            filename = resume.filename.lower()
-            print(f"[INFO] Processing resume: {filename}")
-            file_bytes = resume.read()
-
-            text = ""
-            try:
-                if filename.endswith('.pdf'):
-                    text = extract_text_from_pdf(io.BytesIO(file_bytes))
-                elif filename.endswith('.docx'):
-                    text = extract_text_from_docx(io.BytesIO(file_bytes))
-                elif filename.endswith('.doc'):
-                    text = ""  # Skip .doc for now
+                batch_timings = {}
+                if mode == "chunked":
+                    batch_scores, batch_skipped = score_chunked(
+                        batch, jd_text, len(batch), batch_size, pooling, batch_timings
+                    )
+                    batch_scores = batch_scores or []
+                    batch_copies = []
                 else:
-                    text = file_bytes.decode('utf-8', errors='ignore')
-            except Exception as e:
-                app.logger.error(f"TEXT EXTRACTION FAILED for {resume.filename}: {str(e)}", exc_info=True)
-                return jsonify({"error": f"Failed to extract text from {resume.filename}: {str(e)}"}), 500
-
-            if not text.strip():
-                return jsonify({"error": f"No text extracted from {resume.filename}"}), 400
-
-            embedding = model.encode([text])
-            similarity = cosine_similarity(jd_embedding, embedding)[0][0]
-            match_percent = float(round(similarity * 100, 2))
-            scores.append({
-                "filename": resume.filename,
-                "match_percent": match_percent
+                    filenames, keys, _, embeddings, batch_skipped, duplicates = embed_resumes(
+                        batch, batch_size, batch_timings, dedupe, seen=seen
+                    )
+                    score_start = time.perf_counter()
+                    similarities = cosine_similarity(jd_embedding, embeddings)[0] if filenames else []
+                    batch_scores, batch_copies = [], []
+                    for filename, key, similarity in zip(filenames, keys, similarities):
+                        found = duplicates.get(key, {})
+                        original = found.get("key", key)
+                        if dedupe and original in first:
+                            match = found["match"] if "key" in found else "exact"
+                            first[original].setdefault("duplicates", []).append({"filename": filename, "match": match})
+                            batch_copies.append({"filename": filename, "duplicate_of": first[original]["filename"],
+                                                 "match": match})
+                            continue
+                        item = {"filename": filename, "match_percent": round(float(similarity) * 100, 2)}
+                        if "candidate_id" in found:
+                            item["indexed_as"] = found["candidate_id"]
+                        first[original] = item
+                        batch_scores.append(item)
+                    batch_timings["score"] = time.perf_counter() - score_start
+                add_timings(timings, batch_timings)
+
+                for item in batch_skipped:
+                    yield line({"type": "skipped", **item})
+                for item in batch_scores:
+                    yield line({"type": "result", **item})
+                for item in batch_copies:
+                    yield line({"type": "duplicate", **item})
+                copies.extend(batch_copies)
+                scores.extend(batch_scores)
+                skipped.extend(batch_skipped)
+
+            ranked = [scores[i] for i in top_k(np.array([item["match_percent"] for item in scores]), top_n)]
+            app.logger.info(f"Stage timings ({mode}, streamed): {timings}")
+            observe_stages(timings)
+            yield line({
+                "type": "summary",
+                "results": ranked,
+                "skipped": skipped,
+                "duplicates": copies,
+                "timings": {stage: round(seconds * 1000, 1) for stage, seconds in timings.items()}
             })
 
-        sorted_scores = sorted(scores, key=lambda x: x["match_percent"], reverse=True)
-        print("[INFO] Completed analysis. Returning top results.")
-        app.logger.info(f"Scores being returned: {sorted_scores[:top_n]}")
+        except Exception as e:
+            app.logger.error(f"STREAMING ANALYSIS FAILED: {str(e)}", exc_info=True)
+            yield line({"type": "error", "error": "Internal server error", "details": str(e)})
+        finally:
+            for resume in files:
+                resume.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
-        return jsonify(sorted_scores[:top_n])
+@app.route('/index/resumes', methods=['POST'])
+def index_resumes():
+    """Embed uploaded resumes once and add them to the persistent candidate index"""
+    try:
+        resumes = request.files.getlist("resumes")
+        if not resumes:
+            return jsonify({"error": "No resumes uploaded"}), 400
 
+        # Optional candidate_ids, one per resume in upload order; without them a resume is
+        # indexed under its content hash, since filenames need not be unique across candidates
+        candidate_ids = request.form.getlist("candidate_ids")
+        if candidate_ids and len(candidate_ids) != len(resumes):
+            return jsonify({"error": "candidate_ids must have one entry per resume"}), 400
+        if len(set(candidate_ids)) != len(candidate_ids):
+            return jsonify({"error": "candidate_ids must be unique"}), 400
+        uploads, rejected = read_uploads(resumes)
+        if candidate_ids:
+            # Accepted uploads keep their stream and their order, so ids follow them by position
+            accepted = {id(stream) for _, stream in uploads}
+            candidate_ids = [candidate_id for resume, candidate_id in zip(resumes, candidate_ids)
+                             if id(resume.stream) in accepted]
+
+        n_batch = request.form.get("batch_size")
+        batch_size = int(n_batch) if n_batch else ENCODE_BATCH_SIZE
+
+        timings = {}
+        # Always the resume's own embedding: an indexed vector may be stale for a re-ingested candidate_id
+        filenames, keys, positions, embeddings, skipped, duplicates = embed_resumes(
+            uploads, batch_size, timings, borrow_indexed=False
+        )
+        skipped = rejected + skipped
+
+        # A resume already indexed, or uploaded earlier in this request, under another
+        # candidate_id is reported instead of indexed again
+        start = time.perf_counter()
+        fingerprints = fingerprint_store.get_many(keys)
+        entries, vectors, repeated = [], [], []
+        indexed_as = {}  # key -> candidate_id the resume is indexed under
+        for filename, key, position, embedding in zip(filenames, keys, positions, embeddings):
+            candidate_id = candidate_ids[position] if candidate_ids else key
+            if indexed_as.get(key) == candidate_id:
+                continue
+            found = duplicates.get(key, {})
+            original = indexed_as.get(found.get("key", key), found.get("candidate_id"))
+            if original is not None and original != candidate_id:
+                repeated.append({"filename": filename, "candidate_id": candidate_id, "duplicate_of": original,
+                                 "match": found.get("match", "exact")})
+                indexed_as[key] = original
+                continue
+            indexed_as[key] = candidate_id
+            entry = {"candidate_id": candidate_id, "filename": filename, "key": key}
+            if key in fingerprints:
+                entry["digest"], entry["simhash"] = fingerprints[key]
+            entries.append(entry)
+            vectors.append(embedding)
+        size = candidate_index.add(entries, np.stack(vectors)) if entries else len(candidate_index)
+        timings["index"] = time.perf_counter() - start
+        observe_stages(timings)
+
+        response = jsonify({"indexed": len(entries), "skipped": skipped, "duplicates": repeated, "index_size": size})
+        response.headers["Server-Timing"] = server_timing(timings)
+        return response
+
+    except RequestEntityTooLarge as e:
+        return upload_too_large(e)
     except Exception as e:
-        app.logger.error(f"INTERNAL SERVER ERROR DETAILS: {str(e)}", exc_info=True)
+        app.logger.error(f"INDEXING FAILED: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+@app.route('/index/search', methods=['POST'])
+def search_index():
+    """Return the top-k indexed candidates for a job description"""
+    try:
+        params = request.get_json(silent=True) or request.form
+        jd_text = params.get("jd")
+        if not jd_text:
+            return jsonify({"error": "Job description is required"}), 400
+        k = params.get("k")
+        try:
+            # k=0 is a valid (empty) request, only a missing k falls back to the default
+            k = 5 if k is None or k == "" else int(k)
+        except (TypeError, ValueError):
+            k = -1
+        if k < 0:
+            return jsonify({"error": "k must be a non-negative number of candidates"}), 400
+        exact = str(params.get("exact", "false")).lower() == "true"
+        nprobe = params.get("nprobe")
+        try:
+            nprobe = None if nprobe is None or nprobe == "" else int(nprobe)
+        except (TypeError, ValueError):
+            nprobe = 0
+        if nprobe is not None and nprobe < 1:
+            return jsonify({"error": "nprobe must be a positive number of clusters"}), 400
+
+        timings = {}
+        start = time.perf_counter()
+        jd_embedding = embed_jd(jd_text)
+        timings["encode"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [
+            {
+                "candidate_id": entry["candidate_id"],
+                "filename": entry["filename"],
+                "match_percent": round(score * 100, 2)
+            }
+            for entry, score in candidate_index.search(jd_embedding, k, exact=exact, nprobe=nprobe)
+        ]
+        timings["search"] = time.perf_counter() - start
+        observe_stages(timings)
+
+        response = jsonify(results)
+        response.headers["Server-Timing"] = server_timing(timings)
+        return response
+
+    except Exception as e:
+        app.logger.error(f"INDEX SEARCH FAILED: {str(e)}", exc_info=True)
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+
+@app.route('/index/stats', methods=['GET'])
+def index_stats():
+    return jsonify(candidate_index.stats())
+
+@app.route('/models', methods=['GET'])
+def model_stats():
+    return jsonify(registry.stats())
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify(embedding_cache.stats())
+
 if __name__ == "__main__":
     app.run(debug=True, port=5002)
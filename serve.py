@@ -0,0 +1,89 @@
+"""Production entry point for the Flask services.
+
+    python serve.py resume-matcher --workers 4
+    python serve.py interview --workers 2 --torch-threads 2
+
+The app module is imported once in a gunicorn master, which loads the model
+weights; workers are then forked and share those pages copy-on-write instead
+of each loading its own copy. Every worker serves `--threads` concurrent
+requests (streaming responses hold a thread for their whole duration), while
+forward passes are bounded per worker and run with `--torch-threads` intra-op
+threads, so workers x torch threads should not exceed the host's cores.
+"""
+import argparse
+import gc
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(ROOT, 'backend')
+
+# service -> (module, default port, models to load in the master unless the module lists SERVING_MODELS)
+SERVICES = {
+    'resume-matcher': ('resume_matcher_backend', 5002, ['sentence_encoder']),
+    'interview': ('app', 5000, ['summarizer', 'classifier']),
+}
+
+
+def parse_args():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('service', choices=sorted(SERVICES))
+    parser.add_argument('--bind', help="host:port (default 0.0.0.0:<service port>)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_WORKERS', str(cpus))),
+                        help="worker processes (WEB_WORKERS, default: one per core)")
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '4')),
+                        help="request threads per worker (WEB_THREADS)")
+    parser.add_argument('--torch-threads', type=int, default=int(os.getenv('TORCH_THREADS', '0')),
+                        help="intra-op threads per worker (TORCH_THREADS, default: cores / workers)")
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('WEB_TIMEOUT', '120')),
+                        help="seconds before an unresponsive worker is restarted (WEB_TIMEOUT)")
+    parser.add_argument('--no-preload', action='store_true',
+                        help="load models in each worker instead of once in the master")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    module_name, port, model_names = SERVICES[args.service]
+    torch_threads = args.torch_threads or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Read by serving.py and, for the OpenMP/MKL pools, by torch at import
+    os.environ['WEB_WORKERS'] = str(args.workers)
+    os.environ['TORCH_THREADS'] = str(torch_threads)
+    os.environ.setdefault('OMP_NUM_THREADS', str(torch_threads))
+    os.environ.setdefault('MKL_NUM_THREADS', str(torch_threads))
+    if not args.no_preload:
+        os.environ['PRELOAD_MASTER'] = '1'
+    sys.path.insert(0, BACKEND)
+
+    from gunicorn.app.base import BaseApplication
+
+    import serving
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', args.bind or f'0.0.0.0:{port}')
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('timeout', args.timeout)
+            self.cfg.set('preload_app', not args.no_preload)
+            self.cfg.set('post_fork', lambda server, worker: serving.start_worker())
+
+        def load(self):
+            module = __import__(module_name)
+            if not args.no_preload:
+                # Weights only: the master never runs a forward pass, so no intra-op
+                # thread pool exists yet when the workers are forked
+                from model_registry import registry
+                registry.warm_up(getattr(module, 'SERVING_MODELS', model_names))
+                # Keep the collector from touching (and so copying) the shared objects' pages
+                gc.freeze()
+            return module.app
+
+    Server().run()
+
+
+if __name__ == '__main__':
+    main()
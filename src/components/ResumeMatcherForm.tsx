@@ -284,17 +284,41 @@ const ResumeMatcherForm = () => {
       uploadedResumes.forEach((file) => {
         formData.append("resumes", file, file.name);
       });
-      // You may need to update the URL below to your backend endpoint
-      const response = await fetch("http://localhost:5002/analyze", {
+      // Results stream in as NDJSON, one line per resume, then a ranked summary
+      const response = await fetch("http://localhost:5002/analyze/stream", {
         method: "POST",
         body: formData,
       });
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         const errorData = await response.json().catch(() => ({ error: "Unknown error" }));
         throw new Error(errorData.error || "Failed to analyze resumes");
       }
-      const data = await response.json();
-      setAnalysisResults(data);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let partial: any[] = [];
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() || "";
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.type === "result") {
+            const { type, ...result } = event;
+            partial = [...partial, result]
+              .sort((a, b) => b.match_percent - a.match_percent)
+              .slice(0, topNResumes);
+            setAnalysisResults(partial);
+          } else if (event.type === "summary") {
+            setAnalysisResults(event.results);
+          } else if (event.type === "error") {
+            throw new Error(event.details || event.error || "Failed to analyze resumes");
+          }
+        }
+      }
     } catch (err: any) {
       setAnalysisError(err.message || "Unknown error");
     } finally {
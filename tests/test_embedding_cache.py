@@ -0,0 +1,71 @@
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, ROOT)
+
+from embedding_cache import EmbeddingCache, text_key  # noqa: E402
+
+
+def vectors(n, dim=4, seed=0):
+    return np.random.default_rng(seed).random((n, dim), dtype=np.float32)
+
+
+def test_put_then_get_returns_the_stored_rows(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "org/model", dim=4, capacity=8)
+    stored = vectors(3)
+    cache.put_many(["a", "b", "c"], stored)
+
+    found = cache.get_many(["a", "c", "missing"])
+
+    assert set(found) == {"a", "c"}
+    np.testing.assert_array_equal(found["a"], stored[0])
+    np.testing.assert_array_equal(found["c"], stored[2])
+    assert cache.stats()["entries"] == 3
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_full_cache_evicts_the_least_recently_used_key(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", dim=4, capacity=3)
+    cache.put_many(["a", "b", "c"], vectors(3))
+    cache.get_many(["a"])  # "b" is now the oldest
+
+    cache.put_many(["d"], vectors(1, seed=1))
+
+    assert set(cache.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"}
+    assert cache.evictions == 1
+    assert cache.stats()["entries"] == 3
+
+
+def test_a_batch_larger_than_the_cache_keeps_its_newest_rows(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", dim=4, capacity=2)
+    stored = vectors(3)
+    cache.put_many(["a", "b", "c"], stored)
+
+    found = cache.get_many(["a", "b", "c"])
+
+    assert set(found) == {"b", "c"}
+    np.testing.assert_array_equal(found["c"], stored[2])
+
+
+def test_processes_sharing_a_directory_see_each_others_rows(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "model", dim=4, capacity=8)
+    second = EmbeddingCache(str(tmp_path), "model", dim=4, capacity=8)
+    stored = vectors(1)
+
+    first.put_many([text_key("a job description")], stored)
+    found = second.get_many([text_key("a  job\ndescription")])
+
+    np.testing.assert_array_equal(list(found.values())[0], stored[0])
+
+
+def test_changed_settings_start_an_empty_cache(tmp_path):
+    EmbeddingCache(str(tmp_path), "model", dim=4, capacity=8).put_many(["a"], vectors(1))
+
+    resized = EmbeddingCache(str(tmp_path), "model", dim=4, capacity=16)
+
+    assert resized.get_many(["a"]) == {}
+    assert resized.stats()["entries"] == 0
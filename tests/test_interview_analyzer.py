@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import supabase_client  # noqa: E402
+from fixtures import SupabaseStub  # noqa: E402
+from interview_analyzer import InterviewAnalyzer  # noqa: E402
+
+
+def result(candidate_name, interviewer):
+    return {
+        'candidate_name': candidate_name,
+        'interviewer': interviewer,
+        'original_feedback': "Solid system design answers.",
+        'summary': "Solid system design answers.",
+        'sentiment': 'Technical Ability',
+        'confidence': 0.5,
+        'traits': {'Confidence': 0.2, 'Communication': 0.3, 'Technical Ability': 0.5},
+        'row_key': f"key-{candidate_name}",
+    }
+
+
+@pytest.fixture
+def supabase(tmp_path, monkeypatch):
+    stub = SupabaseStub()
+    monkeypatch.setenv('SUPABASE_URL', stub.url)
+    monkeypatch.setenv('SUPABASE_KEY', 'test')
+    monkeypatch.setenv('SUPABASE_RETRIES', '0')
+    monkeypatch.setenv('ANALYSIS_MEMO_PATH', str(tmp_path / "memo.sqlite3"))
+    monkeypatch.setattr(supabase_client, '_shared', None)
+    yield stub
+    stub.close()
+
+
+def test_blank_interviewer_is_saved_as_null(supabase):
+    analyzer = InterviewAnalyzer()
+    # A chunk mixing blank and named interviewers: the blank one comes back from the DataFrame as NaN
+    result_df = pd.DataFrame([result("Ada", "Grace"), result("Alan", None)])
+
+    saved = analyzer.save_processed_results(result_df, 'job-1', {'file_url': f"{supabase.url}/f.csv"})
+
+    assert saved is not None
+    written = {row['candidate_name']: row for _, rows in supabase.writes for row in rows}
+    assert written['Ada']['interviewer'] == "Grace"
+    assert written['Alan']['interviewer'] is None
+
+
+def test_rows_total_is_unknown_until_the_csv_is_read(supabase, monkeypatch):
+    monkeypatch.setenv('CSV_CHUNK_ROWS', '2')
+    rows = "".join(f"Candidate {i},Feedback {i},Grace\n" for i in range(5))
+    supabase.files['/f.csv'] = ("candidate_name,interview_feedback,interviewer\n" + rows).encode()
+    analyzer = InterviewAnalyzer()
+
+    def analyze_rows(candidates, feedbacks, batch_size, progress, *args):
+        progress(len(feedbacks), len(feedbacks))
+        return []
+    monkeypatch.setattr(analyzer, '_analyze_rows', analyze_rows)
+
+    reported = []
+    for _ in analyzer.iter_processed_chunks({'file_url': f"{supabase.url}/f.csv"},
+                                            progress=lambda done, total: reported.append((done, total))):
+        pass
+
+    assert reported == [(2, None), (4, None), (5, None), (5, 5)]
@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from job_queue import JobEvents, JobQueue  # noqa: E402
+
+
+def backdate(queue, job_id, seconds):
+    """Pretend the job's worker last renewed its lease `seconds` ago"""
+    updated_at = (datetime.now() - timedelta(seconds=seconds)).isoformat()
+    queue._db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (updated_at, job_id))
+
+
+def test_submit_attaches_to_the_job_in_flight(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job, created = queue.submit("job-1:file.csv", {"job_id": "job-1"})
+    again, created_again = queue.submit("job-1:file.csv", {"job_id": "job-1"})
+    other, created_other = queue.submit("job-2:file.csv", {"job_id": "job-2"})
+
+    assert created and not created_again and created_other
+    assert again["id"] == job["id"]
+    assert other["id"] != job["id"]
+
+    # Once the job has finished, the same key queues a fresh analysis
+    claimed = queue.claim(timeout=0)
+    queue.complete(claimed["id"], {"status": "success"})
+    rerun, created_rerun = queue.submit("job-1:file.csv", {"job_id": "job-1"})
+    assert created_rerun and rerun["id"] != job["id"]
+
+
+def test_reopening_the_queue_leaves_live_jobs_running(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    queue = JobQueue(path, lease=60)
+    job, _ = queue.submit("job-1:file.csv", {})
+    queue.claim(timeout=0)
+
+    JobQueue(path, lease=60)  # e.g. another server process starting up
+
+    assert queue.get(job["id"])["status"] == "running"
+
+
+def test_expired_lease_is_requeued_and_claimed_again(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    crashed = JobQueue(path, lease=60)
+    job, _ = crashed.submit("job-1:file.csv", {})
+    assert crashed.claim(timeout=0)["id"] == job["id"]
+    backdate(crashed, job["id"], 120)
+
+    survivor = JobQueue(path, lease=60)
+    assert survivor.get(job["id"])["status"] == "queued"
+    assert survivor.claim(timeout=0)["id"] == job["id"]
+
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), lease=60)
+    job, _ = queue.submit("job-1:file.csv", {})
+    queue.claim(timeout=0)
+    backdate(queue, job["id"], 120)
+    queue.heartbeat([job["id"]])
+
+    assert queue.requeue_stale() == 0
+    assert queue.get(job["id"])["status"] == "running"
+
+
+def test_concurrent_claims_never_share_a_job(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    submitted = {JobQueue(path).submit(f"job-{i}", {})[0]["id"] for i in range(40)}
+    # Separate queues stand in for separate server processes, each with a few worker threads
+    queues = [JobQueue(path) for _ in range(3)]
+    claimed = []
+    claimed_lock = threading.Lock()
+
+    def worker(queue):
+        while True:
+            job = queue.claim(timeout=0)
+            if job is None:
+                return
+            with claimed_lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=worker, args=(queue,)) for queue in queues for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(submitted)
+
+
+def test_subscription_receives_results_published_before_iteration():
+    events = JobEvents()
+    subscription = events.subscribe("job-1", poll_interval=0.01)
+    events.publish("job-1", {"type": "result", "candidate_name": "C0"})
+    events.publish("job-1", {"type": "summary", "result": {}})
+    events.close("job-1")
+
+    assert [event["type"] for event in subscription] == ["result", "summary"]
+    assert not events.has_subscribers("job-1")
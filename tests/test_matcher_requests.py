@@ -0,0 +1,97 @@
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, ROOT)
+
+from fixtures import SAMPLE_JD, register_fixture_models, synthetic_resumes  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    workdir = tmp_path_factory.mktemp("matcher")
+    os.environ.update({
+        "EMBEDDING_CACHE_DIR": str(workdir / "embedding_cache"),
+        "CANDIDATE_INDEX_DIR": str(workdir / "candidate_index"),
+        "FINGERPRINT_DIR": str(workdir / "fingerprints"),
+    })
+    from model_registry import registry
+    register_fixture_models(registry)
+    import resume_matcher_backend as matcher
+    return matcher.app.test_client()
+
+
+def upload(resumes):
+    return [(io.BytesIO(content), filename) for filename, content in resumes]
+
+
+def analyze(client, **fields):
+    data = {"jd": SAMPLE_JD, "resumes": upload(synthetic_resumes(2, 120, ("txt",))), **fields}
+    return client.post("/analyze", data=data, content_type="multipart/form-data")
+
+
+@pytest.mark.parametrize("field, value, message", [
+    ("prefilter", "-1", "prefilter must be a non-negative number of resumes"),
+    ("prefilter", "all", "prefilter must be a non-negative number of resumes"),
+    ("lexical_weight", "1.5", "lexical_weight must be a number between 0 and 1"),
+    ("lexical_weight", "nan", "lexical_weight must be a number between 0 and 1"),
+    ("lexical_weight", "heavy", "lexical_weight must be a number between 0 and 1"),
+    ("candidate_skills", "{not json", "candidate_skills must be a JSON object mapping filenames to skill lists"),
+    ("candidate_skills", "[\"python\"]", "candidate_skills must be a JSON object mapping filenames to skill lists"),
+])
+def test_analyze_rejects_bad_lexical_settings(client, field, value, message):
+    response = analyze(client, **{field: value})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": message}
+
+
+def test_analyze_accepts_lexical_settings(client):
+    response = analyze(client, prefilter="1", lexical_weight="0.3", candidate_skills='{"resume_0.txt": ["python"]}')
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("params, message", [
+    ({"k": -1}, "k must be a non-negative number of candidates"),
+    ({"k": "five"}, "k must be a non-negative number of candidates"),
+    ({"nprobe": 0}, "nprobe must be a positive number of clusters"),
+    ({"nprobe": "wide"}, "nprobe must be a positive number of clusters"),
+])
+def test_search_rejects_bad_parameters(client, params, message):
+    response = client.post("/index/search", json={"jd": SAMPLE_JD, **params})
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": message}
+
+
+def test_search_with_k_zero_returns_nothing(client):
+    response = client.post("/index/search", json={"jd": SAMPLE_JD, "k": 0, "nprobe": 2})
+
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+
+def test_index_rejects_duplicate_candidate_ids(client):
+    data = {"resumes": upload(synthetic_resumes(2, 120, ("txt",), seed=1)), "candidate_ids": ["c-1", "c-1"]}
+    response = client.post("/index/resumes", data=data, content_type="multipart/form-data")
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "candidate_ids must be unique"}
+
+
+def test_index_keeps_ids_of_resumes_sharing_a_filename(client):
+    resumes = [("resume.txt", content) for _, content in synthetic_resumes(2, 120, ("txt",), seed=2)]
+    data = {"resumes": upload(resumes), "candidate_ids": ["ada", "grace"]}
+    response = client.post("/index/resumes", data=data, content_type="multipart/form-data")
+    assert response.status_code == 200
+    assert response.get_json()["indexed"] == 2
+
+    results = client.post("/index/search", json={"jd": SAMPLE_JD, "k": 100, "exact": "true"}).get_json()
+
+    assert {"ada", "grace"} <= {result["candidate_id"] for result in results}
@@ -0,0 +1,43 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+from result_memo import ResultMemo, row_key  # noqa: E402
+
+
+def test_row_key_depends_on_text_and_signature():
+    assert row_key("great communicator", "bart:v1") == row_key("great communicator", "bart:v1")
+    assert row_key("great communicator", "bart:v1") != row_key("great communicator", "bart:v2")
+    assert row_key("great communicator", "bart:v1") != row_key("weak communicator", "bart:v1")
+
+
+def test_outputs_survive_reopening(tmp_path):
+    path = str(tmp_path / "memo.sqlite3")
+    output = {"summary": "Strong", "traits": {"communication": 0.9}}
+    ResultMemo(path).put_many({"k1": output})
+
+    memo = ResultMemo(path)
+
+    assert memo.get_many(["k1", "k2", "k1"]) == {"k1": output}
+
+
+def test_saved_keys_are_tracked_per_job(tmp_path):
+    memo = ResultMemo(str(tmp_path / "memo.sqlite3"))
+    memo.mark_saved(1, {"Ada": "k1", "Grace": "k2"})
+    memo.mark_saved(1, {"Ada": "k3"})
+    memo.mark_saved(2, {"Ada": "k4"})
+
+    assert memo.saved_keys(1) == {"Ada": "k3", "Grace": "k2"}
+    assert memo.saved_keys("2") == {"Ada": "k4"}
+    assert memo.saved_keys(3) == {}
+
+
+def test_get_many_handles_more_keys_than_one_query_binds(tmp_path):
+    memo = ResultMemo(str(tmp_path / "memo.sqlite3"))
+    memo.put_many({f"k{i}": {"i": i} for i in range(1200)})
+
+    found = memo.get_many([f"k{i}" for i in range(0, 2400, 2)])
+
+    assert len(found) == 600 and found["k1198"] == {"i": 1198}
@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, ROOT)
+
+from vector_index import CandidateIndex  # noqa: E402
+
+DIM = 8
+
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def entries(*candidate_ids):
+    return [{"candidate_id": candidate_id} for candidate_id in candidate_ids]
+
+
+def test_search_ranks_the_closest_candidate_first(tmp_path):
+    index = CandidateIndex(str(tmp_path), DIM)
+    stored = vectors(5)
+    index.add(entries("a", "b", "c", "d", "e"), stored)
+
+    results = index.search(stored[2], k=2)
+
+    assert results[0][0]["candidate_id"] == "c"
+    assert abs(results[0][1] - 1.0) < 1e-5
+    assert len(results) == 2
+
+
+def test_second_instance_syncs_adds_and_replacements(tmp_path):
+    writer = CandidateIndex(str(tmp_path), DIM)
+    reader = CandidateIndex(str(tmp_path), DIM)
+    stored = vectors(3)
+    writer.add(entries("a", "b"), stored[:2])
+    assert len(reader) == 2
+
+    # Replacing "a" keeps its row; "c" is appended after it
+    writer.add([{"candidate_id": "a", "name": "updated"}, {"candidate_id": "c"}], [stored[2], stored[0]])
+
+    assert len(reader) == 3
+    best, _ = reader.search(stored[2], k=1)[0]
+    assert best == {"candidate_id": "a", "name": "updated"}
+    assert reader.search(stored[0], k=1)[0][0]["candidate_id"] == "c"
+
+
+def test_reopened_index_keeps_its_candidates(tmp_path):
+    stored = vectors(4)
+    CandidateIndex(str(tmp_path), DIM).add(entries("a", "b", "c", "d"), stored)
+
+    reopened = CandidateIndex(str(tmp_path), DIM)
+
+    assert len(reopened) == 4
+    assert reopened.search(stored[3], k=1)[0][0]["candidate_id"] == "d"
+
+
+def test_changed_dimension_discards_the_pool(tmp_path):
+    CandidateIndex(str(tmp_path), DIM).add(entries("a"), vectors(1))
+
+    assert len(CandidateIndex(str(tmp_path), DIM * 2)) == 0
+
+
+def test_ivf_retraining_reaches_other_instances(tmp_path):
+    writer = CandidateIndex(str(tmp_path), DIM, approximate=True, nprobe=2, ivf_min_size=16)
+    reader = CandidateIndex(str(tmp_path), DIM, approximate=True, nprobe=2, ivf_min_size=16)
+    stored = vectors(40)
+    writer.add(entries(*[f"c{i}" for i in range(16)]), stored[:16])
+    assert reader.stats()["ivf_clusters"] == 4
+
+    writer.add(entries(*[f"c{i}" for i in range(16, 40)]), stored[16:])
+
+    assert reader.stats()["ivf_clusters"] == writer.stats()["ivf_clusters"] == 6
+    # The probed clusters always include the one the query itself was assigned to
+    for i in (0, 20, 39):
+        assert reader.search(stored[i], k=1)[0][0]["candidate_id"] == f"c{i}"
+    assert reader.search(stored[5], k=40, exact=True)[0][0]["candidate_id"] == "c5"
+
+
+def test_legacy_files_are_imported(tmp_path):
+    stored = vectors(2)
+    np.save(tmp_path / "vectors.npy", stored / np.linalg.norm(stored, axis=1, keepdims=True))
+    with open(tmp_path / "metadata.json", "w") as f:
+        json.dump(entries("a", "b"), f)
+
+    index = CandidateIndex(str(tmp_path), DIM)
+
+    assert len(index) == 2
+    assert index.search(stored[1], k=1)[0][0]["candidate_id"] == "b"
+    assert not os.path.exists(tmp_path / "vectors.npy")
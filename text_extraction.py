@@ -0,0 +1,225 @@
+import collections
+import io
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+
+import docx
+import pdfplumber
+
+log = logging.getLogger(__name__)
+
+# Pages read per PDF; anything beyond this is ignored
+MAX_PDF_PAGES = int(os.getenv('MAX_PDF_PAGES', '50'))
+# Seconds a single document may spend in extraction before it is skipped
+EXTRACT_TIMEOUT = float(os.getenv('EXTRACT_TIMEOUT', '20'))
+# Seconds past EXTRACT_TIMEOUT before the parent kills a worker that did not answer
+EXTRACT_GRACE = 5
+# Worker processes used for PDF/DOCX extraction
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def extract_text_from_pdf(file_stream, max_pages=None):
+    text = ""
+    with pdfplumber.open(file_stream) as pdf:
+        pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+        for page in pages:
+            text += page.extract_text() or ""
+    return text
+
+
+def extract_text_from_docx(file_stream):
+    doc = docx.Document(file_stream)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+
+def needs_worker(filename):
+    """Whether a file is expensive enough to parse that it should go to the process pool"""
+    return filename.lower().endswith(('.pdf', '.docx'))
+
+
+def extract_text(filename, file_bytes, max_pages=MAX_PDF_PAGES):
+    """Extract plain text from an uploaded resume based on its extension"""
+    filename = filename.lower()
+    if filename.endswith('.pdf'):
+        return extract_text_from_pdf(io.BytesIO(file_bytes), max_pages=max_pages)
+    elif filename.endswith('.docx'):
+        return extract_text_from_docx(io.BytesIO(file_bytes))
+    elif filename.endswith('.doc'):
+        return ""  # Skip .doc for now
+    else:
+        return file_bytes.decode('utf-8', errors='ignore')
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout("extraction timed out")
+
+
+def _extract_in_worker(filename, file_bytes, max_pages, timeout):
+    """Worker task: returns (text, error) so unpicklable parser exceptions never cross the pipe"""
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_text(filename, file_bytes, max_pages=max_pages), None
+    except ExtractionTimeout:
+        return None, f"Extraction timed out after {timeout:g}s"
+    except Exception as e:
+        return None, str(e)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _serve(fd):
+    """Worker process main loop: run tasks sent over the socket until the parent goes away"""
+    conn = Connection(fd)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        conn.send(_extract_in_worker(*task))
+
+
+class _Worker:
+    """A fresh interpreter that imports only this module and extracts one file at a time.
+
+    Started with fork+exec, never a bare fork: the server process runs threads
+    whose locks a forked child would inherit held. multiprocessing's spawn and
+    forkserver contexts are avoided too, as they re-import the server's
+    __main__ module (and with it the model) in every worker.
+    """
+
+    def __init__(self):
+        parent, child = socket.socketpair()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        command = f"import sys; sys.path.insert(0, {directory!r}); import text_extraction; " \
+                  f"text_extraction._serve({child.fileno()})"
+        try:
+            self.process = subprocess.Popen([sys.executable, "-c", command], pass_fds=(child.fileno(),))
+        finally:
+            child.close()
+        self.conn = Connection(parent.detach())
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Bounded set of worker processes that extracts text from many uploads in parallel.
+
+    Each task arms its own SIGALRM timer, which interrupts pdfplumber's pure-Python
+    parsing. A worker is held by one request for one file at a time, so when a
+    worker still overruns (e.g. stuck in native code) only that worker is killed
+    and replaced; files of other requests in flight are unaffected. A request
+    waits for one worker and takes more only while they are free.
+    """
+
+    def __init__(self, workers=EXTRACT_WORKERS, timeout=EXTRACT_TIMEOUT, max_pages=MAX_PDF_PAGES):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _checkout(self, blocking=True):
+        """An idle (or newly started) worker, holding one of the pool's slots; None if none is free"""
+        if not self._slots.acquire(blocking):
+            return None
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            try:
+                worker = _Worker()
+            except BaseException:
+                self._slots.release()
+                raise
+        return worker
+
+    def _release(self, worker):
+        with self._lock:
+            self._idle.append(worker)
+        self._slots.release()
+
+    def _discard(self, worker):
+        worker.kill()
+        self._slots.release()
+
+    def extract_many(self, files):
+        """Extract [(filename, file_bytes), ...] and return [(text, error), ...] in the same order"""
+        results = [None] * len(files)
+        tasks = collections.deque()
+        for i, (filename, file_bytes) in enumerate(files):
+            if needs_worker(filename):
+                tasks.append((i, filename, file_bytes))
+                continue
+            try:
+                results[i] = (extract_text(filename, file_bytes, max_pages=self.max_pages), None)
+            except Exception as e:
+                results[i] = (None, str(e))
+        if not tasks:
+            return results
+
+        busy = {}  # connection -> (worker, file index, deadline)
+
+        def assign(worker):
+            if worker is None:
+                return
+            if not tasks:
+                self._release(worker)
+                return
+            i, filename, file_bytes = tasks.popleft()
+            worker.conn.send((filename, file_bytes, self.max_pages, self.timeout))
+            busy[worker.conn] = (worker, i, time.monotonic() + self.timeout + EXTRACT_GRACE)
+
+        try:
+            assign(self._checkout())
+            while tasks:
+                worker = self._checkout(blocking=False)
+                if worker is None:
+                    break
+                assign(worker)
+
+            while busy:
+                next_deadline = min(deadline for _, _, deadline in busy.values())
+                for conn in wait(list(busy), max(next_deadline - time.monotonic(), 0)):
+                    worker, i, _ = busy.pop(conn)
+                    try:
+                        results[i] = conn.recv()
+                    except (EOFError, OSError):
+                        results[i] = (None, "Extraction worker exited unexpectedly")
+                        self._discard(worker)
+                        worker = self._checkout(blocking=not busy) if tasks else None
+                    assign(worker)
+                now = time.monotonic()
+                for conn, (worker, i, deadline) in list(busy.items()):
+                    if deadline > now:
+                        continue
+                    del busy[conn]
+                    log.warning(f"Extraction worker overran its deadline on {files[i][0]}; replacing it")
+                    results[i] = (None, f"Extraction timed out after {self.timeout:g}s")
+                    self._discard(worker)
+                    assign(self._checkout(blocking=not busy) if tasks else None)
+        finally:
+            # Only reached with work outstanding when interrupted; those workers are mid-task
+            for worker, _, _ in busy.values():
+                self._discard(worker)
+        return results
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
@@ -0,0 +1,113 @@
+"""Size-bounded handling of bulk resume uploads.
+
+Multipart files stay in memory only up to UPLOAD_SPOOL_KB each and are spooled
+to temporary files beyond that. Every upload is checked for size and type
+before any parsing, then read back one bounded batch at a time, so a request
+holds at most one batch of raw file bytes however many resumes it carries.
+"""
+import io
+import os
+import tempfile
+
+from flask import Request
+from werkzeug.datastructures import FileStorage
+
+# Uploaded files larger than this are spooled to disk while the request body is parsed
+UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_KB', '512')) * 1024
+# Largest single resume; bigger files are rejected without being read
+UPLOAD_MAX_FILE_BYTES = int(os.getenv('UPLOAD_MAX_FILE_MB', '10')) * 1024 * 1024
+# Largest request body and most files per request; either is a 413 before the body is parsed
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv('UPLOAD_MAX_REQUEST_MB', '512')) * 1024 * 1024
+UPLOAD_MAX_FILES = int(os.getenv('UPLOAD_MAX_FILES', '5000'))
+# Files, and raw bytes, read into memory per extraction/embedding batch
+UPLOAD_BATCH_FILES = int(os.getenv('UPLOAD_BATCH_FILES', '64'))
+UPLOAD_BATCH_BYTES = int(os.getenv('UPLOAD_BATCH_MB', '32')) * 1024 * 1024
+
+# Leading bytes inspected to tell a file's real type from its extension
+SNIFF_BYTES = 1024
+MAGIC = {'.pdf': b'%PDF-', '.docx': b'PK\x03\x04'}
+UNSUPPORTED_SUFFIXES = ('.doc',)
+
+
+class SpoolingRequest(Request):
+    """Request whose uploaded files are kept in memory only while they are small"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="w+b")
+
+
+def detach_uploads(files):
+    """Take uploaded files over from the request, which closes its own once the view returns.
+
+    Returns FileStorage objects over the same spooled streams, for views that
+    read them later (while streaming a response); the caller closes them.
+    """
+    detached = []
+    for storage in files:
+        detached.append(FileStorage(storage.stream, storage.filename, storage.name, storage.content_type))
+        storage.stream = io.BytesIO()
+    return detached
+
+
+def upload_size(stream):
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def rejection(filename, stream, max_bytes=UPLOAD_MAX_FILE_BYTES):
+    """Why an upload should not be parsed at all, or None; reads at most its first SNIFF_BYTES"""
+    size = upload_size(stream)
+    if size == 0:
+        return "Empty file"
+    if size > max_bytes:
+        return f"File is {size / 1048576:.1f} MB, over the {max_bytes / 1048576:g} MB limit"
+    suffix = os.path.splitext(filename.lower())[1]
+    if suffix in UNSUPPORTED_SUFFIXES:
+        return f"Unsupported file type: {suffix}"
+    head = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+    if suffix in MAGIC:
+        if MAGIC[suffix] not in head:
+            return f"Not a valid {suffix[1:].upper()} file"
+    elif b"\x00" in head:
+        return "Not a text file"
+    return None
+
+
+def check_uploads(files, max_bytes=UPLOAD_MAX_FILE_BYTES):
+    """Split (filename, stream) uploads into those worth extracting and those rejected.
+
+    Returns (uploads, rejected), with `rejected` as [{"filename", "reason"}] like
+    the resumes skipped during extraction.
+    """
+    uploads, rejected = [], []
+    for filename, stream in files:
+        reason = rejection(filename, stream, max_bytes)
+        if reason is None:
+            uploads.append((filename, stream))
+        else:
+            rejected.append({"filename": filename, "reason": reason})
+    return uploads, rejected
+
+
+def upload_batches(uploads, max_files=UPLOAD_BATCH_FILES, max_bytes=UPLOAD_BATCH_BYTES):
+    """Read (filename, stream) uploads back as [(filename, bytes), ...] batches.
+
+    A batch ends at `max_files` files or before it would pass `max_bytes`
+    (a single larger file is a batch of its own). The previous batch is no
+    longer referenced here once the next one starts, so a caller that drops it
+    after extraction keeps one batch of bytes in memory at a time.
+    """
+    batch, size = [], 0
+    for filename, stream in uploads:
+        if batch and (len(batch) >= max_files or size + upload_size(stream) > max_bytes):
+            yield batch
+            batch, size = [], 0
+        stream.seek(0)
+        file_bytes = stream.read()
+        batch.append((filename, file_bytes))
+        size += len(file_bytes)
+    if batch:
+        yield batch
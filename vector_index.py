@@ -0,0 +1,344 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from dedup import SimHashIndex
+from file_lock import FileLock
+from local_db import LocalDB
+
+log = logging.getLogger(__name__)
+
+
+def normalize(vectors):
+    """L2-normalize rows so a dot product equals cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first, without sorting the whole array"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def kmeans(vectors, n_clusters, iterations=10, seed=0):
+    """Spherical k-means on normalized vectors; returns normalized centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = vectors[assignments == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+            else:
+                centroids[c] = vectors[rng.integers(len(vectors))]
+        centroids = normalize(centroids)
+    return centroids
+
+
+class CandidateIndex:
+    """On-disk index of candidate resume embeddings for top-k JD search.
+
+    Vectors are kept normalized as raw float32 rows in `vectors.f32`, with one
+    row per candidate in the `candidates` table of `index.sqlite3` holding its
+    metadata entry and IVF cluster. Exact search scores every row; with
+    `approximate=True` an IVF layer (k-means centroids over the pool, in
+    `ivf.npz`) restricts scoring to the rows in the `nprobe` clusters closest to
+    the query once the pool reaches `ivf_min_size`. Server processes sharing a
+    directory serialize on a flock; every add bumps a version number, and the
+    other processes read back only the rows written since the version they last
+    saw. Entries that carry a text fingerprint (`digest`, `simhash`) can be
+    looked up by it, to recognise a resume that is already in the pool.
+    """
+
+    def __init__(self, directory, dim, approximate=False, nprobe=8, ivf_min_size=5000):
+        self.directory = directory
+        self.dim = dim
+        self.approximate = approximate
+        self.nprobe = nprobe
+        self.ivf_min_size = ivf_min_size
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.ivf_path = os.path.join(directory, "ivf.npz")
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock = FileLock(os.path.join(directory, "lock"))
+        self._db = LocalDB(os.path.join(directory, "index.sqlite3"))
+        with self._lock:
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS candidates (row INTEGER PRIMARY KEY, candidate_id TEXT NOT NULL UNIQUE, "
+                "entry TEXT NOT NULL, cluster INTEGER, version INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS candidates_version ON candidates (version)")
+            self._check_dim()
+            self._import_legacy()
+            self._load()
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return len(self._metadata)
+
+    def _meta(self, name):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def _set_meta(self, name, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def _check_dim(self):
+        dim = self._meta("dim")
+        if dim and dim != self.dim:
+            log.warning(f"Discarding candidate index at {self.directory}: built for dim {dim}, not {self.dim}")
+            with self._db.transaction():
+                self._db.execute("DELETE FROM candidates")
+                self._set_meta("version", self._meta("version") + 1)
+                self._set_meta("ivf", self._meta("ivf") + 1)
+            for path in (self.vectors_path, self.ivf_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        with self._db.transaction():
+            self._set_meta("dim", self.dim)
+
+    def _import_legacy(self):
+        """Move a pool saved by earlier versions (`vectors.npy` + `metadata.json`) into the table"""
+        vectors_path = os.path.join(self.directory, "vectors.npy")
+        metadata_path = os.path.join(self.directory, "metadata.json")
+        if not (os.path.exists(vectors_path) and os.path.exists(metadata_path)):
+            return
+        vectors = np.load(vectors_path)
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+        if vectors.shape[1:] != (self.dim,) or len(vectors) != len(metadata):
+            log.warning(f"Ignoring candidate index at {self.directory}: shape does not match metadata")
+        elif not self._db.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]:
+            assignments = [None] * len(metadata)
+            if os.path.exists(self.ivf_path):
+                ivf = np.load(self.ivf_path)
+                if len(ivf["assignments"]) == len(vectors):
+                    assignments = ivf["assignments"].tolist()
+            self._write_vectors(0, vectors)
+            with self._db.transaction():
+                version = self._meta("version") + 1
+                self._db.executemany(
+                    "INSERT INTO candidates (row, candidate_id, entry, cluster, version) VALUES (?, ?, ?, ?, ?)",
+                    [(row, entry["candidate_id"], json.dumps(entry), cluster, version)
+                     for row, (entry, cluster) in enumerate(zip(metadata, assignments))],
+                )
+                self._set_meta("version", version)
+        os.remove(vectors_path)
+        os.remove(metadata_path)
+
+    def _write_vectors(self, row, vectors):
+        """Write consecutive vectors into `vectors.f32` starting at `row`"""
+        mode = "r+b" if os.path.exists(self.vectors_path) else "w+b"
+        with open(self.vectors_path, mode) as f:
+            f.seek(row * self.dim * 4)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+    def _read_vectors(self, rows):
+        count = os.path.getsize(self.vectors_path) // (self.dim * 4) if os.path.exists(self.vectors_path) else 0
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, self.dim)) if count else None
+        if rows and (matrix is None or max(rows) >= count):
+            raise ValueError(f"{self.vectors_path} is shorter than the candidates table")
+        return np.array(matrix[rows], dtype=np.float32) if rows else np.empty((0, self.dim), dtype=np.float32)
+
+    def _load(self):
+        self._vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._metadata = []
+        self._rows = {}  # candidate_id -> row
+        self._centroids = None
+        self._assignments = None
+        self._lists = None  # cluster -> rows, rebuilt lazily after the assignments change
+        self._fingerprints = None  # SimHashIndex over entries' fingerprints, rebuilt lazily after changes
+        self._trained_size = 0
+        self._version = self._meta("version")
+        self._ivf_version = self._meta("ivf")
+        rows = self._db.execute("SELECT row, candidate_id, entry, cluster FROM candidates ORDER BY row").fetchall()
+        try:
+            vectors = self._read_vectors([row for row, _, _, _ in rows])
+        except ValueError as e:
+            log.warning(f"Ignoring candidate index at {self.directory}: {str(e)}")
+            return
+        self._vectors = vectors
+        self._metadata = [json.loads(entry) for _, _, entry, _ in rows]
+        self._rows = {candidate_id: row for row, candidate_id, _, _ in rows}
+        if os.path.exists(self.ivf_path) and rows and all(cluster is not None for _, _, _, cluster in rows):
+            ivf = np.load(self.ivf_path)
+            self._centroids = ivf["centroids"]
+            self._assignments = np.array([cluster for _, _, _, cluster in rows], dtype=np.int64)
+            self._trained_size = int(ivf["trained_size"])
+
+    def _sync(self):
+        """Read back the rows other processes have written since this one last looked"""
+        version = self._meta("version")
+        if version == self._version:
+            return
+        if self._meta("ivf") != self._ivf_version:
+            # Retraining reassigns every row, so start over
+            self._load()
+            return
+        changed = self._db.execute(
+            "SELECT row, candidate_id, entry, cluster FROM candidates WHERE version > ? ORDER BY row",
+            (self._version,),
+        ).fetchall()
+        try:
+            vectors = self._read_vectors([row for row, _, _, _ in changed])
+        except ValueError as e:
+            log.warning(f"Reloading candidate index at {self.directory}: {str(e)}")
+            self._load()
+            return
+        appended = [i for i, (row, _, _, _) in enumerate(changed) if row >= len(self._metadata)]
+        if appended:
+            self._vectors = np.concatenate([self._vectors, np.empty((len(appended), self.dim), dtype=np.float32)])
+            self._metadata.extend([None] * len(appended))
+            if self._assignments is not None:
+                self._assignments = np.concatenate([self._assignments, np.zeros(len(appended), dtype=np.int64)])
+        for (row, candidate_id, entry, cluster), vector in zip(changed, vectors):
+            self._vectors[row] = vector
+            self._metadata[row] = json.loads(entry)
+            self._rows[candidate_id] = row
+            if self._assignments is not None:
+                self._assignments[row] = cluster
+        self._lists = None
+        self._fingerprints = None
+        self._version = version
+
+    def _train_ivf(self):
+        n_clusters = max(1, int(np.sqrt(len(self._vectors))))
+        self._centroids = kmeans(self._vectors, n_clusters)
+        self._assignments = np.argmax(self._vectors @ self._centroids.T, axis=1)
+        self._trained_size = len(self._vectors)
+
+    def add(self, entries, embeddings):
+        """Insert or replace candidates; each entry is a dict with at least `candidate_id`"""
+        vectors = normalize(embeddings)
+        with self._lock:
+            self._sync()
+            start = len(self._metadata)
+            appended = []
+            changed = {}  # row -> entry
+            for entry, vector in zip(entries, vectors):
+                row = self._rows.get(entry["candidate_id"])
+                if row is None:
+                    row = self._rows[entry["candidate_id"]] = start + len(appended)
+                    appended.append((entry, vector))
+                elif row >= start:
+                    # Repeated within this call before being appended
+                    appended[row - start] = (entry, vector)
+                else:
+                    self._metadata[row] = entry
+                    self._vectors[row] = vector
+                    if self._assignments is not None:
+                        self._assignments[row] = np.argmax(self._centroids @ vector)
+                    self._write_vectors(row, vector[np.newaxis])
+                changed[row] = entry
+            if appended:
+                new_vectors = np.stack([vector for _, vector in appended])
+                self._write_vectors(start, new_vectors)
+                self._vectors = np.concatenate([self._vectors, new_vectors])
+                self._metadata.extend(entry for entry, _ in appended)
+                if self._assignments is not None:
+                    self._assignments = np.concatenate([
+                        self._assignments, np.argmax(new_vectors @ self._centroids.T, axis=1)
+                    ])
+
+            self._lists = None
+            self._fingerprints = None
+
+            # Retrain once the pool has doubled since the centroids were fitted
+            retrain = self.approximate and len(self._vectors) >= self.ivf_min_size \
+                and len(self._vectors) >= 2 * self._trained_size
+            if retrain:
+                self._train_ivf()
+                tmp_ivf = self.ivf_path + ".tmp.npz"
+                np.savez(tmp_ivf, centroids=self._centroids, trained_size=self._trained_size)
+                os.replace(tmp_ivf, self.ivf_path)
+
+            with self._db.transaction():
+                self._version = self._meta("version") + 1
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO candidates (row, candidate_id, entry, cluster, version) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(row, entry["candidate_id"], json.dumps(entry),
+                      None if self._assignments is None else int(self._assignments[row]), self._version)
+                     for row, entry in changed.items()],
+                )
+                if retrain:
+                    self._db.executemany(
+                        "UPDATE candidates SET cluster = ? WHERE row = ?",
+                        [(int(cluster), row) for row, cluster in enumerate(self._assignments)],
+                    )
+                    self._ivf_version = self._meta("ivf") + 1
+                    self._set_meta("ivf", self._ivf_version)
+                self._set_meta("version", self._version)
+            return len(self._metadata)
+
+    def search(self, query_embedding, k, exact=False, nprobe=None):
+        """Return [(metadata, cosine_similarity), ...] for the k best candidates"""
+        query = normalize(np.asarray(query_embedding).reshape(1, -1))[0]
+        with self._lock:
+            self._sync()
+            vectors = self._vectors
+            metadata = self._metadata
+            rows = None
+            if not exact and self.approximate and self._centroids is not None:
+                if self._lists is None:
+                    order = np.argsort(self._assignments, kind="stable")
+                    bounds = np.searchsorted(self._assignments[order], np.arange(len(self._centroids) + 1))
+                    self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self._centroids))]
+                probes = top_k(self._centroids @ query, nprobe or self.nprobe)
+                rows = np.concatenate([self._lists[c] for c in probes])
+                vectors = vectors[rows]
+
+        scores = vectors @ query
+        best = top_k(scores, k)
+        if rows is not None:
+            return [(metadata[rows[i]], float(scores[i])) for i in best]
+        return [(metadata[i], float(scores[i])) for i in best]
+
+    def match_fingerprints(self, fingerprints, max_distance=6):
+        """Find indexed candidates with the same or nearly the same text.
+
+        Returns, for each (digest, simhash), (metadata, vector, "exact" | "near")
+        of the matching candidate or None. Entries indexed without `digest` and
+        `simhash` never match.
+        """
+        with self._lock:
+            self._sync()
+            if self._fingerprints is None or self._fingerprints.max_distance != max_distance:
+                self._fingerprints = SimHashIndex(max_distance)
+                for row, entry in enumerate(self._metadata):
+                    if "simhash" in entry:
+                        self._fingerprints.add(row, (entry["digest"], entry["simhash"]))
+            matches = []
+            for fingerprint in fingerprints:
+                found = self._fingerprints.match(fingerprint)
+                if found is None:
+                    matches.append(None)
+                else:
+                    row, match = found
+                    matches.append((self._metadata[row], np.array(self._vectors[row]), match))
+            return matches
+
+    def stats(self):
+        with self._lock:
+            self._sync()
+            return {
+                "size": len(self._metadata),
+                "dim": self.dim,
+                "approximate": self.approximate,
+                "ivf_clusters": 0 if self._centroids is None else len(self._centroids),
+                "nprobe": self.nprobe,
+            }